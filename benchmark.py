@@ -0,0 +1,326 @@
+"""
+Benchmark suite for the Enigma machine.
+
+Covers construction (Enigma.__init__, Rotor.ring_setting_rewiring), encrypt_decrypt throughput from 10 letters to
+100 MB, sanitize_input_text, end-to-end enigma_run, the plugboard hill climb of the ciphertext-only attack and the
+cold-start import time of the startup optimized entry point. Results are written as JSON and can be compared against a
+stored baseline, failing (exit code 1) if any benchmark got slower than the allowed tolerance or importing
+enigma_quick.py takes longer than its budget.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --tolerance 0.2
+    python benchmark.py --import-only --import-budget 0.01
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from compiled_enigma import *
+
+BENCHMARK_SETTINGS = ((2, 4, 5), ("AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"), ('B', 'L', 'A'),
+                      ('B', 'U', 'L'), 'B')
+
+DEFAULT_SIZES = (10, 1000, 100000, 10000000, 100000000)
+DEFAULT_MAX_REFERENCE_SIZE = 100000  # Enigma.encrypt_decrypt() is too slow to time on larger messages
+DEFAULT_MIN_TIME = 0.2  # seconds each benchmark is repeated for
+
+IMPORT_TIME_MODULES = ("enigma", "enigma_quick", "compiled_enigma")
+IMPORT_TIME_RUNS = 5
+IMPORT_TIME_BUDGET = 0.010  # seconds, cold-start import of enigma_quick.py must stay under this
+
+
+##############################################################################
+# Measuring
+##############################################################################
+def measure(function, units_per_call: int, unit: str, min_time: float = DEFAULT_MIN_TIME) -> dict:
+    """
+    Time function (called with no arguments) until at least min_time seconds have passed, keeping the best call,
+    then call it once more under tracemalloc to count memory allocated.
+
+    :return: dict with the rate (units per second), best seconds per call and allocation counts
+    """
+
+    best_time = None
+    total_time = 0.0
+    num_calls = 0
+
+    while total_time < min_time or num_calls < 3:
+        start_time = time.perf_counter()
+        function()
+        call_time = time.perf_counter() - start_time
+
+        total_time += call_time
+        num_calls += 1
+        if best_time is None or call_time < best_time:
+            best_time = call_time
+
+        # a single slow call (ex. 100 MB) is enough
+        if call_time > min_time:
+            break
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    function()
+    snapshot_after = tracemalloc.take_snapshot()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    allocation_stats = snapshot_after.compare_to(snapshot_before, "filename")
+
+    return {
+        "rate": units_per_call / best_time if best_time > 0 else float("inf"),
+        "unit": unit + "/sec",
+        "seconds_per_call": best_time,
+        "calls": num_calls,
+        "peak_alloc_bytes": peak_bytes,
+        "retained_blocks": sum(stat.count_diff for stat in allocation_stats)
+    }
+
+
+def measure_import_time(module_name: str, runs: int = IMPORT_TIME_RUNS) -> dict:
+    """
+    Import module_name in runs fresh interpreters (python -X importtime) and keep the best cumulative import time,
+    which covers every module it imports that the interpreter had not already loaded at startup.
+
+    An untimed import first writes the bytecode cache, same as the first run of an installed copy.
+
+    :return: dict with the rate (imports per second) and best seconds per import
+    """
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    best_time = None
+
+    for run_i in range(runs + 1):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module_name],
+                                   capture_output=True, text=True, check=True, env=env,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        # the module itself finishes importing last: "import time: self [us] | cumulative | module_name"
+        import_time = int(completed.stderr.strip().splitlines()[-1].split("|")[1]) / 1e6
+        if run_i > 0 and (best_time is None or import_time < best_time):
+            best_time = import_time
+
+    return {
+        "rate": 1 / best_time if best_time > 0 else float("inf"),
+        "unit": "imports/sec",
+        "seconds_per_call": best_time,
+        "calls": runs
+    }
+
+
+def random_letters(num_letters: int, seed: int = 0) -> str:
+    """ Output a str of num_letters random uppercase letters (a random 64 KiB block repeated for large sizes). """
+
+    rng = random.Random(seed)
+    block = bytes(rng.randrange(65, 91) for _ in range(min(num_letters, 65536)))
+
+    return (block * (num_letters // 65536 + 1))[:num_letters].decode("ascii")
+
+
+def new_enigma() -> Enigma:
+    """ Output an Enigma machine set up with BENCHMARK_SETTINGS. """
+    return Enigma(*BENCHMARK_SETTINGS)
+
+
+##############################################################################
+# Benchmarks
+##############################################################################
+def bench_construction(min_time: float) -> dict:
+    """ Cost of setting up an Enigma machine and of rewiring one rotor for its ring setting. """
+
+    rotor = Rotor(rotor_chosen=1, starting_rotor_pos_letter='A', ring_setting_letter='A')
+    rotor_output_str = "EKMFLGDQVZNTOWYHXUSPAIBRCJ"
+
+    return {
+        "construction/Enigma.__init__": measure(lambda: [new_enigma() for _ in range(100)], 100, "machines",
+                                                min_time),
+        "construction/Rotor.ring_setting_rewiring": measure(
+            lambda: [rotor.ring_setting_rewiring(rotor_output_str, 'M') for _ in range(100)], 100, "rotors", min_time)
+    }
+
+
+def bench_encrypt_decrypt(sizes: tuple, max_reference_size: int, min_time: float) -> dict:
+    """ Throughput of every engine across message sizes. """
+
+    results = {}
+
+    try:
+        import numpy as np
+        from bulk_enigma import bulk_encrypt_decrypt
+    except ImportError:
+        np = None
+
+    for size in sizes:
+        text = random_letters(size)
+        text_bytes = text.encode("ascii")
+
+        if size <= max_reference_size:
+            results["encrypt_decrypt/reference/%d" % size] = measure(
+                lambda: new_enigma().encrypt_decrypt(text), size, "letters", min_time)
+
+        results["encrypt_decrypt/compiled/%d" % size] = measure(
+            lambda: CompiledEnigma(new_enigma()).encrypt_decrypt_bytes(text_bytes), size, "letters", min_time)
+
+        if np is not None:
+            input_array = np.frombuffer(text_bytes, dtype=np.uint8)
+            results["encrypt_decrypt/bulk/%d" % size] = measure(
+                lambda: bulk_encrypt_decrypt(CompiledEnigma(new_enigma()), input_array), size, "letters", min_time)
+
+    return results
+
+
+def bench_sanitize_input_text(sizes: tuple, min_time: float) -> dict:
+    """ Cost of sanitize_input_text() on lowercase text split into groups of 5 letters. """
+
+    results = {}
+
+    for size in sizes:
+        letters = random_letters(size).lower()
+        text = " ".join(letters[i:i + 5] for i in range(0, len(letters), 5))
+        results["sanitize_input_text/%d" % size] = measure(lambda: sanitize_input_text(text), size, "letters",
+                                                           min_time)
+
+    return results
+
+
+def bench_enigma_run(sizes: tuple, min_time: float) -> dict:
+    """ End-to-end enigma_run(): input check, settings check, machine setup and encryption. """
+
+    results = {}
+
+    for size in sizes:
+        text = random_letters(size)
+        results["enigma_run/%d" % size] = measure(
+            lambda: enigma_run(BENCHMARK_SETTINGS[0], list(BENCHMARK_SETTINGS[1]), list(BENCHMARK_SETTINGS[2]),
+                               list(BENCHMARK_SETTINGS[3]), BENCHMARK_SETTINGS[4], text), size, "letters", min_time)
+
+    return results
+
+
+def bench_ciphertext_only(min_time: float) -> dict:
+    """ Plugboard candidates decrypted and scored per second, the inner loop of the ciphertext-only attack. """
+
+    from ciphertext_only import NgramScorer, benchmark_candidates_per_second
+
+    trigram_scorer = NgramScorer.from_corpus("".join(random.Random(1).choice("ETAOINSHRDLU") for _ in range(50000)), 3)
+    results = {}
+
+    for name, ngram_scorer in (("ioc", None), ("trigram", trigram_scorer)):
+        rate = benchmark_candidates_per_second(duration=min_time, ngram_scorer=ngram_scorer)
+        results["ciphertext_only/" + name] = {"rate": rate, "unit": "candidates/sec", "seconds_per_call": 1 / rate}
+
+    return results
+
+
+def bench_import_time(runs: int = IMPORT_TIME_RUNS) -> dict:
+    """ Cold-start import time of the modules a short-lived process loads. """
+    return {"import/" + module_name: measure_import_time(module_name, runs) for module_name in IMPORT_TIME_MODULES}
+
+
+def run_benchmarks(sizes: tuple = DEFAULT_SIZES, max_reference_size: int = DEFAULT_MAX_REFERENCE_SIZE,
+                   min_time: float = DEFAULT_MIN_TIME) -> dict:
+    """ Run every benchmark and output the results as a JSON-ready dict. """
+
+    reference_sizes = tuple(size for size in sizes if size <= max_reference_size)
+
+    benchmarks = {}
+    benchmarks.update(bench_construction(min_time))
+    benchmarks.update(bench_encrypt_decrypt(sizes, max_reference_size, min_time))
+    benchmarks.update(bench_sanitize_input_text(reference_sizes, min_time))
+    benchmarks.update(bench_enigma_run(reference_sizes, min_time))
+    benchmarks.update(bench_ciphertext_only(min_time))
+    benchmarks.update(bench_import_time())
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": benchmarks
+    }
+
+
+##############################################################################
+# Baseline comparison
+##############################################################################
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare results against a baseline. A benchmark regressed if its rate dropped by more than tolerance
+    (ex. 0.2 is 20% slower). Benchmarks missing from either side are skipped.
+
+    :return: list of str describing every regression
+    """
+
+    regressions = []
+
+    for name, baseline_result in sorted(baseline["benchmarks"].items()):
+        result = results["benchmarks"].get(name)
+        if result is None:
+            continue
+
+        if result["rate"] < baseline_result["rate"] * (1 - tolerance):
+            regressions.append("%s: %.4g %s, baseline %.4g %s (%.1f%% slower)" % (
+                name, result["rate"], result["unit"], baseline_result["rate"], baseline_result["unit"],
+                100 * (1 - result["rate"] / baseline_result["rate"])))
+
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """ Run the benchmarks, save them and compare them against a baseline if asked to. """
+
+    parser = argparse.ArgumentParser(description="Benchmark the Enigma machine.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="message sizes in letters")
+    parser.add_argument("--max-reference-size", type=int, default=DEFAULT_MAX_REFERENCE_SIZE,
+                        help="largest message timed with Enigma.encrypt_decrypt(), sanitize_input_text and enigma_run")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="seconds to repeat each benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline")
+    parser.add_argument("--import-only", action="store_true", help="only run the import time benchmarks")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_TIME_BUDGET,
+                        help="seconds importing enigma_quick.py may take")
+    args = parser.parse_args(argv)
+
+    if args.import_only:
+        results = {"python": platform.python_version(), "platform": platform.platform(),
+                   "benchmarks": bench_import_time()}
+    else:
+        results = run_benchmarks(tuple(args.sizes), args.max_reference_size, args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), args.tolerance)
+
+        if regressions:
+            print("PERFORMANCE REGRESSION", file=sys.stderr)
+            for regression in regressions:
+                print("  " + regression, file=sys.stderr)
+            return 1
+
+    import_time = results["benchmarks"]["import/enigma_quick"]["seconds_per_call"]
+    if import_time > args.import_budget:
+        print("IMPORT TIME OVER BUDGET: enigma_quick %.2f ms, budget %.2f ms" % (import_time * 1e3,
+                                                                               args.import_budget * 1e3),
+              file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
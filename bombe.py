@@ -0,0 +1,444 @@
+"""
+Turing-Welchman bombe: finds rotor order and starting positions from a crib without knowing the plugboard.
+
+Each crib letter and the ciphertext letter under it are joined in a menu (a graph of letters), edge i saying that
+S(cipher letter) = Z_i(S(crib letter)), where S is the plugboard and Z_i the scrambler (rotors and reflector, no
+plugboard) at that keypress. For every rotor state, the bombe assumes a stecker partner for the menu's most connected
+letter and follows the menu's edges (and the diagonal board, S(a) = x means S(x) = a) to every partner that implies.
+Each letter's possible partners are a 26-bit register: a hypothesis lighting a second bit in a register gives a
+letter two partners and is dropped at once. A rotor state where some hypothesis survives is a stop. Before that, the
+menu's loops rule out most hypotheses of a rotor state at once (a partner must come back to itself around a loop).
+
+Scrambler tables come from CompiledEnigma built with no plugboard, one table per rotor state. Stops are checked by
+decrypting the crib with a normal Enigma set up with the stecker pairs the stop implies.
+
+    stops = run_bombe(ciphertext, "WETTERVORHERSAGE", rotor_orders=[(2, 4, 5)], reflectors=('B',))
+"""
+
+import os
+
+from compiled_enigma import *
+from crib_search import ALL_REFLECTORS, ALL_ROTOR_ORDERS, sanitize_search_text
+
+# translate b"A" to b"Z" into letter indexes 0 to 25
+LETTERS_TO_INDEXES = bytes.maketrans(ALPHABET, bytes(range(26)))
+IDENTITY_INDEXES = bytes(range(26))  # every letter index to itself
+
+
+##############################################################################
+# Menu
+##############################################################################
+class Menu:
+    """
+    Defines the menu of a crib aligned with ciphertext: one edge per crib letter, joining it to the ciphertext letter
+    it was encrypted to at that keypress.
+    """
+
+    __slots__ = ("crib_offset", "edges", "adjacency", "components", "test_letter", "test_component", "num_loops",
+                 "tree_edges", "loop_edges")
+
+    def __init__(self, ciphertext: bytes, crib: bytes, crib_offset: int = 0):
+        """
+        Build the menu of crib (uppercase letters) starting crib_offset letters into ciphertext.
+
+        Raises ValueError if the crib does not fit, or a crib letter is over the same ciphertext letter (an Enigma
+        never encrypts a letter to itself, so the crib cannot be at this offset).
+        """
+
+        if crib_offset < 0 or crib_offset + len(crib) > len(ciphertext) or not crib:
+            raise ValueError("Crib does not fit in the ciphertext at the given offset.")
+
+        self.crib_offset = crib_offset
+
+        # (keypress index, crib letter index, cipher letter index)
+        self.edges = []
+        self.adjacency = [[] for _ in range(26)]
+
+        for crib_i, crib_letter in enumerate(crib):
+            cipher_letter = ciphertext[crib_offset + crib_i]
+            if cipher_letter == crib_letter:
+                raise ValueError("Crib letter %s at offset %d is over the same ciphertext letter."
+                                 % (chr(crib_letter), crib_offset + crib_i))
+
+            edge_i = len(self.edges)
+            self.edges.append((crib_offset + crib_i, crib_letter - 65, cipher_letter - 65))
+            self.adjacency[crib_letter - 65].append((cipher_letter - 65, edge_i))
+            self.adjacency[cipher_letter - 65].append((crib_letter - 65, edge_i))
+
+        self.components = self.find_components()
+
+        # a menu with more loops (independent cycles) refutes wrong hypotheses sooner and gives fewer false stops
+        num_letters = sum(len(component) for component in self.components)
+        self.num_loops = len(self.edges) - num_letters + len(self.components)
+
+        # the bombe tests the most connected letter of the largest component
+        self.test_component = self.components[0]
+        self.test_letter = max(sorted(self.test_component), key=lambda letter_i: len(self.adjacency[letter_i]))
+
+        self.tree_edges, self.loop_edges = self.split_edges()
+
+    def find_components(self) -> list:
+        """ Output the sets of letters (as indexes) joined by the menu's edges, largest first. """
+
+        components = []
+        seen = set()
+
+        for letter_i in range(26):
+            if letter_i in seen or not self.adjacency[letter_i]:
+                continue
+
+            component = {letter_i}
+            to_visit = [letter_i]
+            while to_visit:
+                for other_letter_i, edge_i in self.adjacency[to_visit.pop()]:
+                    if other_letter_i not in component:
+                        component.add(other_letter_i)
+                        to_visit.append(other_letter_i)
+
+            seen |= component
+            components.append(component)
+
+        return sorted(components, key=len, reverse=True)
+
+    def split_edges(self) -> tuple:
+        """
+        Split the edges of the test letter's component into a spanning tree grown from the test letter and the edges
+        closing a loop.
+
+        :return: tuple(list of tuple(parent letter, child letter, edge index) in the order the tree was grown,
+                       list of tuple(letter, other letter, edge index))
+        """
+
+        tree_edges = []
+        loop_edges = []
+        reached = {self.test_letter}
+        to_visit = [self.test_letter]
+        used_edges = set()
+
+        while to_visit:
+            letter_i = to_visit.pop(0)
+
+            for other_letter_i, edge_i in self.adjacency[letter_i]:
+                if edge_i in used_edges:
+                    continue
+                used_edges.add(edge_i)
+
+                if other_letter_i in reached:
+                    loop_edges.append((letter_i, other_letter_i, edge_i))
+                else:
+                    reached.add(other_letter_i)
+                    tree_edges.append((letter_i, other_letter_i, edge_i))
+                    to_visit.append(other_letter_i)
+
+        return tree_edges, loop_edges
+
+
+##############################################################################
+# Bombe
+##############################################################################
+def fit_ring_settings(rotor_choices: tuple, ring_settings: tuple) -> tuple:
+    """
+    Output ring settings for a rotor order: ring settings of the three stepping rotors get 'A' added for an M4 fourth
+    rotor (which never steps, so its ring setting only shifts which of its positions is which).
+
+    Raises ValueError if there are neither three ring settings nor one per rotor.
+    """
+
+    if len(ring_settings) == len(rotor_choices):
+        return tuple(ring_settings)
+
+    if len(ring_settings) == 3 and len(rotor_choices) == 4:
+        return ('A',) + tuple(ring_settings)
+
+    raise ValueError("Ring settings %s do not fit rotor order %s" % (tuple(ring_settings), tuple(rotor_choices)))
+
+
+def build_scrambler_tables(rotor_choices: tuple, ring_settings: tuple, reflector: str,
+                           fourth_rotor_pos: str = 'A') -> tuple:
+    """
+    Output the scrambler of every rotor state of a rotor order, ring settings and reflector with no plugboard. On
+    the M4, the fourth rotor stays at fourth_rotor_pos.
+
+    :return: tuple(bytes of 26 letter indexes per rotor state, list of the same as a bytes.translate() table per
+                   rotor state, notch flags of the middle and right rotor)
+    """
+
+    starting_positions = ((fourth_rotor_pos,) if len(rotor_choices) == 4 else ()) + ('A', 'A', 'A')
+    machine = CompiledEnigma(Enigma(tuple(rotor_choices), (), starting_positions, tuple(ring_settings), reflector))
+    machine.compile_all()
+
+    scrambler_tables = bytes(machine.state_tables).translate(LETTERS_TO_INDEXES)
+    unused_indexes = bytes(range(26, 256))
+    scrambler_translations = [scrambler_tables[state_i * 26:state_i * 26 + 26] + unused_indexes
+                              for state_i in range(NUM_ROTOR_STATES)]
+
+    return scrambler_tables, scrambler_translations, machine.notch_flags[1:]
+
+
+def get_menu_states(start_state_i: int, menu: Menu, notch_flags: tuple) -> list:
+    """ Output the rotor state of each menu edge's keypress, with the rotors starting at start_state_i. """
+
+    middle_notch_flags, right_notch_flags = notch_flags
+    left_pos_i, rest = divmod(start_state_i, 676)
+    middle_pos_i, right_pos_i = divmod(rest, 26)
+
+    keypress_states = []
+
+    for keypress_i in range(menu.edges[-1][0] + 1):
+        # advance rotors, same stepping as Enigma.advance_rotors()
+        middle_rotor_step = right_notch_flags[right_pos_i]
+        left_rotor_step = middle_notch_flags[middle_pos_i]
+
+        right_pos_i = right_pos_i + 1 if right_pos_i < 25 else 0
+        if middle_rotor_step:
+            middle_pos_i = middle_pos_i + 1 if middle_pos_i < 25 else 0
+        if left_rotor_step:
+            left_pos_i = left_pos_i + 1 if left_pos_i < 25 else 0
+
+        keypress_states.append(left_pos_i * 676 + middle_pos_i * 26 + right_pos_i)
+
+    return [keypress_states[keypress_i] for keypress_i, crib_letter_i, cipher_letter_i in menu.edges]
+
+
+def find_loop_candidates(menu: Menu, scrambler_translations: list, edge_states: list) -> list:
+    """
+    Output the stecker partners of the menu's test letter that every loop of the menu allows at one rotor state.
+
+    Going around a loop, a partner must come back to itself. The partner of every letter of the component is worked
+    out for all 26 partners of the test letter at once, by translating along a spanning tree of the menu, and each
+    edge closing a loop keeps only the partners it agrees with.
+
+    :param edge_states: rotor state of each menu edge
+    """
+
+    paths = [None] * 26
+    paths[menu.test_letter] = IDENTITY_INDEXES
+
+    for letter_i, other_letter_i, edge_i in menu.tree_edges:
+        paths[other_letter_i] = paths[letter_i].translate(scrambler_translations[edge_states[edge_i]])
+
+    candidates = range(26)
+
+    for letter_i, other_letter_i, edge_i in menu.loop_edges:
+        around_path = paths[letter_i].translate(scrambler_translations[edge_states[edge_i]])
+        other_path = paths[other_letter_i]
+        candidates = [partner_i for partner_i in candidates if around_path[partner_i] == other_path[partner_i]]
+
+        if not candidates:
+            break
+
+    return candidates
+
+
+def try_rotor_state(menu: Menu, scrambler_tables: bytes, edge_states: list, candidates=range(26)) -> list:
+    """
+    Try stecker partners of the menu's test letter at one rotor state.
+
+    :param edge_states: rotor state of each menu edge
+    :param candidates: partners of the test letter to try (default: all of them)
+    :return: list of the hypotheses that survived, each a list of 26 registers (bit x set in register a means the
+             plugboard swaps a and x, 0 if the hypothesis says nothing about a)
+    """
+
+    adjacency = [[(other_letter_i, edge_states[edge_i] * 26) for other_letter_i, edge_i in letter_edges]
+                 for letter_edges in menu.adjacency]
+    test_letter = menu.test_letter
+
+    stops = []
+
+    for partner_i in candidates:
+        registers = [0] * 26
+        registers[test_letter] = 1 << partner_i
+        to_visit = [(test_letter, partner_i)]
+
+        while to_visit:
+            letter_i, letter_partner_i = to_visit.pop()
+
+            # diagonal board: the partner's partner is the letter itself
+            register = registers[letter_partner_i]
+            if not register >> letter_i & 1:
+                # a second partner for the same letter, the hypothesis is wrong
+                if register:
+                    break
+                registers[letter_partner_i] = 1 << letter_i
+                to_visit.append((letter_partner_i, letter_i))
+
+            # every menu edge of the letter implies a partner for the letter at its other end
+            for other_letter_i, table_start in adjacency[letter_i]:
+                other_partner_i = scrambler_tables[table_start + letter_partner_i]
+                register = registers[other_letter_i]
+                if not register >> other_partner_i & 1:
+                    if register:
+                        break
+                    registers[other_letter_i] = 1 << other_partner_i
+                    to_visit.append((other_letter_i, other_partner_i))
+            else:
+                continue
+
+            break
+
+        else:
+            stops.append(registers)
+
+    return stops
+
+
+def get_stecker_pairs(registers: list) -> tuple:
+    """ Output the plugboard pairings ("AV", ...) of a surviving hypothesis, letters steckered to themselves left out. """
+
+    pairs = set()
+
+    for letter_i, register in enumerate(registers):
+        if register:
+            partner_i = register.bit_length() - 1
+            if partner_i != letter_i:
+                pairs.add(chr(min(letter_i, partner_i) + 65) + chr(max(letter_i, partner_i) + 65))
+
+    return tuple(sorted(pairs))
+
+
+def verify_stop(ciphertext: bytes, crib: bytes, menu: Menu, stop: dict) -> int or bool:
+    """
+    Decrypt the crib's part of the ciphertext with a normal Enigma set up with a stop's settings and stecker pairs
+    (letters without a known partner are left unsteckered).
+
+    :return: int, number of crib letters decrypted correctly, or bool (False if a crib letter of the menu's tested
+             component does not decrypt correctly)
+    """
+
+    enigma_machine = Enigma(stop["rotor_choices"], stop["plugboard_pairings"], stop["initial_rotor_settings"],
+                            stop["ring_settings"], stop["reflector"])
+    end = menu.crib_offset + len(crib)
+    decrypted = enigma_machine.encrypt_decrypt(ciphertext[:end].decode("ascii"))[menu.crib_offset:]
+
+    for crib_i, crib_letter in enumerate(crib):
+        if crib_letter - 65 in menu.test_component and decrypted[crib_i] != chr(crib_letter):
+            return False
+
+    return sum(decrypted_letter == chr(crib_letter) for decrypted_letter, crib_letter in zip(decrypted, crib))
+
+
+def run_bombe_unit(work_unit: tuple) -> list:
+    """
+    Run the bombe over every starting rotor state of one rotor order, ring settings, reflector and (on the M4)
+    fourth rotor position.
+
+    :param work_unit: tuple(rotor_choices, ring_settings, reflector, fourth rotor position (None without one),
+                      ciphertext bytes, crib bytes, crib_offset, verify)
+    :return: list of stops
+    """
+
+    rotor_choices, ring_settings, reflector, fourth_rotor_pos, ciphertext, crib, crib_offset, verify = work_unit
+
+    menu = Menu(ciphertext, crib, crib_offset)
+    scrambler_tables, scrambler_translations, notch_flags = build_scrambler_tables(rotor_choices, ring_settings,
+                                                                                  reflector, fourth_rotor_pos or 'A')
+    fourth_rotor_setting = () if fourth_rotor_pos is None else (fourth_rotor_pos,)
+
+    stops = []
+
+    for start_state_i in range(NUM_ROTOR_STATES):
+        edge_states = get_menu_states(start_state_i, menu, notch_flags)
+
+        # the loops rule out nearly every partner cheaply, only the rest is followed through the whole menu
+        candidates = find_loop_candidates(menu, scrambler_translations, edge_states)
+        if not candidates:
+            continue
+
+        for registers in try_rotor_state(menu, scrambler_tables, edge_states, candidates):
+            left_pos_i, rest = divmod(start_state_i, 676)
+            middle_pos_i, right_pos_i = divmod(rest, 26)
+
+            stop = {
+                "rotor_choices": tuple(rotor_choices),
+                "plugboard_pairings": get_stecker_pairs(registers),
+                "initial_rotor_settings": fourth_rotor_setting + (chr(left_pos_i + 65), chr(middle_pos_i + 65),
+                                                                  chr(right_pos_i + 65)),
+                "ring_settings": tuple(ring_settings),
+                "reflector": reflector
+            }
+
+            if verify:
+                crib_matches = verify_stop(ciphertext, crib, menu, stop)
+                if crib_matches is False:
+                    continue
+                stop["crib_matches"] = crib_matches
+
+            stops.append(stop)
+
+    return stops
+
+
+def run_bombe(ciphertext: str, crib: str, crib_offset: int = 0, rotor_orders=ALL_ROTOR_ORDERS,
+              reflectors=ALL_REFLECTORS, ring_settings_options=(('A', 'A', 'A'),), workers: int = 1,
+              verify: bool = True, progress_callback=None, fourth_rotor_positions: str = ALPHABET_STR) -> list:
+    """
+    Find the settings that can decrypt ciphertext to a crib, whatever the plugboard.
+
+    Every rotor order x ring setting x reflector is one work unit covering all 26^3 starting rotor positions, run in
+    this process (workers=1) or spread across a process pool. The crib is expected to start crib_offset letters into
+    the ciphertext. Like the real bombe, only ring settings in ring_settings_options are tried, the others are found
+    afterwards (they only change where the middle and left rotors turn over).
+
+    M4 rotor orders (a fourth rotor and thin reflector) get one work unit per fourth rotor position in
+    fourth_rotor_positions, and three ring settings get 'A' added for the fourth rotor (see fit_ring_settings()).
+    Raises ValueError if a rotor order, ring settings and reflector do not make valid Enigma settings.
+
+    :param progress_callback: called as progress_callback(work_units_done, work_units_total, stops)
+    :return: list of dict, settings (as enigma_run() arguments) with the stecker pairs implied by each stop, plus the
+             number of crib letters they decrypt correctly ("crib_matches", if verify), best first
+    """
+
+    ciphertext = sanitize_search_text(ciphertext)
+    crib = sanitize_search_text(crib)
+
+    # check the crib's alignment once here rather than in every work unit
+    Menu(ciphertext, crib, crib_offset)
+
+    work_units = []
+    for rotor_choices in rotor_orders:
+        rotor_choices = tuple(rotor_choices)
+
+        for ring_settings in ring_settings_options:
+            ring_settings = fit_ring_settings(rotor_choices, ring_settings)
+
+            for reflector in reflectors:
+                # check every combination up front, not in the middle of the search
+                if not sanitize_enigma_settings(rotor_choices, [], ['A'] * len(rotor_choices), list(ring_settings),
+                                                reflector):
+                    raise ValueError("Bad Enigma settings: rotor order %s, ring settings %s, reflector %s"
+                                     % (rotor_choices, ring_settings, reflector))
+
+                # the M4 fourth rotor never steps, each of its positions is a scrambler of its own
+                for fourth_rotor_pos in (fourth_rotor_positions if len(rotor_choices) == 4 else (None,)):
+                    work_units.append((rotor_choices, ring_settings, reflector, fourth_rotor_pos, ciphertext, crib,
+                                       crib_offset, verify))
+    stops = []
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        unit_results = map(run_bombe_unit, work_units)
+        executor = None
+    else:
+        # imported here so a single worker bombe does not load multiprocessing
+        import concurrent.futures
+
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        unit_results = executor.map(run_bombe_unit, work_units)
+
+    try:
+        for work_units_done, unit_stops in enumerate(unit_results, 1):
+            stops.extend(unit_stops)
+
+            if progress_callback is not None:
+                progress_callback(work_units_done, len(work_units), stops)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if verify:
+        stops.sort(key=lambda stop: stop["crib_matches"], reverse=True)
+
+    return stops
@@ -0,0 +1,201 @@
+import os
+
+import numpy as np
+
+from compiled_enigma import *
+
+BULK_BLOCK_SIZE = 1 << 20  # letters processed per block, keeps temporary arrays at a few tens of MB
+
+
+def rotor_position_sequence(starting_positions: tuple, notches: tuple, num_steps: int) -> tuple:
+    """
+    Work out the rotor positions after each of the next num_steps keypresses without stepping the rotors one by one.
+
+    Follows the same stepping as Enigma.advance_rotors(): the right rotor always steps, the middle rotor steps when
+    the right rotor was at a turnover point and the left rotor steps when the middle rotor was at a turnover point.
+
+    :param starting_positions: tuple(left, middle, right) rotor positions as ints, 'A' is 0
+    :param notches: tuple(left, middle, right) turnover points, each a tuple of ints
+    :param num_steps: int
+    :return: tuple(left, middle, right) numpy arrays of rotor positions after each step
+    """
+
+    left_pos_i, middle_pos_i, right_pos_i = starting_positions
+    step_i = np.arange(num_steps, dtype=np.int64)
+
+    # right rotor position before each step, the middle rotor steps whenever it is at a turnover point
+    right_before = (right_pos_i + step_i) % 26
+    middle_after = (middle_pos_i + np.cumsum(np.isin(right_before, notches[2]))) % 26
+
+    # middle rotor position before each step, the left rotor steps whenever it is at a turnover point
+    middle_before = np.empty_like(middle_after)
+    middle_before[0:1] = middle_pos_i
+    middle_before[1:] = middle_after[:-1]
+    left_after = (left_pos_i + np.cumsum(np.isin(middle_before, notches[1]))) % 26
+
+    right_after = (right_before + 1) % 26
+
+    return left_after, middle_after, right_after
+
+
+def bulk_encrypt_decrypt(compiled_machine: CompiledEnigma, input_array: np.ndarray) -> np.ndarray:
+    """
+    Perform encryption/decryption on a whole message at once.
+
+    input_array holds uppercase ASCII letters as uint8 (65 to 90). Rotor positions of compiled_machine are kept between
+    calls, so a long message can be fed in as several arrays.
+
+    :param compiled_machine: CompiledEnigma
+    :param input_array: np.ndarray[uint8]
+    :return: np.ndarray[uint8]
+    """
+
+    output_array = np.empty(len(input_array), dtype=np.uint8)
+
+    for block_start in range(0, len(input_array), BULK_BLOCK_SIZE):
+        input_block = input_array[block_start:block_start + BULK_BLOCK_SIZE]
+
+        left_after, middle_after, right_after = rotor_position_sequence(tuple(compiled_machine.positions),
+                                                                        compiled_machine.notches, len(input_block))
+        state_i = left_after * 676 + middle_after * 26 + right_after
+
+        # build substitution tables of rotor states that have not been reached yet
+        states_built = np.frombuffer(compiled_machine.states_built, dtype=np.uint8)
+        states_needed = np.zeros(NUM_ROTOR_STATES, dtype=bool)
+        states_needed[state_i] = True
+        for missing_state_i in np.flatnonzero(states_needed & (states_built == 0)):
+            compiled_machine.build_state(int(missing_state_i))
+
+        # gather every output letter from the substitution tables in one go
+        state_tables = np.frombuffer(compiled_machine.state_tables, dtype=np.uint8)
+        output_array[block_start:block_start + len(input_block)] = \
+            state_tables[state_i * 26 + (input_block.astype(np.int64) - 65)]
+
+        compiled_machine.positions = [int(left_after[-1]), int(middle_after[-1]), int(right_after[-1])]
+        compiled_machine.num_keypresses += len(input_block)
+
+    return output_array
+
+
+def encrypt_decrypt_shard(shard: tuple) -> int:
+    """
+    Perform encryption/decryption on one shard of a message held in shared memory (runs inside a worker process).
+
+    The rotors are moved straight to the shard's first keypress with seek(), so shards can run in any order.
+
+    :param shard: tuple(enigma_settings, first_keypress, input_name, output_name, shard_start, shard_end)
+    :return: int, number of letters processed
+    """
+
+    from multiprocessing import shared_memory
+
+    enigma_settings, first_keypress, input_name, output_name, shard_start, shard_end = shard
+
+    compiled_machine = CompiledEnigma(Enigma(*enigma_settings))
+    compiled_machine.seek(first_keypress + shard_start)
+
+    input_memory = shared_memory.SharedMemory(name=input_name)
+    output_memory = shared_memory.SharedMemory(name=output_name)
+
+    try:
+        input_array = np.ndarray((shard_end - shard_start,), dtype=np.uint8, buffer=input_memory.buf, offset=shard_start)
+        output_array = np.ndarray((shard_end - shard_start,), dtype=np.uint8, buffer=output_memory.buf,
+                                  offset=shard_start)
+        output_array[:] = bulk_encrypt_decrypt(compiled_machine, input_array)
+
+        # numpy views have to be gone before the shared memory can be closed
+        del input_array, output_array
+    finally:
+        input_memory.close()
+        output_memory.close()
+
+    return shard_end - shard_start
+
+
+def parallel_bulk_encrypt_decrypt(enigma_settings: tuple, input_array: np.ndarray, workers: int = None,
+                                  first_keypress: int = 0) -> np.ndarray:
+    """
+    Perform encryption/decryption on a whole message by splitting it into one shard per worker process.
+
+    Input and output live in shared memory, so the message is not pickled to every worker, and each worker seeks its
+    own Enigma machine to its shard's first keypress.
+
+    :param enigma_settings: tuple of finalized Enigma() arguments
+    :param input_array: np.ndarray[uint8] of uppercase ASCII letters
+    :param workers: int, number of processes (default: every CPU core)
+    :param first_keypress: int, keypress (from the starting rotor positions) of the message's first letter
+    :return: np.ndarray[uint8]
+    """
+
+    # imported here so single process use of this module does not load multiprocessing
+    import concurrent.futures
+    from multiprocessing import shared_memory
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    num_letters = len(input_array)
+    if num_letters == 0:
+        return np.empty(0, dtype=np.uint8)
+
+    input_memory = shared_memory.SharedMemory(create=True, size=num_letters)
+    output_memory = shared_memory.SharedMemory(create=True, size=num_letters)
+
+    try:
+        np.ndarray((num_letters,), dtype=np.uint8, buffer=input_memory.buf)[:] = input_array
+
+        shard_size = -(-num_letters // workers)  # round up so there are at most `workers` shards
+        shards = [(enigma_settings, first_keypress, input_memory.name, output_memory.name,
+                   shard_start, min(shard_start + shard_size, num_letters))
+                  for shard_start in range(0, num_letters, shard_size)]
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            # list() to raise any exception from a worker
+            list(executor.map(encrypt_decrypt_shard, shards))
+
+        output_array = np.ndarray((num_letters,), dtype=np.uint8, buffer=output_memory.buf).copy()
+    finally:
+        input_memory.close()
+        input_memory.unlink()
+        output_memory.close()
+        output_memory.unlink()
+
+    return output_array
+
+
+def enigma_run_bulk(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                    ring_settings: list, reflector: str, input_str: str = None, parallel: bool = False,
+                    workers: int = None) -> str:
+    """
+    Same as enigma_run(), but performs encryption/decryption with bulk_encrypt_decrypt().
+
+    Meant for long messages, output (including the bad input/settings messages) is identical to enigma_run().
+    With parallel=True the message is split across `workers` processes (default: every CPU core).
+    """
+
+    # check if input_str is valid, if it is invalid, return a message saying input is bad
+    text = sanitize_input_text(input_str)
+
+    if text is False:
+        return "Bad input string. Letters only."
+
+    # check if Enigma settings are valid
+    if not sanitize_enigma_settings(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                    ring_settings, reflector):
+        return "Bad Enigma settings"
+
+    # finalize formatting of Enigma settings
+    plugboard_pairings, initial_rotor_settings, ring_settings, reflector = \
+        finalize_enigma_settings(plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+    enigma_settings = (tuple(rotor_choices), plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+
+    # letters outside A-Z become the letters Enigma.encrypt_decrypt() ends up ciphering, see encode_letters()
+    plugboard_alphabet = bytes(letter_i + 65 for letter_i in Plugboard(plugboard_pairings).plugboard_indexes)
+    input_array = np.frombuffer(encode_letters(text, plugboard_alphabet), dtype=np.uint8)
+
+    if parallel:
+        output_array = parallel_bulk_encrypt_decrypt(enigma_settings, input_array, workers)
+    else:
+        output_array = bulk_encrypt_decrypt(CompiledEnigma(Enigma(*enigma_settings)), input_array)
+
+    return output_array.tobytes().decode("ascii")
@@ -0,0 +1,400 @@
+import heapq
+import math
+import random
+import time
+from array import array
+
+from compiled_enigma import *
+from crib_search import ALL_REFLECTORS, ALL_ROTOR_ORDERS
+from rotor_cycle import get_rotor_cycle
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # phase 1 scores starting positions one at a time
+
+# translate b"A" to b"Z" into letter indexes 0 to 25 (and back)
+LETTERS_TO_INDEXES = bytes.maketrans(ALPHABET, bytes(range(26)))
+INDEXES_TO_LETTERS = bytes.maketrans(bytes(range(26)), ALPHABET)
+
+NO_PLUGBOARD = bytes(range(26))  # plugboard with no cables, every letter maps to itself
+
+
+##############################################################################
+# Scoring (all on letter indexes 0 to 25 stored in bytes)
+##############################################################################
+def index_of_coincidence(letters: bytes) -> float:
+    """ Output the index of coincidence of a bytes object of letter indexes. """
+
+    num_letters = len(letters)
+    if num_letters < 2:
+        return 0.0
+
+    coincidences = 0
+    for letter_i in range(26):
+        letter_count = letters.count(letter_i)
+        coincidences += letter_count * (letter_count - 1)
+
+    return coincidences / (num_letters * (num_letters - 1))
+
+
+class NgramScorer:
+    """
+    Defines a log-likelihood scorer for n-grams (bigrams, trigrams, ...). Log probabilities are kept in a flat array
+    indexed by the n-gram's letter indexes, so scoring never builds strings.
+
+    No n-gram statistics come with this project, build a scorer from a corpus of plaintext in the target language
+    (from_corpus) or from an "NGRAM COUNT" per line statistics file (from_counts_file).
+    """
+
+    def __init__(self, n: int, counts: dict):
+        """ Turn n-gram counts (keyed by uppercase n-gram str) into a log probability table. """
+
+        self.n = n
+
+        total = sum(counts.values())
+        floor = math.log10(0.01 / total)  # log probability given to n-grams never seen
+
+        self.log_probs = array('d', [floor]) * (26 ** n)
+        for ngram, count in counts.items():
+            self.log_probs[self.get_ngram_i(ngram)] = math.log10(count / total)
+
+    @staticmethod
+    def get_ngram_i(ngram: str) -> int:
+        """ Output the index of an uppercase n-gram in log_probs. """
+
+        ngram_i = 0
+        for letter in ngram:
+            ngram_i = ngram_i * 26 + ord(letter) - 65
+
+        return ngram_i
+
+    @classmethod
+    def from_corpus(cls, corpus_text: str, n: int):
+        """ Count the n-grams of a corpus of plaintext (any non-letters are dropped). """
+
+        letters = "".join(letter for letter in corpus_text.upper() if "A" <= letter <= "Z")
+        counts = {}
+        for i in range(len(letters) - n + 1):
+            ngram = letters[i:i + n]
+            counts[ngram] = counts.get(ngram, 0) + 1
+
+        return cls(n, counts)
+
+    @classmethod
+    def from_counts_file(cls, file_path: str):
+        """ Load n-gram counts from a file with one "NGRAM COUNT" pair per line. """
+
+        counts = {}
+        with open(file_path) as counts_file:
+            for line in counts_file:
+                if line.strip():
+                    ngram, count = line.split()
+                    counts[ngram.upper()] = int(count)
+
+        return cls(len(next(iter(counts))), counts)
+
+    def score(self, letters: bytes) -> float:
+        """ Output the total log probability of every n-gram in a bytes object of letter indexes. """
+
+        ngram_indexes = list(letters[:len(letters) - self.n + 1])
+        for offset in range(1, self.n):
+            ngram_indexes = [ngram_i * 26 + letter_i for ngram_i, letter_i in zip(ngram_indexes, letters[offset:])]
+
+        return sum(map(self.log_probs.__getitem__, ngram_indexes))
+
+
+##############################################################################
+# Candidate decryption
+##############################################################################
+def scrambler_rows(rotor_choices: tuple, starting_positions: tuple, ring_settings: tuple, reflector: str,
+                   num_letters: int) -> list:
+    """
+    Output the substitution (as 26 letter indexes) of the rotors and reflector, without the plugboard, at every
+    keypress of a message.
+    """
+
+    compiled_machine = CompiledEnigma(Enigma(rotor_choices, (), starting_positions, ring_settings, reflector))
+    state_tables = compiled_machine.state_tables
+
+    return [bytes(state_tables[state_i * 26:state_i * 26 + 26]).translate(LETTERS_TO_INDEXES)
+            for state_i in compiled_machine.state_sequence(num_letters)]
+
+
+def decrypt_letters(rows: list, cipher_letters: bytes, plugboard: bytes = NO_PLUGBOARD) -> bytes:
+    """ Decrypt letter indexes with precomputed scrambler rows and a plugboard given as 26 letter indexes. """
+
+    return bytes([plugboard[row[plugboard[letter_i]]] for row, letter_i in zip(rows, cipher_letters)])
+
+
+def plugboard_to_pairings(plugboard: bytes) -> tuple:
+    """ Turn a plugboard given as 26 letter indexes into plugboard pairings as used by enigma_run(). """
+
+    return tuple(chr(letter_i + 65) + chr(paired_i + 65) for letter_i, paired_i in enumerate(plugboard)
+                 if letter_i < paired_i)
+
+
+##############################################################################
+# Search phases
+##############################################################################
+def score_start_states(compiled_machine: CompiledEnigma, rotor_choices: tuple, cipher_letters: bytes) -> list:
+    """ Output tuple(start_state_i, index of coincidence) of cipher_letters decrypted from every starting position. """
+
+    state_tables = compiled_machine.state_tables
+    scores = []
+
+    for start_state_i in range(NUM_ROTOR_STATES):
+        left_pos_i, rest = divmod(start_state_i, 676)
+
+        # stepping sequences of every starting position come from the same few memoized cycles
+        rotor_cycle = get_rotor_cycle(rotor_choices, (left_pos_i, rest // 26, rest % 26))
+        decrypted = bytes([state_tables[state_i * 26 + letter_i] for state_i, letter_i
+                           in zip(rotor_cycle.state_sequence(0, len(cipher_letters)), cipher_letters)])
+        scores.append((start_state_i, index_of_coincidence(decrypted.translate(LETTERS_TO_INDEXES))))
+
+    return scores
+
+
+def score_start_states_numpy(compiled_machine: CompiledEnigma, cipher_letters: bytes, num_kept: int) -> list:
+    """
+    Same as score_start_states(), but every starting position is stepped at once with numpy, keeping a count of
+    each decrypted letter per starting position. Only starting positions scoring at least the num_kept-th best are
+    output, in starting position order.
+    """
+
+    num_letters = len(cipher_letters)
+    state_tables = np.frombuffer(compiled_machine.state_tables, dtype=np.uint8)
+    middle_notch_flags = np.array(compiled_machine.notch_flags[1], dtype=np.int64)
+    right_notch_flags = np.array(compiled_machine.notch_flags[2], dtype=np.int64)
+
+    # rotor state after one keypress from every rotor state, same stepping as CompiledEnigma.encrypt_decrypt_bytes()
+    start_states = np.arange(NUM_ROTOR_STATES, dtype=np.int64)
+    left_pos_i, middle_pos_i, right_pos_i = start_states // 676, start_states // 26 % 26, start_states % 26
+    next_states = (left_pos_i + middle_notch_flags[middle_pos_i]) % 26 * 676 + \
+        (middle_pos_i + right_notch_flags[right_pos_i]) % 26 * 26 + (right_pos_i + 1) % 26
+
+    # each starting position only counts into its own 26 letters, so no index is added to twice
+    count_offsets = start_states * 26 - 65
+    letter_counts = np.zeros(NUM_ROTOR_STATES * 26, dtype=np.int64)
+    states = start_states
+
+    for letter_i in cipher_letters:
+        states = next_states[states]
+        letter_counts[count_offsets + state_tables[states * 26 + letter_i]] += 1
+
+    letter_counts = letter_counts.reshape(NUM_ROTOR_STATES, 26)
+    coincidences = (letter_counts * (letter_counts - 1)).sum(axis=1)
+
+    # index of coincidence only grows with coincidences, so keep every start state tied with the num_kept-th best
+    num_kept = min(num_kept, NUM_ROTOR_STATES)
+    threshold = np.partition(coincidences, NUM_ROTOR_STATES - num_kept)[NUM_ROTOR_STATES - num_kept]
+    kept_states = np.flatnonzero(coincidences >= threshold)
+
+    return [(start_state_i, num_coincidences / (num_letters * (num_letters - 1)) if num_letters > 1 else 0.0)
+            for start_state_i, num_coincidences in zip(kept_states.tolist(), coincidences[kept_states].tolist())]
+
+
+def search_rotor_positions(cipher_letters: bytes, rotor_orders, reflectors, num_kept: int) -> list:
+    """
+    Phase 1: score every rotor order x reflector x starting position (ring settings 'AAA', no plugboard) by index
+    of coincidence and keep the best num_kept. Starting positions are scored all at once if numpy is installed.
+
+    :return: list of tuple(score, rotor_choices, starting_positions, reflector), best first
+    """
+
+    best_candidates = []
+
+    if num_kept < 1:
+        return best_candidates
+
+    for rotor_choices in rotor_orders:
+        for reflector in reflectors:
+            compiled_machine = CompiledEnigma(Enigma(tuple(rotor_choices), (), ('A', 'A', 'A'), ('A', 'A', 'A'),
+                                                     reflector))
+            compiled_machine.compile_all()
+
+            if np is None:
+                scores = score_start_states(compiled_machine, tuple(rotor_choices), cipher_letters)
+            else:
+                scores = score_start_states_numpy(compiled_machine, cipher_letters, num_kept)
+
+            for start_state_i, ioc in scores:
+                left_pos_i, rest = divmod(start_state_i, 676)
+                candidate = (ioc, tuple(rotor_choices),
+                             (chr(left_pos_i + 65), chr(rest // 26 + 65), chr(rest % 26 + 65)), reflector)
+
+                if len(best_candidates) < num_kept:
+                    heapq.heappush(best_candidates, candidate)
+                elif candidate > best_candidates[0]:
+                    heapq.heapreplace(best_candidates, candidate)
+
+    return sorted(best_candidates, reverse=True)
+
+
+def search_ring_settings(cipher_letters: bytes, rotor_choices: tuple, starting_positions: tuple,
+                         reflector: str) -> tuple:
+    """
+    Phase 2: adjust the right then middle ring setting. Moving a ring setting and the starting position by the same
+    amount keeps the wiring in place and only moves the turnover point, so both are moved together.
+
+    :return: tuple(score, starting_positions, ring_settings)
+    """
+
+    best = (index_of_coincidence(decrypt_letters(scrambler_rows(rotor_choices, starting_positions, ('A', 'A', 'A'),
+                                                                reflector, len(cipher_letters)), cipher_letters)),
+            starting_positions, ('A', 'A', 'A'))
+
+    for rotor_i in (2, 1):
+        best_starting_positions, best_ring_settings = best[1], best[2]
+
+        for shift in range(1, 26):
+            starting_positions = list(best_starting_positions)
+            ring_settings = list(best_ring_settings)
+            starting_positions[rotor_i] = chr((ord(starting_positions[rotor_i]) - 65 + shift) % 26 + 65)
+            ring_settings[rotor_i] = chr((ord(ring_settings[rotor_i]) - 65 + shift) % 26 + 65)
+
+            rows = scrambler_rows(rotor_choices, tuple(starting_positions), tuple(ring_settings), reflector,
+                                  len(cipher_letters))
+            candidate = (index_of_coincidence(decrypt_letters(rows, cipher_letters)), tuple(starting_positions),
+                         tuple(ring_settings))
+            if candidate[0] > best[0]:
+                best = candidate
+
+    return best
+
+
+def count_pairings(plugboard: bytes) -> int:
+    """ Output the number of cables on a plugboard given as 26 letter indexes. """
+    return sum(letter_i < paired_i for letter_i, paired_i in enumerate(plugboard))
+
+
+def toggle_pairing(plugboard: bytes, first_i: int, second_i: int) -> bytearray:
+    """
+    Output a copy of a plugboard (26 letter indexes) with the cables currently on both letters removed, then the
+    letters connected unless they were already connected to each other. Adds, swaps or removes a cable.
+    """
+
+    candidate = bytearray(plugboard)
+
+    was_pair = candidate[first_i] == second_i
+    for letter_i in (first_i, second_i):
+        candidate[candidate[letter_i]] = candidate[letter_i]
+        candidate[letter_i] = letter_i
+    if not was_pair:
+        candidate[first_i], candidate[second_i] = second_i, first_i
+
+    return candidate
+
+
+def hill_climb_plugboard(rows: list, cipher_letters: bytes, score_function, max_pairings: int = 10,
+                         plugboard: bytes = NO_PLUGBOARD) -> tuple:
+    """
+    Phase 3: greedily add, swap or remove plugboard cables while score_function (taking decrypted letter indexes)
+    improves, starting from plugboard (as 26 letter indexes, no cables by default).
+
+    :return: tuple(score, plugboard as 26 letter indexes)
+    """
+
+    plugboard = bytearray(plugboard)
+    best_score = score_function(decrypt_letters(rows, cipher_letters, plugboard))
+
+    while True:
+        best_change = None
+
+        for first_i in range(26):
+            for second_i in range(first_i + 1, 26):
+                candidate = toggle_pairing(plugboard, first_i, second_i)
+                if count_pairings(candidate) > max_pairings:
+                    continue
+
+                candidate_score = score_function(decrypt_letters(rows, cipher_letters, candidate))
+                if candidate_score > best_score:
+                    best_score, best_change = candidate_score, candidate
+
+        if best_change is None:
+            return best_score, bytes(plugboard)
+
+        plugboard = best_change
+
+
+def ciphertext_only_attack(ciphertext: str, rotor_orders=ALL_ROTOR_ORDERS, reflectors=ALL_REFLECTORS,
+                           num_kept: int = 10, max_pairings: int = 10, ngram_scorers: tuple = ()) -> list:
+    """
+    Recover Enigma settings from ciphertext alone.
+
+    1) Rotor order, reflector and starting position are searched by index of coincidence
+    2) Ring settings of the best candidates are adjusted
+    3) The plugboard is hill-climbed, first by index of coincidence, then by each n-gram scorer in turn
+       (e.g. (bigram_scorer, trigram_scorer))
+
+    :return: list of dict, candidate settings (as enigma_run() arguments) with "score" and "plaintext", best first
+    """
+
+    text = sanitize_input_text(ciphertext)
+
+    # letters outside A-Z pass through the plugboard unchanged, which a plugboard of letter indexes cannot do
+    if text is False or not text.isascii():
+        raise ValueError("Bad input string. Letters only.")
+
+    cipher_letters = text.encode("ascii").translate(LETTERS_TO_INDEXES)
+    results = []
+
+    for ioc_score, rotor_choices, starting_positions, reflector in \
+            search_rotor_positions(cipher_letters, rotor_orders, reflectors, num_kept):
+
+        ioc_score, starting_positions, ring_settings = search_ring_settings(cipher_letters, rotor_choices,
+                                                                            starting_positions, reflector)
+        rows = scrambler_rows(rotor_choices, starting_positions, ring_settings, reflector, len(cipher_letters))
+
+        # each climb carries on from the plugboard the one before it found
+        score, plugboard = hill_climb_plugboard(rows, cipher_letters, index_of_coincidence, max_pairings)
+        for ngram_scorer in ngram_scorers:
+            score, plugboard = hill_climb_plugboard(rows, cipher_letters, ngram_scorer.score, max_pairings, plugboard)
+
+        results.append({
+            "rotor_choices": rotor_choices,
+            "plugboard_pairings": plugboard_to_pairings(plugboard),
+            "initial_rotor_settings": starting_positions,
+            "ring_settings": ring_settings,
+            "reflector": reflector,
+            "score": score,
+            "plaintext": decrypt_letters(rows, cipher_letters, plugboard).translate(INDEXES_TO_LETTERS).decode("ascii")
+        })
+
+    return sorted(results, key=lambda result: result["score"], reverse=True)
+
+
+##############################################################################
+# Benchmark
+##############################################################################
+def benchmark_candidates_per_second(num_letters: int = 250, duration: float = 2.0, ngram_scorer=None,
+                                    max_pairings: int = 10) -> float:
+    """
+    Measure how many plugboard candidates per second can be decrypted and scored, the inner loop of the plugboard
+    hill climb. Candidates are the hill climb's own moves (toggle_pairing()) on a plugboard that starts with no
+    cables and takes a random walk of up to max_pairings cables. Scores by index of coincidence unless an n-gram
+    scorer is given.
+    """
+
+    rng = random.Random(0)
+    cipher_letters = bytes(rng.randrange(26) for _ in range(num_letters))
+    rows = scrambler_rows((1, 2, 3), ('A', 'A', 'A'), ('A', 'A', 'A'), 'B', num_letters)
+    score_function = index_of_coincidence if ngram_scorer is None else ngram_scorer.score
+
+    plugboard = bytearray(NO_PLUGBOARD)
+    num_candidates = 0
+    start_time = time.perf_counter()
+
+    while time.perf_counter() - start_time < duration:
+        for _ in range(100):
+            # add, swap or remove a cable on a random pair of letters, as the hill climb does
+            first_i, second_i = rng.sample(range(26), 2)
+            candidate = toggle_pairing(plugboard, first_i, second_i)
+            if count_pairings(candidate) > max_pairings:
+                continue
+
+            score_function(decrypt_letters(rows, cipher_letters, candidate))
+            num_candidates += 1
+            plugboard = candidate
+
+    return num_candidates / (time.perf_counter() - start_time)
@@ -0,0 +1,358 @@
+"""
+Command line interface for encrypting/decrypting stdin, files and whole directories.
+
+Enigma settings are taken from, lowest priority first: a JSON key file (--key-file), the environment variables
+ENIGMA_ROTORS, ENIGMA_PLUGBOARD, ENIGMA_START, ENIGMA_RING and ENIGMA_REFLECTOR, then the command line arguments.
+Every input (stdin, a file, or each file in a directory) is a separate message starting from the starting rotor
+positions, and is streamed block by block so inputs of any size fit in memory.
+
+    python cli.py --rotors 2 4 5 --plugboard AV BS CG --start B L A --ring B U L --reflector B < in > out
+    ENIGMA_ROTORS="2 4 5" ENIGMA_START=BLA ENIGMA_RING=BUL ENIGMA_REFLECTOR=B python cli.py message.txt
+    python cli.py --key-file key.json --output-dir decrypted/ --jobs 4 archive/
+
+A key file holds any of the settings, ex. {"rotors": [2, 4, 5], "plugboard": "AV BS CG", "start": "BLA",
+"ring": [2, 21, 12], "reflector": "B"}. Throughput statistics are printed to stderr on exit (unless --quiet).
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+from enigma_stream import *
+
+SETTING_NAMES = ("rotors", "plugboard", "start", "ring", "reflector")
+SETTING_ENV_PREFIX = "ENIGMA_"
+STDOUT_SPOOL_SIZE = 1 << 24  # bytes of held back stdout output kept in memory, the rest goes to a temporary file
+
+# set up per process by get_cli_machine(): enigma_settings -> CompiledEnigma, so every file with the same settings
+# reuses the same substitution tables
+cli_machines = {}
+
+
+##############################################################################
+# Settings
+##############################################################################
+def rotor_ring_arg(value: str) -> str or int:
+    """ Command line rotor choice or rotor/ring setting, numbers become ints, letters and rotor names stay a str. """
+    return int(value) if value.isdigit() else value
+
+
+def positive_int_arg(value: str) -> int:
+    """ Command line count that must be at least 1, ex. the number of jobs or the block size. """
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError("expected a whole number of at least 1, got %r" % value)
+    return int(value)
+
+
+def split_setting(value: str or list, split_letters: bool = False) -> list:
+    """
+    Split a setting from a key file or environment variable into one element per rotor/plugboard pairing.
+
+    Elements are separated by spaces or commas ("2 4 5", "2,21,12"), numbers become ints. With split_letters, a single
+    word of letters is split into its letters ("BLA" is ['B', 'L', 'A']).
+    """
+
+    # command line and key file settings are already split, unless a single word of letters was given
+    if isinstance(value, (list, tuple)):
+        if not (split_letters and len(value) == 1 and isinstance(value[0], str)):
+            return list(value)
+        value = value[0]
+
+    elements = str(value).replace(",", " ").split()
+
+    if split_letters and len(elements) == 1 and elements[0].isalpha():
+        return list(elements[0])
+
+    return [int(element) if element.isdigit() else element for element in elements]
+
+
+def load_key_file(file_path: str) -> dict:
+    """
+    Read the settings of a JSON key file.
+
+    Raises ValueError if the file is not a JSON object of known settings.
+    """
+
+    # imported here, json is only needed when a key file is given
+    import json
+
+    with open(file_path, encoding="utf-8") as key_file:
+        key = json.load(key_file)
+
+    if not isinstance(key, dict):
+        raise ValueError("Key file must hold a JSON object.")
+
+    unknown_names = sorted(set(key) - set(SETTING_NAMES))
+    if unknown_names:
+        raise ValueError("Unknown settings in key file: " + ", ".join(unknown_names))
+
+    return key
+
+
+def resolve_settings(args: argparse.Namespace, environ: dict) -> tuple:
+    """
+    Merge the key file, environment variable and command line settings.
+
+    Raises ValueError if a required setting is missing or the key file is bad.
+
+    :return: tuple(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+    """
+
+    settings = {"plugboard": []}
+
+    if args.key_file:
+        settings.update(load_key_file(args.key_file))
+
+    for name in SETTING_NAMES:
+        if environ.get(SETTING_ENV_PREFIX + name.upper()):
+            settings[name] = environ[SETTING_ENV_PREFIX + name.upper()]
+
+        if getattr(args, name) is not None:
+            settings[name] = getattr(args, name)
+
+    missing_names = [name for name in SETTING_NAMES if name not in settings]
+    if missing_names:
+        raise ValueError("Missing Enigma settings: " + ", ".join(missing_names))
+
+    return (tuple(split_setting(settings["rotors"])),
+            split_setting(settings["plugboard"]),
+            split_setting(settings["start"], split_letters=True),
+            split_setting(settings["ring"], split_letters=True),
+            str(settings["reflector"]).strip())
+
+
+##############################################################################
+# Processing
+##############################################################################
+def get_cli_machine(enigma_settings: tuple) -> CompiledEnigma:
+    """
+    Output this process's CompiledEnigma for a set of (already checked) settings, with its rotors back at their
+    starting positions.
+    """
+
+    if enigma_settings not in cli_machines:
+        rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector = enigma_settings
+        cli_machines[enigma_settings] = build_compiled_machine(rotor_choices, list(plugboard_pairings),
+                                                               list(initial_rotor_settings), list(ring_settings),
+                                                               reflector)
+
+    compiled_machine = cli_machines[enigma_settings]
+    compiled_machine.seek(0)
+
+    return compiled_machine
+
+
+def process_stream(compiled_machine: CompiledEnigma, input_file, output_file, block_size: int = STREAM_BLOCK_SIZE,
+                   policy: str = "reject") -> tuple:
+    """
+    Perform encryption/decryption from one binary file to another, one block at a time.
+
+    :return: tuple(bytes read, bytes written)
+    """
+
+    bytes_read = 0
+    bytes_written = 0
+
+    for input_block in read_blocks(input_file, block_size):
+        bytes_read += len(input_block)
+
+        output_block = encrypt_decrypt_block(compiled_machine, input_block, policy)
+        output_file.write(output_block)
+        bytes_written += len(output_block)
+
+    return bytes_read, bytes_written
+
+
+def process_to_stdout(compiled_machine: CompiledEnigma, input_file, block_size: int = STREAM_BLOCK_SIZE,
+                      policy: str = "reject") -> tuple:
+    """
+    Same as process_stream() to stdout. With the "reject" policy the output is held back until the whole input has
+    been checked, so a rejected input writes nothing.
+
+    :return: tuple(bytes read, bytes written)
+    """
+
+    if policy != "reject":
+        bytes_read, bytes_written = process_stream(compiled_machine, input_file, sys.stdout.buffer, block_size, policy)
+
+    else:
+        # imported here, tempfile is only needed to hold back output
+        import tempfile
+
+        with tempfile.SpooledTemporaryFile(max_size=STDOUT_SPOOL_SIZE) as spool_file:
+            bytes_read, bytes_written = process_stream(compiled_machine, input_file, spool_file, block_size, policy)
+            spool_file.seek(0)
+            shutil.copyfileobj(spool_file, sys.stdout.buffer, block_size)
+
+    sys.stdout.buffer.flush()
+
+    return bytes_read, bytes_written
+
+
+def process_file(job: tuple) -> tuple:
+    """
+    Encrypt/decrypt one file, run in the main process or a worker process. An output file of a rejected input is
+    removed, so no partial output is left behind.
+
+    :param job: tuple(enigma_settings, input_path, output_path or None for stdout, block_size, policy)
+    :return: tuple(input_path, bytes read, bytes written, error message or None)
+    """
+
+    enigma_settings, input_path, output_path, block_size, policy = job
+    compiled_machine = get_cli_machine(enigma_settings)
+
+    try:
+        with open(input_path, "rb") as input_file:
+            if output_path is None:
+                bytes_read, bytes_written = process_to_stdout(compiled_machine, input_file, block_size, policy)
+            else:
+                os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+                with open(output_path, "wb") as output_file:
+                    bytes_read, bytes_written = process_stream(compiled_machine, input_file, output_file,
+                                                               block_size, policy)
+
+    except ValueError as error:
+        # rejected while writing, the output file only holds part of the output
+        if output_path is not None:
+            os.remove(output_path)
+        return input_path, 0, 0, str(error)
+
+    except OSError as error:
+        return input_path, 0, 0, str(error)
+
+    return input_path, bytes_read, bytes_written, None
+
+
+def list_input_files(input_paths: list, output_dir: str = None) -> list:
+    """
+    Output the (input path, output path) of every file to process. Directories are walked recursively, and their
+    files keep their path relative to the directory (under the directory's name) in output_dir.
+
+    Raises ValueError if an input does not exist or an output path would overwrite its input.
+    """
+
+    input_files = []
+
+    for input_path in input_paths:
+        if os.path.isdir(input_path):
+            dir_name = os.path.basename(os.path.normpath(input_path))
+
+            for dir_path, dir_names, file_names in os.walk(input_path):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    file_path = os.path.join(dir_path, file_name)
+                    input_files.append((file_path, os.path.join(dir_name, os.path.relpath(file_path, input_path))))
+
+        elif os.path.isfile(input_path):
+            input_files.append((input_path, os.path.basename(input_path)))
+
+        else:
+            raise ValueError("No such file or directory: " + input_path)
+
+    # without an output directory, the output goes to stdout
+    if output_dir is None:
+        return [(file_path, None) for file_path, relative_path in input_files]
+
+    output_files = []
+    for file_path, relative_path in input_files:
+        output_path = os.path.join(output_dir, relative_path)
+        if os.path.abspath(output_path) == os.path.abspath(file_path):
+            raise ValueError("Output would overwrite input file: " + file_path)
+        output_files.append((file_path, output_path))
+
+    return output_files
+
+
+def format_stats(num_files: int, bytes_read: int, bytes_written: int, seconds: float) -> str:
+    """ Output a one line throughput summary. """
+
+    seconds = max(seconds, 1e-9)
+
+    return "%d file(s), %d bytes in, %d bytes out in %.3f s (%.2f MB/s in, %.0f bytes/s out)" % (
+        num_files, bytes_read, bytes_written, seconds, bytes_read / seconds / 1e6, bytes_written / seconds)
+
+
+def main(argv: list = None, environ: dict = None) -> int:
+    """ Encrypt/decrypt stdin, files or directories with settings from arguments, a key file or the environment. """
+
+    parser = argparse.ArgumentParser(description="Encrypt/decrypt messages with an Enigma machine.")
+    parser.add_argument("inputs", nargs="*", help="files or directories to process (default: stdin, also '-')")
+    parser.add_argument("--rotors", type=rotor_ring_arg, nargs="+",
+                        help="rotor order from left to right, ex. 2 4 5 (or BETA 2 4 5 for the M4)")
+    parser.add_argument("--plugboard", nargs="*", help="plugboard pairings, ex. AV BS CG")
+    parser.add_argument("--start", type=rotor_ring_arg, nargs="+", help="starting rotor positions, ex. B L A")
+    parser.add_argument("--ring", type=rotor_ring_arg, nargs="+", help="ring settings, ex. B U L or 2 21 12")
+    parser.add_argument("--reflector", help="reflector, ex. B (or B-THIN for the M4)")
+    parser.add_argument("--key-file", help="JSON file holding any of the settings above")
+    parser.add_argument("-o", "--output-dir", help="write each output file here (required for several inputs)")
+    parser.add_argument("-j", "--jobs", type=positive_int_arg, default=1, help="files processed in parallel")
+    parser.add_argument("--block-size", type=positive_int_arg, default=STREAM_BLOCK_SIZE, help="bytes read per block")
+    parser.add_argument("--policy", choices=SANITIZE_POLICIES, default="reject",
+                        help="what to do with characters other than letters")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print throughput statistics")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+
+    try:
+        enigma_settings = resolve_settings(args, os.environ if environ is None else environ)
+    except (OSError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    # check the settings once up front, every job then builds its machine from them without checking again
+    if build_compiled_machine(enigma_settings[0], list(enigma_settings[1]), list(enigma_settings[2]),
+                              list(enigma_settings[3]), enigma_settings[4]) is False:
+        print("Bad Enigma settings", file=sys.stderr)
+        return 1
+
+    enigma_settings = tuple(tuple(setting) if isinstance(setting, list) else setting for setting in enigma_settings)
+
+    if not args.inputs or args.inputs == ["-"]:
+        try:
+            bytes_read, bytes_written = process_to_stdout(get_cli_machine(enigma_settings), sys.stdin.buffer,
+                                                          args.block_size, args.policy)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 1
+
+        results = [("-", bytes_read, bytes_written, None)]
+
+    else:
+        try:
+            file_paths = list_input_files(args.inputs, args.output_dir)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+
+        if args.output_dir is None and len(file_paths) > 1:
+            print("--output-dir is required for more than one input file", file=sys.stderr)
+            return 2
+
+        jobs = [(enigma_settings, input_path, output_path, args.block_size, args.policy)
+                for input_path, output_path in file_paths]
+
+        if args.jobs > 1 and len(jobs) > 1:
+            # imported here so single job runs do not load multiprocessing
+            import concurrent.futures
+
+            with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                results = list(executor.map(process_file, jobs))
+        else:
+            results = [process_file(job) for job in jobs]
+
+    errors = [(input_path, error) for input_path, bytes_read, bytes_written, error in results if error is not None]
+    for input_path, error in errors:
+        print("%s: %s" % (input_path, error), file=sys.stderr)
+
+    if not args.quiet:
+        print(format_stats(len(results) - len(errors), sum(result[1] for result in results),
+                           sum(result[2] for result in results), time.perf_counter() - start_time), file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
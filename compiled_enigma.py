@@ -0,0 +1,265 @@
+from enigma import *
+
+ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+NUM_ROTOR_STATES = 26 ** 3  # every (left, middle, right) rotor position combination
+ALL_STATES_BUILT = b"\x01" * NUM_ROTOR_STATES  # states_built of a machine whose tables were all built elsewhere
+
+
+class CompiledEnigma:
+    """
+    Defines a compiled version of an Enigma object. Instead of sending each letter through the plugboard, rotors and
+    reflector one at a time, the full 26-letter substitution for a rotor state is worked out once and stored in a
+    table. Every keypress then only needs to advance the rotor state and do one table lookup.
+
+    Tables for a rotor state are built the first time that state is reached (or all at once with compile_all()), so
+    short messages do not pay for all 26^3 states.
+    """
+
+    def __init__(self, enigma_machine: Enigma):
+        """ Grab the wiring and current rotor positions of an already set up Enigma object. """
+
+        # only the three rightmost rotors step, the M4 fourth rotor (if any) stays where it was set
+        rotors = enigma_machine.rotors_used[-3:]
+        fourth_rotor = enigma_machine.rotors_used[0] if len(enigma_machine.rotors_used) == 4 else None
+
+        # per rotor (left, middle, right), a translation table for each of the 26 rotor positions
+        self.rotor_forward_tables = [self.build_rotor_tables(rotor.rotor_outputs[0]) for rotor in rotors]
+        self.rotor_reverse_tables = [self.build_rotor_tables(rotor.rotor_outputs[1]) for rotor in rotors]
+
+        # reflector and plugboard never move, so each only needs a single translation table
+        self.reflector_table = bytes.maketrans(ALPHABET, enigma_machine.reflector.reflector_chosen.encode("ascii"))
+
+        # neither does the fourth rotor, so it is folded into the reflector table and the rotor states stay 26^3
+        if fourth_rotor is not None:
+            fourth_pos_i = fourth_rotor.get_rotor_pos_i()
+            reflector_output = ALPHABET \
+                .translate(self.build_rotor_tables(fourth_rotor.rotor_outputs[0])[fourth_pos_i]) \
+                .translate(self.reflector_table) \
+                .translate(self.build_rotor_tables(fourth_rotor.rotor_outputs[1])[fourth_pos_i])
+            self.reflector_table = bytes.maketrans(ALPHABET, reflector_output)
+
+        plugboard_output = bytes(ord(enigma_machine.plugboard.plugboard_cipher(chr(letter))) for letter in ALPHABET)
+        self.plugboard_table = bytes.maketrans(ALPHABET, plugboard_output)
+        self.plugboard_alphabet = ALPHABET.translate(self.plugboard_table)
+
+        # turnover points of the middle and right rotor decide when the rotors to their left step, notch flags are
+        # True at every turnover point so checking a rotor with several turnover points costs the same as one
+        self.notches = tuple(rotor.get_turnover_indexes() for rotor in rotors)
+        self.notch_flags = tuple(rotor.notch_flags for rotor in rotors)
+
+        # current rotor positions (left, middle, right) as ints, 'A' is 0, and where they were at keypress 0
+        self.positions = [rotor.get_rotor_pos_i() for rotor in rotors]
+        self.starting_positions = enigma_machine.starting_rotor_pos[-3:]
+        self.num_keypresses = enigma_machine.tell()
+
+        # 26 output letters for every rotor state, with a flag marking which states were built already
+        self.state_tables = bytearray(NUM_ROTOR_STATES * 26)
+        self.states_built = bytearray(NUM_ROTOR_STATES)
+
+    @staticmethod
+    def build_rotor_tables(rotor_output_str: str) -> list:
+        """
+        Build a translation table for each rotor position of a rotor's (ring setting rewired) output string.
+
+        Letters are kept relative to the machine rather than the rotor, so the tables for all rotors can be chained
+        together without knowing the position of the neighbouring rotors.
+        """
+
+        rotor_tables = []
+
+        for rotor_pos_i in range(26):
+            shifted_output = bytearray(26)
+            for letter_i in range(26):
+                output_letter_i = ord(rotor_output_str[(letter_i + rotor_pos_i) % 26]) - 65
+                shifted_output[letter_i] = ((output_letter_i - rotor_pos_i) % 26) + 65
+            rotor_tables.append(bytes.maketrans(ALPHABET, bytes(shifted_output)))
+
+        return rotor_tables
+
+    @staticmethod
+    def get_state_i(left_pos_i: int, middle_pos_i: int, right_pos_i: int) -> int:
+        """ Output the index of a rotor state in state_tables. """
+        return left_pos_i * 676 + middle_pos_i * 26 + right_pos_i
+
+    def build_state(self, state_i: int):
+        """ Work out the full 26-letter substitution for a rotor state and store it in state_tables. """
+
+        left_pos_i, rest = divmod(state_i, 676)
+        middle_pos_i, right_pos_i = divmod(rest, 26)
+
+        # same path as Enigma.encrypt_decrypt(), applied to the whole alphabet at once
+        state_output = self.plugboard_alphabet \
+            .translate(self.rotor_forward_tables[2][right_pos_i]) \
+            .translate(self.rotor_forward_tables[1][middle_pos_i]) \
+            .translate(self.rotor_forward_tables[0][left_pos_i]) \
+            .translate(self.reflector_table) \
+            .translate(self.rotor_reverse_tables[0][left_pos_i]) \
+            .translate(self.rotor_reverse_tables[1][middle_pos_i]) \
+            .translate(self.rotor_reverse_tables[2][right_pos_i]) \
+            .translate(self.plugboard_table)
+
+        self.state_tables[state_i * 26:state_i * 26 + 26] = state_output
+        self.states_built[state_i] = 1
+
+    def compile_all(self):
+        """ Build the substitution tables of every rotor state up front. """
+
+        for state_i in range(NUM_ROTOR_STATES):
+            if not self.states_built[state_i]:
+                self.build_state(state_i)
+
+    def use_state_tables(self, state_tables):
+        """
+        Use substitution tables already built for every rotor state (ex. memory-mapped by table_store.py) instead of
+        building them. state_tables is only read, so it can be shared between machines and processes.
+        """
+
+        self.state_tables = state_tables
+        self.states_built = ALL_STATES_BUILT
+
+    def tell(self) -> int:
+        """ Output the number of keypresses made since the rotors were at their starting positions. """
+        return self.num_keypresses
+
+    def seek(self, num_keypresses: int):
+        """ Set the rotors to the positions they would be at after num_keypresses keypresses, same as Enigma.seek(). """
+
+        if num_keypresses < 0:
+            raise ValueError("Cannot seek to a negative number of keypresses.")
+
+        self.positions = list(rotor_positions_after_steps(self.starting_positions, self.notches, num_keypresses))
+        self.num_keypresses = num_keypresses
+
+    def set_starting_positions(self, starting_positions: tuple):
+        """ Move the rotors to new starting positions (as ints, 'A' is 0) and start counting keypresses from 0. """
+
+        self.starting_positions = tuple(starting_positions)
+        self.positions = list(starting_positions)
+        self.num_keypresses = 0
+
+    def state_sequence(self, num_steps: int) -> list:
+        """
+        Advance the rotors num_steps times and output the index of the rotor state (in state_tables) after each step.
+
+        The substitution tables of every state in the sequence are built before returning.
+        """
+
+        states_built = self.states_built
+        left_pos_i, middle_pos_i, right_pos_i = self.positions
+        middle_notch_flags, right_notch_flags = self.notch_flags[1], self.notch_flags[2]
+
+        states = []
+
+        for i in range(num_steps):
+            # advance rotors, same stepping as Enigma.advance_rotors()
+            middle_rotor_step = right_notch_flags[right_pos_i]
+            left_rotor_step = middle_notch_flags[middle_pos_i]
+
+            right_pos_i = right_pos_i + 1 if right_pos_i < 25 else 0
+            if middle_rotor_step:
+                middle_pos_i = middle_pos_i + 1 if middle_pos_i < 25 else 0
+            if left_rotor_step:
+                left_pos_i = left_pos_i + 1 if left_pos_i < 25 else 0
+
+            state_i = left_pos_i * 676 + middle_pos_i * 26 + right_pos_i
+            if not states_built[state_i]:
+                self.build_state(state_i)
+
+            states.append(state_i)
+
+        self.positions = [left_pos_i, middle_pos_i, right_pos_i]
+        self.num_keypresses += num_steps
+
+        return states
+
+    def encrypt_decrypt_bytes(self, input_bytes: bytes) -> bytes:
+        """
+        Perform encryption/decryption on uppercase ASCII letters (b"A" to b"Z").
+
+        Rotor positions are kept between calls, same as Enigma.encrypt_decrypt().
+        """
+
+        state_tables = self.state_tables
+        states_built = self.states_built
+        left_pos_i, middle_pos_i, right_pos_i = self.positions
+        middle_notch_flags, right_notch_flags = self.notch_flags[1], self.notch_flags[2]
+
+        output_bytes = bytearray(len(input_bytes))
+
+        for i, letter in enumerate(input_bytes):
+            # advance rotors, same stepping as Enigma.advance_rotors()
+            middle_rotor_step = right_notch_flags[right_pos_i]
+            left_rotor_step = middle_notch_flags[middle_pos_i]
+
+            right_pos_i = right_pos_i + 1 if right_pos_i < 25 else 0
+            if middle_rotor_step:
+                middle_pos_i = middle_pos_i + 1 if middle_pos_i < 25 else 0
+            if left_rotor_step:
+                left_pos_i = left_pos_i + 1 if left_pos_i < 25 else 0
+
+            # look up the output letter in the substitution table of the new rotor state
+            state_i = left_pos_i * 676 + middle_pos_i * 26 + right_pos_i
+            if not states_built[state_i]:
+                self.build_state(state_i)
+
+            output_bytes[i] = state_tables[state_i * 26 + letter - 65]
+
+        self.positions = [left_pos_i, middle_pos_i, right_pos_i]
+        self.num_keypresses += len(input_bytes)
+
+        return bytes(output_bytes)
+
+    def encrypt_decrypt(self, input_text: str) -> str:
+        """
+        Perform encryption/decryption on the input_text.
+
+        Drop-in replacement for Enigma.encrypt_decrypt() on sanitized text.
+        """
+        return self.encrypt_decrypt_bytes(encode_letters(input_text, self.plugboard_alphabet)).decode("ascii")
+
+
+def encode_letters(input_text: str, plugboard_alphabet: bytes) -> bytes:
+    """
+    Output sanitized text as uppercase ASCII letters, for encrypt_decrypt_bytes().
+
+    Letters outside A-Z (ex. 'Ä', which sanitize_input_text() lets through) become the letter Enigma.encrypt_decrypt()
+    ends up ciphering: the plugboard leaves them alone and the rotors take them as letter (ord(letter) - 65) % 26,
+    which is the same as typing that letter's plugboard partner.
+
+    :param plugboard_alphabet: bytes, the plugboard partner of every letter A to Z (CompiledEnigma.plugboard_alphabet)
+    """
+
+    if input_text.isascii():
+        return input_text.encode("ascii")
+
+    return bytes(ord(letter) if letter.isascii() else plugboard_alphabet[(ord(letter) - 65) % 26]
+                 for letter in input_text)
+
+
+def enigma_run_compiled(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                        ring_settings: list, reflector: str, input_str: str = None) -> str:
+    """
+    Same as enigma_run(), but performs encrypt_decrypt() on a CompiledEnigma.
+
+    Output (including the bad input/settings messages) is identical to enigma_run().
+    """
+
+    # check if input_str is valid, if it is invalid, return a message saying input is bad
+    text = sanitize_input_text(input_str)
+
+    if text is False:
+        return "Bad input string. Letters only."
+
+    # check if Enigma settings are valid
+    if not sanitize_enigma_settings(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                    ring_settings, reflector):
+        return "Bad Enigma settings"
+
+    # finalize formatting of Enigma settings, then initialize and compile an Enigma machine
+    plugboard_pairings, initial_rotor_settings, ring_settings, reflector = \
+        finalize_enigma_settings(plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+
+    compiled_machine = CompiledEnigma(Enigma(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                             ring_settings, reflector))
+
+    return compiled_machine.encrypt_decrypt(text)
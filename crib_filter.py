@@ -0,0 +1,134 @@
+"""
+Crib position pre-filter: an Enigma never encrypts a letter to itself, so a crib cannot sit anywhere one of its
+letters is over the same ciphertext letter.
+
+find_crib_offsets() slides the crib along the whole ciphertext at once: for each letter, the positions holding it are
+a big int with one byte per position, and shifting those ints by each crib letter's index and OR-ing them marks every
+offset that puts a crib letter over itself. This is a handful of C-speed passes over the ciphertext, with no
+Enigma object involved, so it suits multi-MB intercepts.
+
+rank_crib_offsets() then orders the surviving offsets for the settings search (bombe.py): menus with more loops
+give the bombe fewer false stops, so they come first. Loops are counted with a small union-find, without building
+the bombe's Menu.
+
+    offsets = find_crib_offsets(ciphertext, "WETTERVORHERSAGE")
+    best = rank_crib_offsets(ciphertext, "WETTERVORHERSAGE", offsets)[0]["crib_offset"]
+"""
+
+from crib_search import sanitize_search_text
+
+OPEN = b"\x00"  # byte of an offset the crib can be at, in the blocked offsets
+
+
+def get_letter_masks(ciphertext: bytes, letters) -> dict:
+    """ Output, for each of letters (ints, ex. 65), a big int with byte i set to 1 if ciphertext[i] is the letter. """
+
+    letter_masks = {}
+
+    for letter in set(letters):
+        # every byte to 0, except the letter's to 1
+        translation = bytearray(256)
+        translation[letter] = 1
+        letter_masks[letter] = int.from_bytes(ciphertext.translate(translation), "little")
+
+    return letter_masks
+
+
+def find_crib_offsets(ciphertext: str or bytes, crib: str or bytes) -> list:
+    """
+    Output every offset (index of its first letter in ciphertext) the crib can be at, where no crib letter is over
+    the same ciphertext letter.
+
+    Raises ValueError if the ciphertext or crib are not letters only (bytes must already be uppercase letters).
+
+    :return: list of int, in increasing order
+    """
+
+    if isinstance(ciphertext, str):
+        ciphertext = sanitize_search_text(ciphertext)
+    if isinstance(crib, str):
+        crib = sanitize_search_text(crib)
+
+    num_offsets = len(ciphertext) - len(crib) + 1
+    if not crib or num_offsets <= 0:
+        return []
+
+    letter_masks = get_letter_masks(ciphertext, crib)
+
+    # byte o of blocked_offsets is set if some crib letter i is over the same letter at ciphertext[o + i]
+    blocked_offsets = 0
+    for crib_i, letter in enumerate(crib):
+        blocked_offsets |= letter_masks[letter] >> (8 * crib_i)
+
+    blocked_bytes = blocked_offsets.to_bytes(len(ciphertext), "little")[:num_offsets]
+
+    # the surviving offsets are the zero bytes, found without looping in Python over every offset
+    offsets = []
+    offset = blocked_bytes.find(OPEN)
+    while offset != -1:
+        offsets.append(offset)
+        offset = blocked_bytes.find(OPEN, offset + 1)
+
+    return offsets
+
+
+def count_menu_loops(ciphertext: bytes, crib: bytes, crib_offset: int) -> tuple:
+    """
+    Output the number of loops in the menu of the crib at crib_offset and the number of letters in its largest
+    component, same as bombe.Menu but without building the menu.
+
+    :return: tuple(number of loops, letters in the largest component)
+    """
+
+    # union-find over the 26 letters, each edge either joins two components or closes a loop
+    parents = list(range(26))
+    sizes = [1] * 26
+    num_loops = 0
+
+    for crib_i, crib_letter in enumerate(crib):
+        root_i = crib_letter - 65
+        while parents[root_i] != root_i:
+            root_i = parents[root_i]
+
+        other_root_i = ciphertext[crib_offset + crib_i] - 65
+        while parents[other_root_i] != other_root_i:
+            other_root_i = parents[other_root_i]
+
+        if root_i == other_root_i:
+            num_loops += 1
+        elif sizes[root_i] < sizes[other_root_i]:
+            parents[root_i] = other_root_i
+            sizes[other_root_i] += sizes[root_i]
+        else:
+            parents[other_root_i] = root_i
+            sizes[root_i] += sizes[other_root_i]
+
+    return num_loops, max(sizes)
+
+
+def rank_crib_offsets(ciphertext: str or bytes, crib: str or bytes, offsets: list = None, top: int = None) -> list:
+    """
+    Order crib offsets by how good a bombe menu they make: most loops first, then most letters joined to the test
+    letter, then earliest offset.
+
+    :param offsets: offsets to rank (default: every offset find_crib_offsets() keeps)
+    :param top: only output the best top offsets
+    :return: list of dict with the crib offset, its menu's number of loops and letters joined to the test letter
+    """
+
+    if isinstance(ciphertext, str):
+        ciphertext = sanitize_search_text(ciphertext)
+    if isinstance(crib, str):
+        crib = sanitize_search_text(crib)
+
+    if offsets is None:
+        offsets = find_crib_offsets(ciphertext, crib)
+
+    ranked = []
+    for offset in offsets:
+        num_loops, menu_letters = count_menu_loops(ciphertext, crib, offset)
+        ranked.append({"crib_offset": offset, "num_loops": num_loops, "menu_letters": menu_letters})
+
+    ranked.sort(key=lambda ranking: (-ranking["num_loops"], -ranking["menu_letters"], ranking["crib_offset"]))
+
+    return ranked if top is None else ranked[:top]
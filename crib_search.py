@@ -0,0 +1,245 @@
+import itertools
+import os
+
+from compiled_enigma import *
+
+ALL_ROTOR_ORDERS = tuple(itertools.permutations(range(1, 6), 3))  # 60 rotor orders
+ALL_REFLECTORS = ('A', 'B', 'C')
+# every ring setting that changes which starting positions match: the left ring setting only renames the left rotor's
+# starting position (its turnover points are never used), so it stays 'A'
+ALL_RING_SETTINGS = tuple(('A', middle_letter, right_letter) for middle_letter in ALPHABET_STR
+                          for right_letter in ALPHABET_STR)
+DEFAULT_CHUNK_SIZE = 2197  # starting rotor states per work unit, 8 work units per machine configuration
+PENDING_WORK_UNITS_PER_WORKER = 4  # work units handed to the process pool ahead of the ones finished
+
+# set in every worker process by init_search_worker()
+search_cancel_event = None
+search_letters = []
+search_machine_cache = {}
+
+
+##############################################################################
+# Work units (run inside the worker processes)
+##############################################################################
+def init_search_worker(cancel_event, ciphertext: bytes, crib: bytes, crib_offset: int):
+    """
+    Give a worker process access to the event used to cancel the search early, and to the ciphertext and crib every
+    work unit is tried against, so they are sent to each worker once instead of with every work unit.
+    """
+
+    global search_cancel_event, search_letters
+    search_cancel_event = cancel_event
+
+    # ciphertext letters up to the end of the crib, paired with the crib letter they must decrypt to (None if no crib)
+    expected = [None] * crib_offset + list(crib)
+    search_letters = [(ciphertext[i] - 65, expected[i]) for i in range(crib_offset + len(crib))]
+
+
+def get_search_machine(rotor_choices: tuple, plugboard_pairings: tuple, ring_settings: tuple,
+                       reflector: str) -> CompiledEnigma:
+    """
+    Return a CompiledEnigma for a machine configuration, reusing it for every work unit of that configuration the
+    worker receives so its state tables are only built once.
+    """
+
+    key = (rotor_choices, plugboard_pairings, ring_settings, reflector)
+
+    if key not in search_machine_cache:
+        # only the most recent configuration is kept, work units arrive grouped by configuration
+        search_machine_cache.clear()
+        search_machine_cache[key] = CompiledEnigma(Enigma(rotor_choices, plugboard_pairings, ('A', 'A', 'A'),
+                                                          ring_settings, reflector))
+
+    return search_machine_cache[key]
+
+
+def search_work_unit(work_unit: tuple) -> list:
+    """
+    Try every starting rotor state in a work unit's range against the crib given to init_search_worker().
+
+    :param work_unit: tuple(rotor_choices, plugboard_pairings, ring_settings, reflector, first_state_i, last_state_i)
+    :return: list of matching settings
+    """
+
+    rotor_choices, plugboard_pairings, ring_settings, reflector, first_state_i, last_state_i = work_unit
+
+    machine = get_search_machine(rotor_choices, plugboard_pairings, ring_settings, reflector)
+    state_tables = machine.state_tables
+    states_built = machine.states_built
+    middle_notch_flags, right_notch_flags = machine.notch_flags[1], machine.notch_flags[2]
+    letters = search_letters
+
+    matches = []
+
+    for start_state_i in range(first_state_i, last_state_i):
+        # check every so often if another worker already found a match
+        if start_state_i % 256 == 0 and search_cancel_event is not None and search_cancel_event.is_set():
+            break
+
+        left_pos_i, rest = divmod(start_state_i, 676)
+        middle_pos_i, right_pos_i = divmod(rest, 26)
+
+        for letter_i, expected_letter in letters:
+            # advance rotors, same stepping as Enigma.advance_rotors()
+            middle_rotor_step = right_notch_flags[right_pos_i]
+            left_rotor_step = middle_notch_flags[middle_pos_i]
+
+            right_pos_i = right_pos_i + 1 if right_pos_i < 25 else 0
+            if middle_rotor_step:
+                middle_pos_i = middle_pos_i + 1 if middle_pos_i < 25 else 0
+            if left_rotor_step:
+                left_pos_i = left_pos_i + 1 if left_pos_i < 25 else 0
+
+            if expected_letter is None:
+                continue
+
+            state_i = left_pos_i * 676 + middle_pos_i * 26 + right_pos_i
+            if not states_built[state_i]:
+                machine.build_state(state_i)
+
+            # stop trying this starting state at the first letter that does not match the crib
+            if state_tables[state_i * 26 + letter_i] != expected_letter:
+                break
+
+        else:
+            left_pos_i, rest = divmod(start_state_i, 676)
+            middle_pos_i, right_pos_i = divmod(rest, 26)
+            matches.append({
+                "rotor_choices": rotor_choices,
+                "plugboard_pairings": plugboard_pairings,
+                "initial_rotor_settings": (chr(left_pos_i + 65), chr(middle_pos_i + 65), chr(right_pos_i + 65)),
+                "ring_settings": ring_settings,
+                "reflector": reflector
+            })
+
+    return matches
+
+
+##############################################################################
+# Settings search
+##############################################################################
+def build_work_units(rotor_orders, reflectors, ring_settings_options, plugboard_pairings: tuple, chunk_size: int):
+    """ Split the rotor order x ring setting x reflector x starting position space into work units. """
+
+    for rotor_choices in rotor_orders:
+        for ring_settings in ring_settings_options:
+            for reflector in reflectors:
+                for first_state_i in range(0, NUM_ROTOR_STATES, chunk_size):
+                    last_state_i = min(first_state_i + chunk_size, NUM_ROTOR_STATES)
+                    yield (tuple(rotor_choices), plugboard_pairings, tuple(ring_settings), reflector,
+                           first_state_i, last_state_i)
+
+
+def sanitize_search_text(input_text: str) -> bytes:
+    """ Sanitize ciphertext or a crib for the search, raising ValueError if it is not letters only. """
+
+    text = sanitize_input_text(input_text)
+
+    if text is False:
+        raise ValueError("Bad input string. Letters only.")
+
+    # sanitize_input_text() lets non-ASCII letters through, the machines only have A-Z
+    try:
+        return text.encode("ascii")
+    except UnicodeEncodeError:
+        raise ValueError("Bad input string. Letters only.") from None
+
+
+def search_settings(ciphertext: str, crib: str, crib_offset: int = 0, rotor_orders=ALL_ROTOR_ORDERS,
+                    reflectors=ALL_REFLECTORS, ring_settings_options=(('A', 'A', 'A'),), plugboard_pairings=(),
+                    workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, stop_at_first: bool = True,
+                    progress_callback=None) -> list:
+    """
+    Recover Enigma settings from ciphertext and a known piece of its plaintext (a crib).
+
+    Every rotor order x ring setting x reflector x starting rotor position combination is tried, split into work units
+    that are spread across a process pool. The crib is expected to start crib_offset letters into the ciphertext.
+
+    Only ring settings 'AAA' are tried by default. A ring setting only moves the wiring, which the starting position
+    moves the same way, and the turnover points, so the settings are still found (with the starting positions moved
+    by the ring settings) unless the middle or left rotor turns over at a different keypress before the end of the
+    crib. Pass ALL_RING_SETTINGS to try every ring setting, 676 times the work.
+
+    :param ciphertext: str
+    :param crib: str
+    :param crib_offset: int
+    :param rotor_orders: iterable of tuple(int, int, int)
+    :param reflectors: iterable of str
+    :param ring_settings_options: iterable of tuple(str, str, str), ex. ALL_RING_SETTINGS
+    :param plugboard_pairings: tuple(str), plugboard used for every candidate (if known)
+    :param workers: int, number of processes (default: every CPU core), 1 searches in this process
+    :param chunk_size: int, starting rotor states per work unit
+    :param stop_at_first: bool, cancel the rest of the search once a match is found
+    :param progress_callback: called as progress_callback(work_units_done, work_units_total, matches)
+    :return: list of dict, settings (as enigma_run() arguments) that decrypt the ciphertext to the crib
+    """
+
+    ciphertext = sanitize_search_text(ciphertext)
+    crib = sanitize_search_text(crib)
+
+    if crib_offset < 0 or crib_offset + len(crib) > len(ciphertext):
+        raise ValueError("Crib does not fit in the ciphertext at the given offset.")
+
+    plugboard_pairings = tuple(pairing.upper() for pairing in plugboard_pairings)
+    rotor_orders = tuple(rotor_orders)
+    reflectors = tuple(reflectors)
+    ring_settings_options = tuple(ring_settings_options)
+
+    # work units are built as they are handed out, there are close to a million with ALL_RING_SETTINGS
+    work_units = build_work_units(rotor_orders, reflectors, ring_settings_options, plugboard_pairings, chunk_size)
+    work_units_per_configuration = (NUM_ROTOR_STATES + chunk_size - 1) // chunk_size
+    work_units_total = len(rotor_orders) * len(ring_settings_options) * len(reflectors) * work_units_per_configuration
+    matches = []
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # single worker, no need for a process pool
+    if workers == 1:
+        init_search_worker(None, ciphertext, crib, crib_offset)
+
+        for work_units_done, work_unit in enumerate(work_units, 1):
+            matches.extend(search_work_unit(work_unit))
+
+            if progress_callback is not None:
+                progress_callback(work_units_done, work_units_total, matches)
+            if stop_at_first and matches:
+                break
+
+        return matches
+
+    # imported here so importing this module (or a single worker search) does not load multiprocessing
+    import concurrent.futures
+    import multiprocessing
+
+    cancel_event = multiprocessing.Event()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_search_worker,
+                                                initargs=(cancel_event, ciphertext, crib, crib_offset)) as executor:
+        # only a few work units per worker are submitted at a time, one more for each one finished
+        pending_futures = {executor.submit(search_work_unit, work_unit)
+                           for work_unit in itertools.islice(work_units, workers * PENDING_WORK_UNITS_PER_WORKER)}
+        work_units_done = 0
+
+        while pending_futures:
+            done_futures, pending_futures = concurrent.futures.wait(pending_futures,
+                                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done_futures:
+                work_units_done += 1
+                matches.extend(future.result())
+
+                if progress_callback is not None:
+                    progress_callback(work_units_done, work_units_total, matches)
+
+            # tell running work units to stop and drop the ones not started yet
+            if stop_at_first and matches:
+                cancel_event.set()
+                for pending_future in pending_futures:
+                    pending_future.cancel()
+                break
+
+            for work_unit in itertools.islice(work_units, len(done_futures)):
+                pending_futures.add(executor.submit(search_work_unit, work_unit))
+
+    return matches
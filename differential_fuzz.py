@@ -0,0 +1,304 @@
+"""
+Differential fuzzer: runs random settings and messages through an alternative engine and the reference path
+(enigma_run(), so Enigma.encrypt_decrypt()) side by side, and shrinks every mismatch to a small case that still
+fails, so optimized paths can be trusted to match the reference exactly.
+
+Cases lean towards the edges: starting positions next to turnover points, the M4, many plugboard pairings, long
+messages, letters outside A-Z (ex. 'Ä'), unusual settings (lowercase, letters outside A-Z, rotor choices such as 1.0),
+and now and then bad settings or input (the engines must give the same message as enigma_run()).
+
+    python differential_fuzz.py --engine all --cases 10000 --seed 1
+    python differential_fuzz.py --engine compiled --seconds 60
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from compiled_enigma import enigma_run_compiled
+from enigma_batch import enigma_run_batch
+from enigma_quick import quick_run
+from enigma_stream import build_compiled_machine
+from known_answers import *
+from machine_cache import enigma_run_cached
+
+DEFAULT_NUM_CASES = 1000
+DEFAULT_MAX_LENGTH = 200
+MAX_MISMATCHES = 5  # fuzzing an engine stops after this many mismatches, each one is shrunk
+SHRINK_LETTERS_LENGTH = 64  # messages this short or shorter also have their letters simplified to 'A'
+
+
+##############################################################################
+# Engines, each called like enigma_run()
+##############################################################################
+def enigma_run_batched(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                       ring_settings: list, reflector: str, input_str: str = None) -> str:
+    """ Same as enigma_run(), through enigma_run_batch() with a single record. """
+
+    settings = (rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+
+    return enigma_run_batch([(settings, input_str)])[0]
+
+
+def enigma_run_chunked(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                       ring_settings: list, reflector: str, input_str: str = None) -> str:
+    """
+    Same as enigma_run(), through a CompiledEnigma fed in chunks of 1, 2, 3... letters, so rotor positions must be
+    carried over correctly from one call to the next.
+    """
+
+    text = sanitize_input_text(input_str)
+
+    if text is False:
+        return "Bad input string. Letters only."
+
+    compiled_machine = build_compiled_machine(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                              ring_settings, reflector)
+
+    if compiled_machine is False:
+        return "Bad Enigma settings"
+
+    output_chunks = []
+    letter_i = 0
+    chunk_size = 1
+
+    while letter_i < len(text):
+        output_chunks.append(compiled_machine.encrypt_decrypt(text[letter_i:letter_i + chunk_size]))
+        letter_i += chunk_size
+        chunk_size += 1
+
+    return "".join(output_chunks)
+
+
+def enigma_run_seek(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                    ring_settings: list, reflector: str, input_str: str = None) -> str:
+    """ Same as enigma_run(), through a CompiledEnigma doing the second half of the message first, using seek(). """
+
+    text = sanitize_input_text(input_str)
+
+    if text is False:
+        return "Bad input string. Letters only."
+
+    compiled_machine = build_compiled_machine(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                              ring_settings, reflector)
+
+    if compiled_machine is False:
+        return "Bad Enigma settings"
+
+    half_i = len(text) // 2
+
+    compiled_machine.seek(half_i)
+    second_half = compiled_machine.encrypt_decrypt(text[half_i:])
+    compiled_machine.seek(0)
+
+    return compiled_machine.encrypt_decrypt(text[:half_i]) + second_half
+
+
+def get_engines() -> dict:
+    """ Output every engine by name, the bulk engine only if numpy can be imported. """
+
+    engines = {
+        "reference": enigma_run,
+        "compiled": enigma_run_compiled,
+        "cached": enigma_run_cached,
+        "quick": quick_run,
+        "batch": enigma_run_batched,
+        "chunked": enigma_run_chunked,
+        "seek": enigma_run_seek
+    }
+
+    try:
+        from bulk_enigma import enigma_run_bulk
+    except ImportError:
+        pass
+    else:
+        engines["bulk"] = enigma_run_bulk
+
+    return engines
+
+
+##############################################################################
+# Cases
+##############################################################################
+def random_case(rng: random.Random, max_length: int = DEFAULT_MAX_LENGTH) -> dict:
+    """ Output random settings and plaintext, as the fields of a vector (no ciphertext). """
+
+    case = random_vector_settings(rng)
+    roll = rng.random()
+
+    # start the middle and right rotors on or next to one of their turnover points
+    if roll < 0.3:
+        start = list(case["start"])
+        for slot_i in (-2, -1):
+            if rng.random() < 0.7:
+                turnover_letter = rng.choice(ROTOR_CATALOG[case["rotors"][slot_i]][2])
+                start[slot_i] = shift_letter(turnover_letter, rng.randrange(-2, 2))
+        case["start"] = "".join(start)
+
+    # bad settings, one field at a time
+    elif roll < 0.33:
+        bad_field, bad_value = rng.choice((("rotors", case["rotors"][:-1] + case["rotors"][-2:-1]),
+                                           ("plugboard", case["plugboard"] + ["AA"]),
+                                           ("start", case["start"][:-1]),
+                                           ("ring", case["ring"] + "A"),
+                                           ("reflector", "D")))
+        case[bad_field] = bad_value
+
+    # the same settings written in an unusual way, some of them bad
+    elif roll < 0.38:
+        case = rng.choice(unusual_vector_settings(rng, case)[1:])
+
+    if rng.random() < 0.02:
+        plaintext = rng.choice(("", "   ", "HELLO1", "hello world", "AB_C", "AB-CD", "HÄLLO", "straße"))
+    elif rng.random() < 0.1:
+        plaintext = random_mixed_letters(rng, rng.randrange(1, max_length + 1))
+    elif rng.random() < 0.05:
+        plaintext = random_letters(rng, rng.randrange(max_length, 8 * max_length + 1))
+    else:
+        plaintext = random_letters(rng, rng.randrange(1, max_length + 1))
+
+    case["plaintext"] = plaintext
+
+    return case
+
+
+def run_engine(engine, case: dict) -> str:
+    """ Output engine's output for a case, or the exception it raised as text. """
+
+    try:
+        return engine(*get_vector_settings(case), case["plaintext"])
+    except Exception as error:
+        return "%s: %s" % (type(error).__name__, error)
+
+
+def shrink_case(case: dict, is_failing) -> dict:
+    """
+    Output a smaller case that is_failing(case) is still True for: shorter message, fewer plugboard pairings, and
+    ring settings, starting positions and letters moved to 'A'. Each change is kept only if the case still fails,
+    until no change helps.
+    """
+
+    def try_change(**fields) -> bool:
+        nonlocal case
+        changed_case = dict(case, **fields)
+
+        if changed_case != case and is_failing(changed_case):
+            case = changed_case
+            return True
+
+        return False
+
+    changed = True
+    while changed:
+        changed = False
+
+        # remove chunks of the message, halves first down to single letters
+        chunk_size = len(case["plaintext"]) // 2
+        while chunk_size >= 1:
+            chunk_start = 0
+            while chunk_start < len(case["plaintext"]):
+                plaintext = case["plaintext"]
+                if try_change(plaintext=plaintext[:chunk_start] + plaintext[chunk_start + chunk_size:]):
+                    changed = True
+                else:
+                    chunk_start += chunk_size
+            chunk_size //= 2
+
+        for pairing in list(case["plugboard"]):
+            changed |= try_change(plugboard=[other for other in case["plugboard"] if other != pairing])
+
+        for field in ("ring", "start"):
+            for letter_i in range(len(case[field])):
+                value = case[field]
+                if isinstance(value, str):
+                    changed |= try_change(**{field: value[:letter_i] + "A" + value[letter_i + 1:]})
+
+        if len(case["plaintext"]) <= SHRINK_LETTERS_LENGTH:
+            for letter_i in range(len(case["plaintext"])):
+                plaintext = case["plaintext"]
+                if plaintext[letter_i].isalpha():
+                    changed |= try_change(plaintext=plaintext[:letter_i] + "A" + plaintext[letter_i + 1:])
+
+    return case
+
+
+##############################################################################
+# Fuzzing
+##############################################################################
+def fuzz_engine(engine, num_cases: int = DEFAULT_NUM_CASES, seed: int = None, max_length: int = DEFAULT_MAX_LENGTH,
+                seconds: float = None, reference=enigma_run, max_mismatches: int = MAX_MISMATCHES) -> dict:
+    """
+    Run random cases through engine and reference, shrinking every mismatch.
+
+    :param num_cases: number of cases to run, unless seconds runs out first
+    :param seed: seed of the random cases, the same seed gives the same cases
+    :param seconds: stop after this many seconds
+    :param max_mismatches: stop after this many mismatches
+    :return: dict with the number of cases and letters run, and a list of mismatches, each a dict of the failing
+             case, its shrunk case, and the reference and engine output of the shrunk case
+    """
+
+    rng = random.Random(seed)
+    deadline = None if seconds is None else time.monotonic() + seconds
+
+    def is_failing(case: dict) -> bool:
+        return run_engine(engine, case) != run_engine(reference, case)
+
+    num_run = 0
+    num_letters = 0
+    mismatches = []
+
+    while num_run < num_cases and len(mismatches) < max_mismatches:
+        if deadline is not None and time.monotonic() > deadline:
+            break
+
+        case = random_case(rng, max_length)
+        num_run += 1
+        num_letters += len(case["plaintext"])
+
+        if is_failing(case):
+            shrunk_case = shrink_case(case, is_failing)
+            mismatches.append({"case": case, "shrunk_case": shrunk_case,
+                               "expected": run_engine(reference, shrunk_case),
+                               "output": run_engine(engine, shrunk_case)})
+
+    return {"cases": num_run, "letters": num_letters, "mismatches": mismatches}
+
+
+def main(argv: list = None) -> int:
+    """ Fuzz engines from the command line, exit status 1 if any mismatch was found. """
+
+    engines = get_engines()
+
+    parser = argparse.ArgumentParser(description="Fuzz Enigma engines against enigma_run().")
+    parser.add_argument("--engine", choices=sorted(engines) + ["all"], default="all", help="engine to fuzz")
+    parser.add_argument("--cases", type=int, default=DEFAULT_NUM_CASES, help="cases per engine")
+    parser.add_argument("--seconds", type=float, default=None, help="time limit per engine")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random cases")
+    parser.add_argument("--max-length", type=int, default=DEFAULT_MAX_LENGTH, help="usual longest message")
+    args = parser.parse_args(argv)
+
+    engine_names = [name for name in sorted(engines) if name != "reference"] if args.engine == "all" \
+        else [args.engine]
+    num_failed = 0
+
+    for engine_name in engine_names:
+        start_time = time.perf_counter()
+        results = fuzz_engine(engines[engine_name], args.cases, args.seed, args.max_length, args.seconds)
+        elapsed = time.perf_counter() - start_time
+        num_failed += bool(results["mismatches"])
+
+        print("%-10s %d cases, %d letters, %d mismatches in %.1f s" % (engine_name, results["cases"],
+                                                                      results["letters"], len(results["mismatches"]),
+                                                                      elapsed))
+        for mismatch in results["mismatches"]:
+            print("  " + json.dumps({"shrunk_case": mismatch["shrunk_case"], "expected": mismatch["expected"],
+                                     "output": mismatch["output"]}, ensure_ascii=False))
+
+    return 1 if num_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,13 +6,15 @@ from rotor import *
 class Enigma:
     """
     Defines a class simulating the functionality of the German Enigma I and M3
-    cipher machines used by the German Army and Air Force during WW2.
+    cipher machines used by the German Army and Air Force during WW2, as well as
+    the four rotor M4 used by the German Navy.
 
-    Uses rotors 1-5 and reflectors A-C.
+    Uses the rotors and reflectors of wiring_catalog.py: rotors 1-8 and reflectors
+    A-C, plus a fourth rotor (Beta or Gamma) and a thin reflector on the M4.
     """
 
     def __init__(self,
-                 settings_rotor_choices: tuple,  # (1, 2, 3)
+                 settings_rotor_choices: tuple,  # (1, 2, 3) or ('BETA', 1, 2, 3)
                  settings_plugboard_pairings: tuple,  # tuple("AB", "CD", ...)
                  settings_starting_rotor_pos: tuple,  # ('X', 'X', 'X')
                  settings_ring: tuple,  # ('X', 'X', 'X')
@@ -30,6 +32,9 @@ class Enigma:
         self.reflector = Reflector(settings_reflector)
         self.rotors_used = self.set_rotors(settings_rotor_choices, settings_starting_rotor_pos, settings_ring)
 
+        # keep the starting rotor positions and count keypresses so the machine can seek() back and forth
+        self.keep_starting_rotor_pos()
+
     # # test methods here
     # def get_rotor_order(self):
     #     """ Testing Only: Output 3 chosen rotors. """
@@ -63,34 +68,143 @@ class Enigma:
         rotor_outputs_to_use = []
 
         # configure each chosen rotor based on desired starting position and ring setting letter
-        for i in range(3):
+        for i in range(len(settings_rotor_choices)):
             new_rotor = Rotor(rotor_chosen=settings_rotor_choices[i],
                               starting_rotor_pos_letter=settings_starting_rotor_pos[i],
                               ring_setting_letter=settings_ring[i])
             rotor_outputs_to_use.append(new_rotor)
 
-        return rotor_outputs_to_use  # list of 3 Rotor objects
+        return rotor_outputs_to_use  # list of 3 (or 4 on the M4) Rotor objects
 
     def advance_rotors(self):
-        """ Check if more than 1 rotor needs to move. Then move right rotor forward 1 step. """
+        """
+        Check if more than 1 rotor needs to move. Then move right rotor forward 1 step.
+
+        Only the three rightmost rotors step, the M4 fourth rotor stays where it was set.
+        """
 
-        middle_rotor_step = self.rotors_used[2].check_to_step_adjacent_rotor()
-        left_rotor_step = self.rotors_used[1].check_to_step_adjacent_rotor()
+        middle_rotor_step = self.rotors_used[-1].check_to_step_adjacent_rotor()
+        left_rotor_step = self.rotors_used[-2].check_to_step_adjacent_rotor()
 
         # step right rotor (always occurs)
-        self.rotors_used[2].step_rotor()
+        self.rotors_used[-1].step_rotor()
 
         # step the middle rotor if possible
         if middle_rotor_step is True:
-            self.rotors_used[1].step_rotor()
+            self.rotors_used[-2].step_rotor()
 
         # step the left rotor if possible
         if left_rotor_step is True:
-            self.rotors_used[0].step_rotor()
+            self.rotors_used[-3].step_rotor()
+
+        self.num_keypresses += 1
+
+    def tell(self) -> int:
+        """ Output the number of keypresses made since the rotors were at their starting positions. """
+        return self.num_keypresses
+
+    def seek(self, num_keypresses: int):
+        """
+        Set the rotors to the positions they would be at after num_keypresses keypresses from their starting
+        positions, without stepping through every keypress.
+        """
+
+        if num_keypresses < 0:
+            raise ValueError("Cannot seek to a negative number of keypresses.")
+
+        # only the three rightmost rotors step
+        notches = tuple(rotor.get_turnover_indexes() for rotor in self.rotors_used[-3:])
+        rotor_positions = rotor_positions_after_steps(self.starting_rotor_pos[-3:], notches, num_keypresses)
+
+        for rotor, rotor_pos_i in zip(self.rotors_used[-3:], rotor_positions):
+            rotor.set_rotor_pos_i(rotor_pos_i)
+
+        self.num_keypresses = num_keypresses
+
+    def keep_starting_rotor_pos(self):
+        """ Keep the current rotor positions as the starting positions (keypress 0) of seek() and reset(). """
+
+        self.starting_rotor_pos = tuple(rotor.get_rotor_pos_i() for rotor in self.rotors_used)
+        self.num_keypresses = 0
+
+    def reset(self, starting_rotor_pos: tuple = None):
+        """
+        Set the rotors back to their starting positions, or to new starting positions (letters, one per rotor), so
+        the same machine can encrypt/decrypt another message without being set up again.
+
+        Raises ValueError if there is not one starting position per rotor, or a position is not a letter A-Z
+        (either case) or an int 1-26.
+        """
+
+        if starting_rotor_pos is None:
+            for rotor, rotor_pos_i in zip(self.rotors_used, self.starting_rotor_pos):
+                rotor.set_rotor_pos_i(rotor_pos_i)
+
+        else:
+            if len(starting_rotor_pos) != len(self.rotors_used):
+                raise ValueError("Expected %d starting rotor positions." % len(self.rotors_used))
+
+            # checked as when setting up a new machine, any int is converted to its letter
+            starting_rotor_pos = list(starting_rotor_pos)
+            if check_rotor_ring_settings(starting_rotor_pos, len(self.rotors_used)) is False:
+                raise ValueError("Bad starting rotor positions.")
+
+            # same as setting up a new machine with these starting positions
+            for rotor, rotor_pos_letter in zip(self.rotors_used, starting_rotor_pos):
+                rotor.curr_rotor_pos_letter = rotor_pos_letter
 
-    def right_to_left_cipher(self, letter: str, prev_rotor_pos: int = 0, curr_rotor_i: int = 2) -> str:
+        self.keep_starting_rotor_pos()
+
+    def snapshot(self) -> tuple:
+        """
+        Output the machine's rotor state, to be put back later with restore().
+
+        :return: tuple(rotor positions, starting rotor positions, number of keypresses)
+        """
+        rotor_positions = tuple(rotor.get_rotor_pos_i() for rotor in self.rotors_used)
+
+        return rotor_positions, self.starting_rotor_pos, self.num_keypresses
+
+    def restore(self, snapshot: tuple):
+        """
+        Put back a rotor state output by snapshot() of this machine or of a clone() of it.
+
+        Raises ValueError if the snapshot is of a machine with another number of rotors.
+        """
+
+        rotor_positions, starting_rotor_pos, num_keypresses = snapshot
+
+        if len(rotor_positions) != len(self.rotors_used):
+            raise ValueError("Snapshot is of a machine with %d rotors." % len(rotor_positions))
+
+        for rotor, rotor_pos_i in zip(self.rotors_used, rotor_positions):
+            rotor.set_rotor_pos_i(rotor_pos_i)
+
+        self.starting_rotor_pos = starting_rotor_pos
+        self.num_keypresses = num_keypresses
+
+    def clone(self) -> "Enigma":
+        """
+        Output a new Enigma object in the same rotor state. The plugboard, reflector and rotor wiring never change,
+        so they are shared, only the rotor positions are copied.
+        """
+
+        enigma_machine = Enigma.__new__(Enigma)
+        enigma_machine.plugboard = self.plugboard
+        enigma_machine.reflector = self.reflector
+        enigma_machine.rotors_used = [rotor.clone() for rotor in self.rotors_used]
+        enigma_machine.starting_rotor_pos = self.starting_rotor_pos
+        enigma_machine.num_keypresses = self.num_keypresses
+
+        return enigma_machine
+
+    def right_to_left_cipher(self, letter: str, prev_rotor_pos: int = 0, curr_rotor_i: int = None) -> str:
         """ First set of letter substitutions from the input wheel to just before the reflector. """
 
+        # start at the right rotor
+        if curr_rotor_i is None:
+            curr_rotor_i = len(self.rotors_used) - 1
+
         # Base case - when all rotors have been performed their ciphers
         if curr_rotor_i < 0:
             return letter
@@ -111,7 +225,7 @@ class Enigma:
 
         # Base case - when all rotors have been performed their ciphers
         # Now perform the cipher between right rotor and input wheel
-        if curr_rotor_i > 2:
+        if curr_rotor_i >= len(self.rotors_used):
             # Find index of letter
             input_letter_i = ord(letter) - 65
 
@@ -166,6 +280,82 @@ class Enigma:
 
         return output_text
 
+    def profile(self, profiler=None):
+        """
+        Context manager counting calls and time spent in each stage of encrypt_decrypt() while it is open, see
+        enigma_profiler.py. Outputs the EnigmaProfiler holding the counts.
+        """
+
+        # imported here, the profiler is only loaded when profiling is turned on
+        from enigma_profiler import profile_enigma
+
+        return profile_enigma(self, profiler=profiler)
+
+
+##############################################################################
+# Rotor stepping arithmetic
+##############################################################################
+# (middle_pos_i, right_pos_i, middle_notches, right_notches): output of stepping_cycle_table(), emptied when full
+STEPPING_CYCLE_CACHE = {}
+STEPPING_CYCLE_CACHE_SIZE = 4096
+
+
+def stepping_cycle_table(middle_pos_i: int, right_pos_i: int, middle_notches: tuple, right_notches: tuple) -> tuple:
+    """
+    Step the middle and right rotors through 676 keypresses (after which both are always back where they started)
+    and record, after each keypress, the middle rotor's position and how many times the left rotor has stepped.
+
+    Follows Enigma.advance_rotors(): the left rotor steps on every keypress made while the middle rotor is at a
+    turnover point, so it can step on many keypresses in a row.
+
+    :return: tuple(bytes of middle rotor positions, tuple of left rotor step counts), both indexed by keypress 0-676
+    """
+
+    key = (middle_pos_i, right_pos_i, middle_notches, right_notches)
+    if key in STEPPING_CYCLE_CACHE:
+        return STEPPING_CYCLE_CACHE[key]
+
+    middle_positions = bytearray([middle_pos_i])
+    left_steps = [0]
+
+    for i in range(676):
+        left_rotor_step = middle_pos_i in middle_notches
+
+        if right_pos_i in right_notches:
+            middle_pos_i = (middle_pos_i + 1) % 26
+        right_pos_i = (right_pos_i + 1) % 26
+
+        middle_positions.append(middle_pos_i)
+        left_steps.append(left_steps[-1] + left_rotor_step)
+
+    # a plain dict instead of functools.lru_cache keeps importing enigma.py cheap
+    if len(STEPPING_CYCLE_CACHE) >= STEPPING_CYCLE_CACHE_SIZE:
+        STEPPING_CYCLE_CACHE.clear()
+    STEPPING_CYCLE_CACHE[key] = (bytes(middle_positions), tuple(left_steps))
+
+    return STEPPING_CYCLE_CACHE[key]
+
+
+def rotor_positions_after_steps(starting_positions: tuple, notches: tuple, num_steps: int) -> tuple:
+    """
+    Work out the rotor positions after num_steps keypresses in constant time.
+
+    :param starting_positions: tuple(left, middle, right) rotor positions as ints, 'A' is 0
+    :param notches: tuple(left, middle, right) turnover points, each a tuple of ints
+    :param num_steps: int
+    :return: tuple(left, middle, right) rotor positions as ints
+    """
+
+    left_pos_i, middle_pos_i, right_pos_i = starting_positions
+    middle_positions, left_steps = stepping_cycle_table(middle_pos_i, right_pos_i, notches[1], notches[2])
+
+    # the middle and right rotors repeat every 676 keypresses, the left rotor steps the same amount in each cycle
+    num_cycles, steps_in_cycle = divmod(num_steps, 676)
+
+    return ((left_pos_i + num_cycles * left_steps[676] + left_steps[steps_in_cycle]) % 26,
+            middle_positions[steps_in_cycle],
+            (right_pos_i + num_steps) % 26)
+
 
 ##############################################################################
 # Enigma setting checks
@@ -174,30 +364,36 @@ def check_rotor_choices(rotor_choices: tuple) -> bool:
     """
     Check if rotor_choices are valid.
 
-    :param rotor_choices: tuple[int]
+    :param rotor_choices: tuple[int or str]
     :return: bool
     """
 
-    # if 3 rotors were not chosen, return False
-    if len(rotor_choices) != 3:
+    # if 3 rotors (or 4 rotors for the M4) were not chosen, return False
+    if len(rotor_choices) not in (3, 4):
         return False
 
+    # if the leftmost of 4 rotors is not a fourth rotor (ex. 'BETA'), return False
+    if len(rotor_choices) == 4:
+        if not is_fourth_rotor(rotor_choices[0]):
+            return False
+        rotor_choices = rotor_choices[1:]
+
     rotors_used = set()
     for rotor in rotor_choices:
-        # if rotor is not an int, return False
-        if not isinstance(rotor, int):
+        # if rotor is not an int or str, return False
+        if not isinstance(rotor, (int, str)):
             return False
 
-        # if rotor is not numbered 1-5, return False
-        elif rotor < 1 or rotor > 5:
+        # if rotor is not a stepping rotor in the catalog (1-8 unless more were loaded), return False
+        elif not is_stepping_rotor(rotor):
             return False
 
         # else if a rotor repeats, return False
-        elif rotor in rotors_used:
+        elif normalize_name(rotor) in rotors_used:
             return False
 
         else:
-            rotors_used.add(rotor)
+            rotors_used.add(normalize_name(rotor))
 
     # if rotor_choices are all valid, return True
     return True
@@ -217,8 +413,8 @@ def check_plugboard_pairings(plugboard_pairings: list) -> bool:
         if not isinstance(pairing, str):
             return False
 
-        # if pairing letters are not a letter, return False
-        elif pairing[0].isalpha() is False or pairing[1].isalpha() is False:
+        # if pairing letters are not letters A-Z (either case), return False
+        elif pairing[0].isalpha() is False or pairing[1].isalpha() is False or not pairing[:2].isascii():
             return False
 
         # if both letters in the pairing are the same, return False
@@ -237,17 +433,18 @@ def check_plugboard_pairings(plugboard_pairings: list) -> bool:
     return True
 
 
-def check_rotor_ring_settings(rotor_ring_settings: list) -> bool:
+def check_rotor_ring_settings(rotor_ring_settings: list, num_rotors: int = 3) -> bool:
     """
     Check if rotor or ring settings are valid. Also convert them from an int
     to their corresponding ASCII letters if needed.
 
     :param rotor_ring_settings: list
+    :param num_rotors: int, 3 or 4 for the M4
     :return: bool
     """
 
-    # if 3 rotor rings were not set, return False
-    if len(rotor_ring_settings) != 3:
+    # if a setting was not given for every rotor, return False
+    if len(rotor_ring_settings) != num_rotors:
         return False
 
     # check each element to see if it is a valid element, and convert any int
@@ -255,10 +452,10 @@ def check_rotor_ring_settings(rotor_ring_settings: list) -> bool:
     for i in range(len(rotor_ring_settings)):
         rotor_ring_el = rotor_ring_settings[i]
 
-        # if rotor_ring_el is a str, check if it's a letter
+        # if rotor_ring_el is a str, check if it's a letter A-Z (either case)
         # if not, return False
         if isinstance(rotor_ring_el, str) and len(rotor_ring_el) == 1:
-            if not rotor_ring_el.isalpha():
+            if not (rotor_ring_el.isascii() and rotor_ring_el.isalpha()):
                 return False
 
         # else if rotor_ring_el is an int and between 1-26
@@ -280,16 +477,12 @@ def check_reflector(reflector: str) -> bool:
     :return: bool
     """
 
-    # if exactly 1 reflector was not chosen, return False
-    if len(reflector) != 1:
-        return False
-
-    # if reflector is not a str or is not a letter, return False
-    if not isinstance(reflector, str) or reflector.isalpha() is False:
+    # if reflector is not a str, return False
+    if not isinstance(reflector, str):
         return False
 
-    # if reflector is not 'A', 'B', or 'C', return False
-    if reflector.upper() not in ('A', 'B', 'C'):
+    # if reflector is not in the catalog ('A', 'B', 'C', 'B-THIN', 'C-THIN' unless more were loaded), return False
+    if reflector.upper() not in REFLECTOR_CATALOG:
         return False
 
     # if reflector is valid, return True
@@ -318,21 +511,46 @@ def sanitize_enigma_settings(rotor_choices: tuple, plugboard_pairings: list, ini
         return False
 
     # check initial_rotor_settings
-    elif not check_rotor_ring_settings(initial_rotor_settings):
+    elif not check_rotor_ring_settings(initial_rotor_settings, len(rotor_choices)):
         return False
 
     # check ring_settings
-    elif not check_rotor_ring_settings(ring_settings):
+    elif not check_rotor_ring_settings(ring_settings, len(rotor_choices)):
         return False
 
     # check reflector
     elif not check_reflector(reflector):
         return False
 
+    # check a thin reflector is used with 4 rotors (M4) and a regular one with 3 rotors
+    elif (len(rotor_choices) == 4) != (reflector.upper() in THIN_REFLECTORS):
+        return False
+
     # if no checks failed, then Enigma settings must be correct, return True
     return True
 
 
+def finalize_enigma_settings(plugboard_pairings: list, initial_rotor_settings: list, ring_settings: list,
+                             reflector: str) -> tuple:
+    """
+    Finalize formatting of already sanitized Enigma settings so they can be
+    used to initialize an Enigma object.
+
+    :param plugboard_pairings: list
+    :param initial_rotor_settings: list
+    :param ring_settings: list
+    :param reflector: str
+    :return: tuple(plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+    """
+
+    # uppercase each letter in plugboard_pairings
+    for i in range(len(plugboard_pairings)):
+        plugboard_pairings[i] = plugboard_pairings[i].upper()
+
+    # make lists as tuples and uppercase the reflector letter
+    return tuple(plugboard_pairings), tuple(initial_rotor_settings), tuple(ring_settings), reflector.upper()
+
+
 ##############################################################################
 # User input sanitization and check
 ##############################################################################
@@ -354,6 +572,13 @@ def sanitize_input_text(input_text: str) -> str or bool:
     if len(input_text) == 0:
         return False
 
+    # ASCII only text can be checked and capitalized all at once
+    if input_text.isascii():
+        if input_text.isalpha() is False:
+            return False
+
+        return input_text.upper()
+
     sanitized_text = ""
 
     # check every character in input_text for any invalid characters
@@ -421,17 +646,8 @@ def enigma_run(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_set
                          ring_settings, reflector):
 
         # finalize formatting of Enigma settings
-        for i in range(len(plugboard_pairings)):
-            # uppercase each letter in plugboard_pairings
-            plugboard_pairings[i] = plugboard_pairings[i].upper()
-
-        # make lists as tuples
-        plugboard_pairings = tuple(plugboard_pairings)
-        initial_rotor_settings = tuple(initial_rotor_settings)
-        ring_settings = tuple(ring_settings)
-
-        # uppercase the reflector letter
-        reflector = reflector.upper()
+        plugboard_pairings, initial_rotor_settings, ring_settings, reflector = \
+            finalize_enigma_settings(plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
 
         # initialize an Enigma machine
         enigma_machine = Enigma(rotor_choices, plugboard_pairings, initial_rotor_settings,
@@ -0,0 +1,122 @@
+import os
+
+from machine_cache import *
+
+BATCH_EXECUTORS = ("serial", "thread", "process")
+BATCH_CHUNK_SIZE = 1000  # most records of one configuration sent to a worker at once
+
+
+def run_batch_group(group_records: list, machine_cache: MachineCache = None) -> list:
+    """
+    Encrypt/decrypt records that share rotor order, plugboard pairings, ring settings and reflector, so the settings
+    are checked and the rotors wired only once for the whole group.
+
+    :param group_records: list of tuple(record index, settings, message)
+    :param machine_cache: MachineCache (default_machine_cache unless given)
+    :return: list of tuple(record index, output text)
+    """
+
+    if machine_cache is None:
+        machine_cache = default_machine_cache
+
+    rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector = group_records[0][1]
+    template = machine_cache.get_template(rotor_choices, plugboard_pairings, ring_settings, reflector)
+
+    # one machine for the whole group, reset to each message's starting rotor positions
+    enigma_machine = None if template is False else template.clone()
+    results = []
+
+    for record_i, settings, message in group_records:
+        # check if the message is valid first, same order as enigma_run()
+        text = sanitize_input_text(message)
+
+        if text is False:
+            results.append((record_i, "Bad input string. Letters only."))
+            continue
+
+        # starting rotor positions are the only settings that differ within a group
+        initial_rotor_settings = list(settings[2])
+        if template is False or not check_rotor_ring_settings(initial_rotor_settings, len(template.rotors_used)):
+            results.append((record_i, "Bad Enigma settings"))
+            continue
+
+        enigma_machine.reset(initial_rotor_settings)
+        results.append((record_i, enigma_machine.encrypt_decrypt(text)))
+
+    return results
+
+
+def group_batch_records(records) -> list:
+    """
+    Group (settings, message) records by everything but their starting rotor positions, splitting large groups into
+    chunks of at most BATCH_CHUNK_SIZE records.
+
+    :return: list of groups, each a list of tuple(record index, settings, message)
+    """
+
+    groups = {}
+
+    for record_i, (settings, message) in enumerate(records):
+        rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector = settings
+        # settings that cannot be a key (ex. a list as a rotor choice) go in a group of their own
+        try:
+            key = MachineCache.get_key(rotor_choices, plugboard_pairings, ring_settings, reflector)
+            hash(key)
+        except TypeError:
+            key = ("unhashable", record_i)
+
+        groups.setdefault(key, []).append((record_i, settings, message))
+
+    return [group_records[chunk_start:chunk_start + BATCH_CHUNK_SIZE]
+            for group_records in groups.values()
+            for chunk_start in range(0, len(group_records), BATCH_CHUNK_SIZE)]
+
+
+def enigma_run_batch(records, executor: str = "serial", workers: int = None,
+                     machine_cache: MachineCache = None) -> list:
+    """
+    Run enigma_run() over many records in one call.
+
+    Records are grouped by configuration so each group reuses one wired machine, then the groups are run serially,
+    on a thread pool or on a process pool. Output is identical to calling enigma_run() on each record.
+
+    :param records: iterable of tuple(settings, message), settings being a tuple of (rotor_choices,
+                    plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+    :param executor: str, "serial", "thread" or "process"
+    :param workers: int, number of threads/processes (default: every CPU core)
+    :param machine_cache: MachineCache used by serial and thread execution (default_machine_cache unless given),
+                          each worker process uses its own default_machine_cache
+    :return: list of output text, in the same order as records
+    """
+
+    if executor not in BATCH_EXECUTORS:
+        raise ValueError("executor must be one of " + ", ".join(BATCH_EXECUTORS))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    groups = group_batch_records(records)
+    results = [None] * sum(len(group_records) for group_records in groups)
+
+    if executor == "serial":
+        group_results = [run_batch_group(group_records, machine_cache) for group_records in groups]
+
+    elif executor == "thread":
+        # imported here so serial batches do not load concurrent.futures
+        import concurrent.futures
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as thread_executor:
+            group_results = list(thread_executor.map(run_batch_group, groups, [machine_cache] * len(groups)))
+
+    else:
+        import concurrent.futures
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as process_executor:
+            group_results = list(process_executor.map(run_batch_group, groups))
+
+    # put every output back in the same order as records
+    for group_result in group_results:
+        for record_i, output_text in group_result:
+            results[record_i] = output_text
+
+    return results
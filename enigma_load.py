@@ -0,0 +1,201 @@
+"""
+Load generator for enigma_server.py: opens several connections, keeps a window of requests in flight on each and
+reports requests per second with client-side p50/p99 latency.
+
+    python enigma_load.py --port 8765 --connections 8 --requests 20000 --message-size 100
+    python enigma_load.py --spawn --workers 4 --requests 20000
+
+With --spawn, a server is started on a free port for the run and its own statistics are printed as well.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+from enigma_server import *
+
+DEFAULT_CONNECTIONS = 8
+DEFAULT_REQUESTS = 10000
+DEFAULT_WINDOW = 32  # requests in flight per connection
+DEFAULT_MESSAGE_SIZE = 100  # letters
+DEFAULT_CONFIGS = 4  # different daily keys used across the requests
+LOAD_ROTOR_CHOICES = (1, 2, 3, 4, 5)
+
+
+def build_requests(num_requests: int, message_size: int, num_configs: int, seed: int = 0) -> list:
+    """ Output num_requests requests, spread over num_configs daily keys, each with its own starting positions. """
+
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+    configs = []
+    for _ in range(num_configs):
+        shuffled = rng.sample(letters, 20)
+        configs.append({"rotors": rng.sample(LOAD_ROTOR_CHOICES, 3),
+                        "plugboard": [shuffled[i] + shuffled[i + 1] for i in range(0, 20, 2)],
+                        "ring": "".join(rng.choice(letters) for _ in range(3)),
+                        "reflector": rng.choice("BC")})
+
+    requests = []
+    for request_i in range(num_requests):
+        request = dict(configs[request_i % num_configs])
+        request["id"] = request_i
+        request["start"] = "".join(rng.choice(letters) for _ in range(3))
+        request["message"] = "".join(rng.choice(letters) for _ in range(message_size))
+        requests.append(request)
+
+    return requests
+
+
+async def run_connection(host: str, port: int, requests: list, window: int, latency: LatencyHistogram) -> int:
+    """
+    Send requests over one connection, at most window of them waiting for a response at a time.
+
+    :return: int, number of error responses
+    """
+
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_REQUEST_BYTES)
+    in_flight = asyncio.Semaphore(window)
+    sent_times = {}
+    num_errors = 0
+
+    async def send_requests():
+        for request in requests:
+            await in_flight.acquire()
+            sent_times[request["id"]] = time.perf_counter()
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    sender = asyncio.create_task(send_requests())
+
+    for _ in range(len(requests)):
+        response = json.loads(await reader.readline())
+        latency.record(time.perf_counter() - sent_times.pop(response["id"]))
+        num_errors += "error" in response
+        in_flight.release()
+
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+    return num_errors
+
+
+async def get_server_stats(host: str, port: int) -> dict:
+    """ Ask the server for its statistics. """
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"op": "stats"}\n')
+    response = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+
+    return response["stats"]
+
+
+async def run_load(host: str, port: int, requests: list, connections: int, window: int) -> dict:
+    """
+    Spread requests over connections and run them all.
+
+    :return: dict with the number of requests and errors, seconds taken, requests per second and latency stats
+    """
+
+    latency = LatencyHistogram()
+    start_time = time.perf_counter()
+
+    error_counts = await asyncio.gather(*(run_connection(host, port, requests[connection_i::connections], window,
+                                                         latency) for connection_i in range(connections)))
+
+    seconds = time.perf_counter() - start_time
+
+    return {
+        "requests": len(requests),
+        "errors": sum(error_counts),
+        "seconds": seconds,
+        "requests_per_sec": len(requests) / seconds if seconds > 0 else float("inf"),
+        "latency": latency.get_stats()
+    }
+
+
+def spawn_server(workers: int = None, max_pending: int = DEFAULT_MAX_PENDING) -> tuple:
+    """
+    Start enigma_server.py on a free port.
+
+    :return: tuple(subprocess.Popen, port)
+    """
+
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "enigma_server.py"),
+               "--port", "0", "--max-pending", str(max_pending)]
+    if workers:
+        command += ["--workers", str(workers)]
+
+    server_process = subprocess.Popen(command, stderr=subprocess.PIPE, text=True)
+
+    # the server prints "Listening on host:port" once it accepts connections
+    listening_line = server_process.stderr.readline()
+    if not listening_line.startswith("Listening on"):
+        server_process.kill()
+        raise RuntimeError("Server did not start: " + listening_line + server_process.stderr.read())
+
+    return server_process, int(listening_line.rsplit(":", 1)[1])
+
+
+def format_load_stats(stats: dict) -> str:
+    """ Output a one line summary of a load run. """
+
+    return "%d requests (%d errors) in %.3f s: %.0f requests/sec, p50 %.3f ms, p99 %.3f ms, max %.3f ms" % (
+        stats["requests"], stats["errors"], stats["seconds"], stats["requests_per_sec"],
+        stats["latency"]["p50_ms"], stats["latency"]["p99_ms"], stats["latency"]["max_ms"])
+
+
+def main(argv: list = None) -> int:
+    """ Run a load test from the command line. """
+
+    parser = argparse.ArgumentParser(description="Load test enigma_server.py.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument("--spawn", action="store_true", help="start a server on a free port for the run")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes of the spawned server")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="queued requests of the spawned server")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="connections opened")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="requests sent in total")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="requests in flight per connection")
+    parser.add_argument("--message-size", type=int, default=DEFAULT_MESSAGE_SIZE, help="letters per message")
+    parser.add_argument("--configs", type=int, default=DEFAULT_CONFIGS, help="different daily keys used")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args(argv)
+
+    requests = build_requests(args.requests, args.message_size, args.configs)
+
+    server_process = None
+    host, port = args.host, args.port
+    if args.spawn:
+        server_process, port = spawn_server(args.workers, args.max_pending)
+        host = DEFAULT_HOST
+
+    try:
+        stats = asyncio.run(run_load(host, port, requests, args.connections, args.window))
+        stats["server"] = asyncio.run(get_server_stats(host, port))
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.communicate()
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(format_load_stats(stats))
+        print("server: p50 %.3f ms, p99 %.3f ms, max queued %d of %d" % (
+            stats["server"]["latency"]["p50_ms"], stats["server"]["latency"]["p99_ms"],
+            stats["server"]["max_queued"], stats["server"]["max_pending"]))
+
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Startup optimized entry point for short messages, for scripts and cron jobs that start the machine many times a day.
+
+Only enigma.py and the small modules it imports are loaded (no argparse, json, NumPy or multiprocessing), and the
+wiring catalog is compiled once at import. Long messages switch to CompiledEnigma, which is imported on first use.
+
+    echo "HELLO WORLD" | python enigma_quick.py 2,4,5 BLA BUL B AV,BS,CG
+    python enigma_quick.py BETA,2,4,5 ABLA ABUL B-THIN - "HELLO WORLD"
+
+Arguments: rotor order, starting rotor positions, ring settings, reflector, plugboard pairings ('-' for none) and the
+message (default: stdin). Starting positions and ring settings are letters (BLA) or comma separated numbers (2,12,1).
+"""
+
+import sys
+
+from enigma import *
+
+QUICK_COMPILE_THRESHOLD = 400  # letters, from here on building a CompiledEnigma pays for itself
+USAGE = "usage: python enigma_quick.py ROTORS START RING REFLECTOR [PLUGBOARD] [MESSAGE]"
+
+
+def parse_rotor_ring_arg(value: str) -> list:
+    """ Split a starting position/ring setting argument into one setting per rotor. """
+
+    if "," in value:
+        return [int(setting) if setting.isdigit() else setting for setting in value.split(",")]
+
+    return list(value)
+
+
+def parse_quick_args(argv: list) -> tuple or bool:
+    """
+    Output the enigma_run() arguments given on a command line.
+
+    :return: tuple(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector, input_str)
+             where input_str is None if the message is read from stdin, or False if the number of arguments is wrong
+    """
+
+    if not 4 <= len(argv) <= 6:
+        return False
+
+    rotor_choices = tuple(int(rotor) if rotor.isdigit() else rotor for rotor in argv[0].split(","))
+    plugboard_pairings = [] if len(argv) < 5 or argv[4] == "-" else argv[4].split(",")
+    input_str = argv[5] if len(argv) == 6 else None
+
+    return (rotor_choices, plugboard_pairings, parse_rotor_ring_arg(argv[1]), parse_rotor_ring_arg(argv[2]), argv[3],
+            input_str)
+
+
+def quick_run(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list, ring_settings: list,
+              reflector: str, input_str: str = None) -> str:
+    """
+    Same as enigma_run(), messages of QUICK_COMPILE_THRESHOLD letters or more go through a CompiledEnigma.
+
+    Output (including the bad input/settings messages) is identical to enigma_run().
+    """
+
+    if input_str is None or len(input_str) < QUICK_COMPILE_THRESHOLD:
+        return enigma_run(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector,
+                          input_str)
+
+    # imported here so short messages never load it
+    from compiled_enigma import enigma_run_compiled
+
+    return enigma_run_compiled(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector,
+                               input_str)
+
+
+def main(argv: list = None) -> int:
+    """ Encrypt/decrypt the message given on the command line (or stdin) and print it. """
+
+    quick_args = parse_quick_args(sys.argv[1:] if argv is None else argv)
+    if quick_args is False:
+        print(USAGE, file=sys.stderr)
+        return 2
+
+    # no message argument, read it from stdin
+    if quick_args[5] is None:
+        quick_args = quick_args[:5] + (sys.stdin.read(),)
+
+    output_text = quick_run(*quick_args)
+
+    if output_text in ("Bad Enigma settings", "Bad input string. Letters only."):
+        print(output_text, file=sys.stderr)
+        return 1
+
+    print(output_text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
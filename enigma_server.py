@@ -0,0 +1,372 @@
+"""
+Network service front-end: an asyncio server taking newline-delimited JSON requests over TCP.
+
+Each request is one JSON object per line, with the settings of enigma_run() and the message, and gets one JSON
+object per line back with the same "id" (responses on a connection may come back out of order):
+
+    {"id": 1, "rotors": [2, 4, 5], "plugboard": "AV BS CG", "start": "BLA", "ring": "BUL", "reflector": "B",
+     "message": "HELLO WORLD"}
+    {"id": 1, "output": "..."}  or  {"id": 1, "error": "Bad Enigma settings"}
+
+Settings take the same forms as a cli.py key file. {"op": "stats"} returns request counts and p50/p99 latency.
+
+Requests wait in a bounded queue and are ciphered in batches on a process pool, every worker process keeping its own
+MachineCache so requests with the same daily key reuse one wired machine. When the queue is full, the server stops
+reading from the connections sending requests until the workers catch up (backpressure), instead of buffering
+without limit.
+
+    python enigma_server.py --port 8765 --workers 4 --max-pending 1024
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+import time
+
+from cli import split_setting
+from enigma_batch import *
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_PENDING = 1024  # requests waiting for a worker before the server stops reading new ones
+SERVER_BATCH_SIZE = 64  # most requests sent to a worker at once
+SERVER_EXECUTORS = ("process", "thread")
+MAX_REQUEST_BYTES = 1 << 24  # longest request line
+REQUEST_SETTING_NAMES = ("rotors", "plugboard", "start", "ring", "reflector")
+ERROR_OUTPUTS = ("Bad input string. Letters only.", "Bad Enigma settings")
+
+LATENCY_BUCKETS_PER_DOUBLING = 8  # percentiles are accurate to within 9%
+
+
+class LatencyHistogram:
+    """
+    Defines a histogram of latencies with log-spaced buckets (8 per doubling, from 1 microsecond), so recording a
+    latency is O(1) and memory does not grow with the number of requests.
+    """
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        """ Set up an empty histogram. """
+
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """ Add one latency, in seconds. """
+
+        bucket_i = math.ceil(math.log2(max(seconds * 1e6, 1.0)) * LATENCY_BUCKETS_PER_DOUBLING)
+        self.buckets[bucket_i] = self.buckets.get(bucket_i, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """ Output the latency (upper bound of its bucket, in seconds) below which fraction of the latencies are. """
+
+        if not self.count:
+            return 0.0
+
+        rank = max(math.ceil(fraction * self.count), 1)
+        seen = 0
+
+        for bucket_i in sorted(self.buckets):
+            seen += self.buckets[bucket_i]
+            if seen >= rank:
+                return min(2 ** (bucket_i / LATENCY_BUCKETS_PER_DOUBLING) / 1e6, self.max)
+
+        return self.max
+
+    def get_stats(self) -> dict:
+        """ Output the count, mean, p50, p99 and max latency, in milliseconds. """
+
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1e3,
+            "p99_ms": self.percentile(0.99) * 1e3,
+            "max_ms": self.max * 1e3
+        }
+
+
+def parse_request(request: dict) -> tuple:
+    """
+    Output the enigma_run() settings and message of a request.
+
+    Raises ValueError if a setting or the message is missing, or the message is not a str.
+
+    :return: tuple(settings, message), settings being a tuple of (rotor_choices, plugboard_pairings,
+             initial_rotor_settings, ring_settings, reflector)
+    """
+
+    missing_names = [name for name in REQUEST_SETTING_NAMES + ("message",) if name not in request and
+                     name != "plugboard"]
+    if missing_names:
+        raise ValueError("Missing request fields: " + ", ".join(missing_names))
+
+    if not isinstance(request["message"], str):
+        raise ValueError("message must be a string")
+
+    settings = (tuple(split_setting(request["rotors"])),
+                tuple(split_setting(request.get("plugboard", []))),
+                tuple(split_setting(request["start"], split_letters=True)),
+                tuple(split_setting(request["ring"], split_letters=True)),
+                str(request["reflector"]).strip())
+
+    return settings, request["message"]
+
+
+class EnigmaServer:
+    """
+    Defines the server: connections put requests in a bounded queue, and one dispatcher per worker takes batches from
+    the queue, runs them on the worker pool with enigma_run_batch() and sends each output back to its connection.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = DEFAULT_MAX_PENDING,
+                 batch_size: int = SERVER_BATCH_SIZE, executor: str = "process"):
+        """ Set up the server, the worker pool is started by start(). """
+
+        if executor not in SERVER_EXECUTORS:
+            raise ValueError("executor must be one of " + ", ".join(SERVER_EXECUTORS))
+
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.executor_type = executor
+
+        self.queue = None
+        self.executor = None
+        self.dispatchers = []
+        self.server = None
+
+        self.latency = LatencyHistogram()
+        self.num_requests = 0
+        self.num_errors = 0
+        self.num_connections = 0
+        self.max_queued = 0
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> tuple:
+        """
+        Start the worker pool, the dispatchers and listening for connections.
+
+        :return: tuple(host, port) the server is listening on (port 0 picks a free port)
+        """
+
+        # imported here, only the server needs an executor
+        import concurrent.futures
+
+        if self.executor_type == "process":
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+
+        self.queue = asyncio.Queue(maxsize=self.max_pending)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_REQUEST_BYTES)
+
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """ Stop listening, cancel the dispatchers and shut down the worker pool. """
+
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def dispatch(self):
+        """ Take batches of requests from the queue and run them on the worker pool, forever. """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            try:
+                outputs = await loop.run_in_executor(self.executor, enigma_run_batch,
+                                                     [(settings, message) for settings, message, future in batch])
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                outputs = ["Server error: %s" % error] * len(batch)
+
+            for (settings, message, future), output_text in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output_text)
+
+    def record_response(self, response: dict, received_time: float):
+        """ Count a response and record its latency, from the moment its request line was read. """
+
+        self.num_requests += 1
+        self.num_errors += "error" in response
+        self.latency.record(time.perf_counter() - received_time)
+
+    async def finish_request(self, response: dict, future: asyncio.Future, received_time: float) -> dict:
+        """ Wait for a queued request's output text and put it in its response. """
+
+        output_text = await future
+        if output_text in ERROR_OUTPUTS or output_text.startswith("Server error"):
+            response["error"] = output_text
+        else:
+            response["output"] = output_text
+
+        self.record_response(response, received_time)
+
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Read requests from a connection until it closes, several of them running at once.
+
+        The next line is only read once the current request is queued and the client has read enough of its
+        responses, so a full queue or a client not reading pushes back on the client through TCP.
+        """
+
+        loop = asyncio.get_running_loop()
+        self.num_connections += 1
+        pending = set()
+
+        def write_response(response: dict):
+            if not writer.is_closing():
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+
+        def send_finished(task: asyncio.Task):
+            pending.discard(task)
+            if not task.cancelled():
+                write_response(task.result())
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    write_response({"id": None, "error": "Bad request: longer than %d bytes" % MAX_REQUEST_BYTES})
+                    break
+
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                received_time = time.perf_counter()
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as error:
+                    response = {"id": None, "error": "Bad request: %s" % error}
+                    self.record_response(response, received_time)
+                    write_response(response)
+                    continue
+
+                response = {"id": request.get("id")}
+
+                if request.get("op") == "stats":
+                    response["stats"] = self.get_stats()
+                    write_response(response)
+                    continue
+
+                try:
+                    settings, message = parse_request(request)
+                except ValueError as error:
+                    response["error"] = "Bad request: %s" % error
+                    self.record_response(response, received_time)
+                    write_response(response)
+                    continue
+
+                # waits while the queue is full, so no more lines are read from this connection meanwhile
+                future = loop.create_future()
+                await self.queue.put((settings, message, future))
+                self.max_queued = max(self.max_queued, self.queue.qsize())
+
+                task = asyncio.create_task(self.finish_request(response, future, received_time))
+                pending.add(task)
+                task.add_done_callback(send_finished)
+
+                await writer.drain()
+
+            # answer every request already read before closing
+            if pending:
+                await asyncio.wait(set(pending))
+            await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+    def get_stats(self) -> dict:
+        """ Output request, error and connection counts, queue use and request latency. """
+
+        return {
+            "requests": self.num_requests,
+            "errors": self.num_errors,
+            "connections": self.num_connections,
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "max_queued": self.max_queued,
+            "max_pending": self.max_pending,
+            "workers": self.workers,
+            "latency": self.latency.get_stats()
+        }
+
+
+async def serve(host: str, port: int, workers: int, max_pending: int, batch_size: int, executor: str):
+    """ Run a server until it is terminated or cancelled (ex. Ctrl+C). """
+
+    enigma_server = EnigmaServer(workers, max_pending, batch_size, executor)
+    host, port = await enigma_server.start(host, port)
+    print("Listening on %s:%d" % (host, port), file=sys.stderr, flush=True)
+
+    # shut the worker pool down cleanly on SIGTERM too
+    stop_event = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop_event.set)
+
+    try:
+        await stop_event.wait()
+    finally:
+        await enigma_server.close()
+        print(json.dumps(enigma_server.get_stats()), file=sys.stderr)
+
+
+def main(argv: list = None) -> int:
+    """ Run the server from the command line. """
+
+    parser = argparse.ArgumentParser(description="Serve Enigma encryption/decryption as newline-delimited JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (0 picks a free port)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every CPU core)")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="queued requests before the server stops reading")
+    parser.add_argument("--batch-size", type=int, default=SERVER_BATCH_SIZE, help="most requests sent to a worker")
+    parser.add_argument("--executor", choices=SERVER_EXECUTORS, default="process", help="worker pool type")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending, args.batch_size, args.executor))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Streaming encryption/decryption for files and pipes of any size.
+
+Command line use is the same as cli.py (reads stdin, writes stdout):
+    python enigma_stream.py --rotors 2 4 5 --plugboard AV BS CG --start B L A --ring B U L --reflector B < in > out
+"""
+
+import sys
+
+from compiled_enigma import *
+from text_sanitizer import *
+
+STREAM_BLOCK_SIZE = 1 << 16  # bytes read per block
+
+
+def encrypt_decrypt_block(compiled_machine: CompiledEnigma, input_block: bytes, policy: str = "reject") -> bytes:
+    """
+    Sanitize one block of bytes with a sanitizing policy (see text_sanitizer.py) and perform encryption/decryption
+    on its letters. With the "preserve" policy the non-letters are put back around the output letters.
+    """
+
+    output_letters = compiled_machine.encrypt_decrypt_bytes(sanitize_input_bytes(input_block, policy))
+
+    if policy == "preserve":
+        return restore_layout(input_block, output_letters)
+
+    return output_letters
+
+
+def stream_encrypt_decrypt(compiled_machine: CompiledEnigma, input_blocks, policy: str = "reject"):
+    """
+    Generator performing encryption/decryption on an iterable of bytes blocks.
+
+    Rotor positions are kept from one block to the next, so the output blocks joined together are the same as
+    encrypting the whole input at once. With the "reject" policy, ValueError is raised at the first block holding
+    a character other than a letter or whitespace, since earlier blocks may already have been output.
+    """
+
+    for input_block in input_blocks:
+        output_block = encrypt_decrypt_block(compiled_machine, input_block, policy)
+
+        if output_block:
+            yield output_block
+
+
+def read_blocks(input_file, block_size: int = STREAM_BLOCK_SIZE):
+    """ Generator reading fixed size blocks from a binary file until the end of the file. """
+
+    while True:
+        input_block = input_file.read(block_size)
+        if not input_block:
+            return
+        yield input_block
+
+
+def encrypt_decrypt_file(compiled_machine: CompiledEnigma, input_file, output_file,
+                         block_size: int = STREAM_BLOCK_SIZE, policy: str = "reject") -> int:
+    """
+    Perform encryption/decryption from one binary file to another, one block at a time.
+
+    With the "reject" policy, blocks before the one raising ValueError have already been written to output_file.
+    cli.py holds stdout back and removes partial output files instead.
+
+    :return: int, number of bytes written
+    """
+
+    num_bytes = 0
+
+    for output_block in stream_encrypt_decrypt(compiled_machine, read_blocks(input_file, block_size), policy):
+        output_file.write(output_block)
+        num_bytes += len(output_block)
+
+    return num_bytes
+
+
+class EnigmaReader:
+    """
+    Defines a read-only binary file object wrapping another binary file object. Reading from it returns the
+    encrypted/decrypted letters of the wrapped file.
+    """
+
+    def __init__(self, compiled_machine: CompiledEnigma, input_file, block_size: int = STREAM_BLOCK_SIZE,
+                 policy: str = "reject"):
+        """ Set up the output stream of the wrapped file. """
+
+        self.output_blocks = stream_encrypt_decrypt(compiled_machine, read_blocks(input_file, block_size), policy)
+
+        # letters before buffer_i were already read, they are only dropped when the next block comes in so small
+        # reads do not copy the rest of the buffer every time
+        self.buffer = bytearray()
+        self.buffer_i = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """ Read up to size encrypted/decrypted letters (all remaining letters if size is negative). """
+
+        while size < 0 or len(self.buffer) - self.buffer_i < size:
+            output_block = next(self.output_blocks, None)
+            if output_block is None:
+                break
+
+            del self.buffer[:self.buffer_i]
+            self.buffer_i = 0
+            self.buffer += output_block
+
+        if size < 0:
+            size = len(self.buffer) - self.buffer_i
+
+        output_bytes = bytes(self.buffer[self.buffer_i:self.buffer_i + size])
+        self.buffer_i += len(output_bytes)
+
+        return output_bytes
+
+    def __iter__(self):
+        """ Iterate over the encrypted/decrypted letters block by block. """
+
+        if len(self.buffer) > self.buffer_i:
+            yield bytes(self.buffer[self.buffer_i:])
+        self.buffer = bytearray()
+        self.buffer_i = 0
+
+        yield from self.output_blocks
+
+
+def build_compiled_machine(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                           ring_settings: list, reflector: str) -> CompiledEnigma or bool:
+    """
+    Check Enigma settings and set up a CompiledEnigma with them.
+
+    :return: CompiledEnigma or bool (False if the settings are bad)
+    """
+
+    if not sanitize_enigma_settings(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings,
+                                    reflector):
+        return False
+
+    plugboard_pairings, initial_rotor_settings, ring_settings, reflector = \
+        finalize_enigma_settings(plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+
+    return CompiledEnigma(Enigma(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector))
+
+
+def main(argv: list = None) -> int:
+    """ Same as cli.py's main(), the one command line entry point. """
+
+    # imported here, cli.py imports this module
+    from cli import main as cli_main
+
+    return cli_main(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
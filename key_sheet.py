@@ -0,0 +1,218 @@
+"""
+Daily key sheets: the rotor order, ring settings, plugboard pairings and reflector of every date (and net), so each
+message only needs its date, net and starting rotor positions.
+
+A key sheet is a CSV file of date, net, rotors, rings, plugboard and reflector columns. Blank lines and lines starting
+with '#' are skipped, rotors may be numbers or Roman numerals and rings letters or numbers:
+
+    # date,net,rotors,rings,plugboard,reflector
+    1941-07-07,ARMY,II IV V,B U L,AV BS CG DL FU HZ IN KM OW RX,B
+    1941-07-07,NAVY,BETA II IV I,A A A V,AT BL DF GJ HM NW OP QY RZ VX,B-THIN
+
+Every entry is checked and wired into a template machine when the sheet is loaded, so looking up a key is a single
+dict lookup and a cheap copy of the template.
+"""
+
+import csv
+import os
+
+from machine_cache import *
+
+KEY_SHEET_COLUMNS = ("date", "net", "rotors", "rings", "plugboard", "reflector")
+ROMAN_NUMERALS = {"I": 1, "II": 2, "III": 3, "IV": 4, "V": 5, "VI": 6, "VII": 7, "VIII": 8}
+
+
+class KeySheetEntry:
+    """ Defines the settings of one date and net, with a template Enigma machine already wired for them. """
+
+    __slots__ = ("date", "net", "rotor_choices", "ring_settings", "plugboard_pairings", "reflector", "template")
+
+    def __init__(self, date: str, net: str, rotor_choices: tuple, ring_settings: tuple, plugboard_pairings: tuple,
+                 reflector: str, template: Enigma):
+        """ Keep the entry's settings and template. """
+
+        self.date = date
+        self.net = net
+        self.rotor_choices = rotor_choices
+        self.ring_settings = ring_settings
+        self.plugboard_pairings = plugboard_pairings
+        self.reflector = reflector
+        self.template = template
+
+    def get_settings(self) -> tuple:
+        """ Output the settings that make an entry different from another: rotors, rings, plugboard, reflector. """
+        return self.rotor_choices, self.ring_settings, self.plugboard_pairings, self.reflector
+
+
+def parse_rotor_choices(rotors_field: str) -> tuple:
+    """ Split a rotors column ("II IV V", "2 4 5" or "BETA 2 4 5") into rotor choices. """
+
+    rotor_choices = []
+
+    for rotor in rotors_field.replace(",", " ").split():
+        if rotor.isdigit():
+            rotor_choices.append(int(rotor))
+        else:
+            rotor_choices.append(ROMAN_NUMERALS.get(rotor.upper(), rotor.upper()))
+
+    return tuple(rotor_choices)
+
+
+def parse_ring_settings(rings_field: str) -> tuple:
+    """ Split a rings column ("B U L", "BUL" or "2 21 12") into ring settings. """
+
+    ring_settings = rings_field.replace(",", " ").split()
+
+    # a single word of letters has one ring setting per letter
+    if len(ring_settings) == 1 and ring_settings[0].isalpha():
+        ring_settings = list(ring_settings[0])
+
+    return tuple(int(ring) if ring.isdigit() else ring.upper() for ring in ring_settings)
+
+
+def parse_key_sheet_row(row: list) -> tuple:
+    """
+    Output the (date, net) key and settings of a key sheet row.
+
+    Raises ValueError if the row does not have every column.
+
+    :return: tuple((date, net), (rotor_choices, ring_settings, plugboard_pairings, reflector))
+    """
+
+    if len(row) != len(KEY_SHEET_COLUMNS):
+        raise ValueError("expected %d columns (%s), found %d" % (len(KEY_SHEET_COLUMNS), ",".join(KEY_SHEET_COLUMNS),
+                                                                len(row)))
+
+    date, net, rotors_field, rings_field, plugboard_field, reflector = (field.strip() for field in row)
+
+    return ((date, net.upper()),
+            (parse_rotor_choices(rotors_field), parse_ring_settings(rings_field),
+             tuple(pairing.upper() for pairing in plugboard_field.replace(",", " ").split()), reflector.upper()))
+
+
+class KeySheet:
+    """
+    Defines an in-memory index of a key sheet file, keyed by (date, net).
+
+    reload() only rebuilds the templates of entries whose settings changed, and swaps the whole index in at once, so
+    lookups running at the same time see either the old or the new sheet.
+    """
+
+    def __init__(self, file_path: str = None):
+        """ Set up an empty index, then load file_path if given. """
+
+        self.file_path = file_path
+        self.file_signature = None
+        self.entries = {}
+
+        if file_path is not None:
+            self.reload()
+
+    def __len__(self) -> int:
+        """ Number of entries. """
+        return len(self.entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        """ Check if a (date, net) key is in the sheet. """
+        return (key[0], key[1].upper()) in self.entries
+
+    def read_rows(self) -> list:
+        """ Output the (line number, row) of every key sheet line that is not blank or a comment. """
+
+        with open(self.file_path, newline="", encoding="utf-8") as key_sheet_file:
+            return [(line_i, row) for line_i, row in enumerate(csv.reader(key_sheet_file), 1)
+                    if row and "".join(row).strip() and not row[0].lstrip().startswith("#")]
+
+    def reload(self, force: bool = False) -> dict:
+        """
+        Read the key sheet file again if it changed since the last load (or force is True).
+
+        Entries whose settings did not change keep their template, only new or changed entries are checked and wired.
+        Raises ValueError naming the line of the first bad entry, in which case the current index is kept.
+
+        :return: dict counting the added, changed, removed and unchanged entries
+        """
+
+        file_stat = os.stat(self.file_path)
+        file_signature = (file_stat.st_mtime_ns, file_stat.st_size)
+        if not force and file_signature == self.file_signature:
+            return {"added": 0, "changed": 0, "removed": 0, "unchanged": len(self.entries)}
+
+        old_entries = self.entries
+        new_entries = {}
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+
+        for line_i, row in self.read_rows():
+            try:
+                key, settings = parse_key_sheet_row(row)
+            except ValueError as error:
+                raise ValueError("%s line %d: %s" % (self.file_path, line_i, error))
+
+            if key in new_entries:
+                raise ValueError("%s line %d: date %s net %s is already in the key sheet" % (self.file_path, line_i,
+                                                                                            key[0], key[1]))
+
+            old_entry = old_entries.get(key)
+            if old_entry is not None and old_entry.get_settings() == settings:
+                new_entries[key] = old_entry
+                stats["unchanged"] += 1
+                continue
+
+            rotor_choices, ring_settings, plugboard_pairings, reflector = settings
+            template = MachineCache.build_template(rotor_choices, plugboard_pairings, ring_settings, reflector)
+            if template is False:
+                raise ValueError("%s line %d: Bad Enigma settings" % (self.file_path, line_i))
+
+            new_entries[key] = KeySheetEntry(key[0], key[1], rotor_choices, ring_settings, plugboard_pairings,
+                                             reflector, template)
+            stats["changed" if old_entry is not None else "added"] += 1
+
+        stats["removed"] = len(set(old_entries) - set(new_entries))
+
+        self.entries = new_entries
+        self.file_signature = file_signature
+
+        return stats
+
+    def get_entry(self, date: str, net: str = "") -> KeySheetEntry or None:
+        """ Output the entry of a date and net, None if it is not in the sheet. """
+        return self.entries.get((date, net.upper()))
+
+    def get_machine(self, date: str, net: str, initial_rotor_settings: list) -> Enigma or bool:
+        """
+        Output an Enigma machine set up with the key of a date and net and the message's starting rotor positions.
+
+        Raises KeyError if the date and net are not in the sheet.
+
+        :return: Enigma or bool (False if the starting rotor positions are bad)
+        """
+
+        entry = self.entries.get((date, net.upper()))
+        if entry is None:
+            raise KeyError("No key sheet entry for date %s net %s" % (date, net))
+
+        initial_rotor_settings = list(initial_rotor_settings)
+        if not check_rotor_ring_settings(initial_rotor_settings, len(entry.rotor_choices)):
+            return False
+
+        return machine_from_template(entry.template, tuple(setting.upper() for setting in initial_rotor_settings))
+
+    def run(self, date: str, net: str, initial_rotor_settings: list, input_str: str = None) -> str:
+        """
+        Same as enigma_run(), with every setting but the starting rotor positions taken from the key sheet.
+
+        Raises KeyError if the date and net are not in the sheet.
+        """
+
+        # check if input_str is valid, if it is invalid, return a message saying input is bad
+        text = sanitize_input_text(input_str)
+
+        if text is False:
+            return "Bad input string. Letters only."
+
+        enigma_machine = self.get_machine(date, net, initial_rotor_settings)
+
+        if enigma_machine is False:
+            return "Bad Enigma settings"
+
+        return enigma_machine.encrypt_decrypt(text)
@@ -0,0 +1,304 @@
+"""
+Known-answer corpus: thousands of (settings, plaintext, ciphertext) vectors produced by the reference path
+(enigma_run(), so Enigma.encrypt_decrypt()), stored in known_answers.jsonl, one JSON object per line. Every engine
+must reproduce them exactly, bad input/settings messages included.
+
+Besides random settings, the corpus covers every reflector, every ring setting of every rotor slot, starting
+positions on both sides of every turnover point, the middle rotor stepping of Enigma.advance_rotors() (every middle
+rotor starting at, before and after its turnover points), messages long enough to step the left rotor, 0 to 13
+plugboard pairings, the M4, bad settings and input, letters outside A-Z (ex. 'Ä', which sanitize_input_text()
+accepts), and unusual settings: lowercase letters, letters outside A-Z in the plugboard, starting positions and ring
+settings, and rotor choices that only compare equal to valid ones (1.0, True), each right after the same settings
+written the usual way so engines that cache machines are caught looking them up.
+
+    python known_answers.py check --engine all
+    python known_answers.py generate   # only when the reference path is meant to change
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+from enigma import *
+
+KNOWN_ANSWERS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "known_answers.jsonl")
+KNOWN_ANSWERS_SEED = 1940
+NUM_RANDOM_VECTORS = 1500
+ALPHABET_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+NON_ASCII_LETTERS = "ÄÖÜäöüßÉÈÑçåΩΣλЖя"  # letters str.isalpha() accepts, so sanitize_input_text() does too
+
+
+##############################################################################
+# Random settings
+##############################################################################
+def random_plugboard(rng: random.Random, num_pairs: int = None) -> list:
+    """ Output num_pairs (random from 0 to 13 if None) random plugboard pairings. """
+
+    if num_pairs is None:
+        num_pairs = rng.randrange(14)
+
+    letters = rng.sample(ALPHABET_LETTERS, 2 * num_pairs)
+
+    return [letters[i] + letters[i + 1] for i in range(0, 2 * num_pairs, 2)]
+
+
+def random_letters(rng: random.Random, num_letters: int) -> str:
+    """ Output num_letters random uppercase letters. """
+    return "".join(rng.choice(ALPHABET_LETTERS) for _ in range(num_letters))
+
+
+def random_mixed_letters(rng: random.Random, num_letters: int) -> str:
+    """ Output num_letters random letters, about one in four of them outside A-Z. """
+    return "".join(rng.choice(NON_ASCII_LETTERS) if rng.random() < 0.25 else rng.choice(ALPHABET_LETTERS)
+                   for _ in range(num_letters))
+
+
+def random_vector_settings(rng: random.Random, four_rotors: bool = None) -> dict:
+    """
+    Output random valid settings, as the fields of a vector. The M4 (a fourth rotor and thin reflector) is used
+    one time in five unless four_rotors is given.
+    """
+
+    if four_rotors is None:
+        four_rotors = rng.random() < 0.2
+
+    rotors = rng.sample(sorted(BUILTIN_ROTORS), 3)
+    reflector = rng.choice(sorted(BUILTIN_REFLECTORS))
+
+    if four_rotors:
+        rotors = [rng.choice(sorted(BUILTIN_FOURTH_ROTORS))] + rotors
+        reflector = rng.choice(sorted(BUILTIN_THIN_REFLECTORS))
+
+    return {
+        "rotors": rotors,
+        "plugboard": random_plugboard(rng),
+        "start": random_letters(rng, len(rotors)),
+        "ring": random_letters(rng, len(rotors)),
+        "reflector": reflector
+    }
+
+
+def unusual_vector_settings(rng: random.Random, settings: dict) -> list:
+    """
+    Output settings written the usual way, then the same settings written in unusual ways: lowercase letters, letters
+    outside A-Z in the plugboard, starting positions and ring settings, and rotor choices that only compare equal to
+    valid ones.
+    """
+
+    def replace_letter(value: str, letter: str) -> str:
+        letter_i = rng.randrange(len(value))
+        return value[:letter_i] + letter + value[letter_i + 1:]
+
+    # at most 12 pairings, so a letter is left to pair with a letter outside A-Z
+    plugboard = settings["plugboard"][:12]
+    non_ascii_letter = rng.choice(NON_ASCII_LETTERS)
+    pairing_letter = rng.choice([letter for letter in ALPHABET_LETTERS if letter not in "".join(plugboard)])
+
+    return [settings,
+            dict(settings, plugboard=[pairing.lower() for pairing in settings["plugboard"]]),
+            dict(settings, start=settings["start"].lower(), ring=settings["ring"].lower()),
+            dict(settings, reflector=settings["reflector"].lower()),
+            dict(settings, plugboard=plugboard + [non_ascii_letter + pairing_letter]),
+            dict(settings, start=replace_letter(settings["start"], non_ascii_letter)),
+            dict(settings, ring=replace_letter(settings["ring"], non_ascii_letter)),
+            dict(settings, rotors=[float(rotor) if isinstance(rotor, int) else rotor for rotor in settings["rotors"]]),
+            dict(settings, rotors=[True if rotor == 1 else rotor for rotor in settings["rotors"]])]
+
+
+def shift_letter(letter: str, shift: int) -> str:
+    """ Output the letter shift places after letter, wrapping around from Z to A. """
+    return chr((ord(letter) - 65 + shift) % 26 + 65)
+
+
+##############################################################################
+# Vectors
+##############################################################################
+def get_vector_settings(vector: dict) -> tuple:
+    """ Output the enigma_run() settings of a vector: (rotor_choices, plugboard, start, ring, reflector). """
+
+    return (tuple(vector["rotors"]), list(vector["plugboard"]), list(vector["start"]), list(vector["ring"]),
+            vector["reflector"])
+
+
+def make_vector(case: str, settings: dict, plaintext: str) -> dict:
+    """ Output a vector of settings and plaintext, with the reference path's ciphertext. """
+
+    vector = dict(settings, case=case, plaintext=plaintext)
+    vector["ciphertext"] = enigma_run(*get_vector_settings(vector), plaintext)
+
+    return vector
+
+
+def generate_vectors(seed: int = KNOWN_ANSWERS_SEED, num_random: int = NUM_RANDOM_VECTORS) -> list:
+    """ Output the corpus vectors, the same every time for the same seed. """
+
+    rng = random.Random(seed)
+    vectors = []
+
+    def add(case: str, settings: dict, message_length: int = None):
+        if message_length is None:
+            message_length = rng.randrange(1, 81)
+        vectors.append(make_vector(case, settings, random_letters(rng, message_length)))
+
+    # every reflector
+    for reflector in sorted(BUILTIN_REFLECTORS):
+        for _ in range(20):
+            add("reflector", dict(random_vector_settings(rng, four_rotors=False), reflector=reflector))
+
+    for fourth_rotor in sorted(BUILTIN_FOURTH_ROTORS):
+        for reflector in sorted(BUILTIN_THIN_REFLECTORS):
+            for _ in range(10):
+                settings = random_vector_settings(rng, four_rotors=True)
+                settings["rotors"][0] = fourth_rotor
+                add("reflector", dict(settings, reflector=reflector))
+
+    # every ring setting of every rotor slot
+    for four_rotors in (False, True):
+        for slot_i in range(4 if four_rotors else 3):
+            for ring_letter in ALPHABET_LETTERS:
+                settings = random_vector_settings(rng, four_rotors)
+                settings["ring"] = settings["ring"][:slot_i] + ring_letter + settings["ring"][slot_i + 1:]
+                add("ring", settings)
+
+    for rotor in sorted(BUILTIN_ROTORS):
+        for turnover_letter in ROTOR_CATALOG[rotor][2]:
+            # right rotor starting before, at and after a turnover point
+            for shift in (-1, 0, 1):
+                for _ in range(2):
+                    settings = random_vector_settings(rng, four_rotors=False)
+                    if rotor in settings["rotors"]:
+                        settings["rotors"].remove(rotor)
+                    settings["rotors"] = settings["rotors"][:2] + [rotor]
+                    settings["start"] = settings["start"][:2] + shift_letter(turnover_letter, shift)
+                    add("turnover/right", settings)
+
+            # middle rotor starting before, at and after a turnover point, with the right rotor about to turn it
+            # over, so the left and middle rotors step on consecutive keypresses (Enigma.advance_rotors())
+            for shift in (-1, 0, 1):
+                for right_shift in (-2, -1, 0):
+                    settings = random_vector_settings(rng, four_rotors=rng.random() < 0.2)
+                    stepping_rotors = [name for name in settings["rotors"][-3:] if name != rotor][:3]
+                    settings["rotors"] = settings["rotors"][:-3] + [stepping_rotors[0], rotor, stepping_rotors[1]]
+                    right_turnover = rng.choice(ROTOR_CATALOG[stepping_rotors[1]][2])
+                    settings["start"] = settings["start"][:-2] + shift_letter(turnover_letter, shift) + \
+                        shift_letter(right_turnover, right_shift)
+                    add("turnover/middle", settings, rng.randrange(5, 61))
+
+    # long enough for the middle rotor to go around (and the left rotor to step)
+    for _ in range(20):
+        add("long", random_vector_settings(rng), rng.randrange(700, 1500))
+
+    # every number of plugboard pairings
+    for num_pairs in range(14):
+        for _ in range(10):
+            add("plugboard", dict(random_vector_settings(rng), plugboard=random_plugboard(rng, num_pairs)))
+
+    # bad settings and input, every engine must give the same message as enigma_run()
+    bad_settings = [{"rotors": [1, 1, 2]}, {"rotors": [1, 2]}, {"rotors": [1, 2, 9]}, {"rotors": ["BETA", 1, 2]},
+                    {"plugboard": ["AB", "AC"]}, {"plugboard": ["AB", "BA"]}, {"plugboard": ["AA"]},
+                    {"plugboard": ["A1"]}, {"start": "AB"}, {"start": "A1C"}, {"ring": "ABCD"}, {"reflector": "D"},
+                    {"reflector": "B-THIN"}]
+    for bad_setting in bad_settings:
+        for _ in range(3):
+            add("bad settings", dict(random_vector_settings(rng, four_rotors=False), **bad_setting))
+
+    for plaintext in ("HELLO WORLD", "hello world", "HELLO1", "HELLO!", "", "   ", "HELLO_WORLD", "ABC\tDEF\nGHI"):
+        vectors.append(make_vector("bad input", random_vector_settings(rng), plaintext))
+
+    for _ in range(num_random):
+        add("random", random_vector_settings(rng))
+
+    # letters outside A-Z, the reference path ciphers them too
+    for _ in range(60):
+        vectors.append(make_vector("non-ascii", random_vector_settings(rng),
+                                   random_mixed_letters(rng, rng.randrange(1, 81))))
+
+    for plaintext in ("HÄLLO", "ÄÖÜ", "straße", "Ω" * 500):
+        vectors.append(make_vector("non-ascii", random_vector_settings(rng), plaintext))
+
+    # unusual settings, each after the same settings written the usual way
+    for _ in range(5):
+        for unusual_settings in unusual_vector_settings(rng, random_vector_settings(rng, four_rotors=False)):
+            add("unusual settings", unusual_settings)
+
+    for vector_i, vector in enumerate(vectors):
+        vector["id"] = vector_i
+
+    return vectors
+
+
+def write_vectors(vectors: list, file_path: str = KNOWN_ANSWERS_FILE):
+    """ Write vectors to a corpus file, one JSON object per line. """
+
+    with open(file_path, "w", encoding="utf-8", newline="\n") as corpus_file:
+        for vector in vectors:
+            corpus_file.write(json.dumps(vector, ensure_ascii=False, sort_keys=True) + "\n")
+
+
+def load_vectors(file_path: str = KNOWN_ANSWERS_FILE) -> list:
+    """ Read the vectors of a corpus file. """
+
+    with open(file_path, encoding="utf-8") as corpus_file:
+        return [json.loads(line) for line in corpus_file if line.strip()]
+
+
+def check_engine(engine, vectors: list) -> list:
+    """
+    Run every vector through engine (called like enigma_run()).
+
+    :return: list of tuple(vector, engine output) for every vector whose output is not its ciphertext
+    """
+
+    mismatches = []
+
+    for vector in vectors:
+        try:
+            output_text = engine(*get_vector_settings(vector), vector["plaintext"])
+        except Exception as error:
+            output_text = "%s: %s" % (type(error).__name__, error)
+
+        if output_text != vector["ciphertext"]:
+            mismatches.append((vector, output_text))
+
+    return mismatches
+
+
+def main(argv: list = None) -> int:
+    """ Check engines against the corpus, or generate it again. """
+
+    # imported here, the engines are only needed to check them
+    from differential_fuzz import get_engines
+
+    engines = get_engines()
+
+    parser = argparse.ArgumentParser(description="Check Enigma engines against the known-answer corpus.")
+    parser.add_argument("command", choices=("check", "generate"))
+    parser.add_argument("--engine", choices=sorted(engines) + ["all"], default="all", help="engine to check")
+    parser.add_argument("--file", default=KNOWN_ANSWERS_FILE, help="corpus file")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        vectors = generate_vectors()
+        write_vectors(vectors, args.file)
+        print("%d vectors written to %s" % (len(vectors), args.file))
+        return 0
+
+    vectors = load_vectors(args.file)
+    num_failed = 0
+
+    for engine_name in (sorted(engines) if args.engine == "all" else [args.engine]):
+        mismatches = check_engine(engines[engine_name], vectors)
+        num_failed += bool(mismatches)
+
+        print("%-10s %d/%d vectors match" % (engine_name, len(vectors) - len(mismatches), len(vectors)))
+        for vector, output_text in mismatches[:5]:
+            print("  vector %d (%s): expected %r, got %r" % (vector["id"], vector["case"], vector["ciphertext"][:60],
+                                                           output_text[:60]))
+
+    return 1 if num_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import threading
+from collections import OrderedDict
+
+from enigma import *
+
+DEFAULT_CACHE_SIZE = 128
+
+
+def machine_from_template(template: Enigma, starting_positions: tuple) -> Enigma:
+    """
+    Output a new Enigma object sharing the (read only) wiring of a template, with its own rotor positions.
+
+    :param template: Enigma
+    :param starting_positions: tuple of uppercase letters, one per rotor
+    :return: Enigma
+    """
+
+    enigma_machine = template.clone()
+    enigma_machine.reset(starting_positions)
+
+    return enigma_machine
+
+
+class MachineCache:
+    """
+    Defines a least recently used cache of fully wired Enigma machines (templates), keyed by the settings that do not
+    change from message to message: rotor order, plugboard pairings, ring settings and reflector.
+
+    Settings are only checked and rotors only rewired when a template is not in the cache. Each message gets a cheap
+    copy of a template set to its own starting rotor positions.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """ Set up an empty cache holding at most max_size templates. """
+
+        self.max_size = max_size
+        self.templates = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(rotor_choices: tuple, plugboard_pairings: list, ring_settings: list, reflector: str) -> tuple:
+        """
+        Output the cache key of a set of settings. Every setting is keyed with its type, so settings that only compare
+        equal to cached ones (ex. 1.0 or True for rotor 1) miss the cache and are checked.
+        """
+
+        return (tuple((type(rotor_chosen), rotor_chosen) for rotor_chosen in rotor_choices),
+                tuple((type(pairing), pairing) for pairing in plugboard_pairings),
+                tuple((type(ring_setting), ring_setting) for ring_setting in ring_settings),
+                (type(reflector), reflector))
+
+    @staticmethod
+    def build_template(rotor_choices: tuple, plugboard_pairings: list, ring_settings: list,
+                       reflector: str) -> Enigma or bool:
+        """
+        Check settings and initialize an Enigma machine with them (every rotor at 'A').
+
+        :return: Enigma or bool (False if the settings are bad)
+        """
+
+        # copy the lists, sanitize_enigma_settings() and finalize_enigma_settings() change them in place
+        plugboard_pairings = list(plugboard_pairings)
+        ring_settings = list(ring_settings)
+        initial_rotor_settings = ['A'] * len(ring_settings)
+
+        if not sanitize_enigma_settings(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings,
+                                        reflector):
+            return False
+
+        plugboard_pairings, initial_rotor_settings, ring_settings, reflector = \
+            finalize_enigma_settings(plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+
+        return Enigma(tuple(rotor_choices), plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+
+    def get_template(self, rotor_choices: tuple, plugboard_pairings: list, ring_settings: list,
+                     reflector: str) -> Enigma or bool:
+        """
+        Output the template for a set of settings, building it if it is not cached.
+
+        :return: Enigma or bool (False if the settings are bad)
+        """
+
+        # settings that cannot be a cache key (ex. a list as a rotor choice) are bad, let the checks handle them
+        try:
+            key = self.get_key(rotor_choices, plugboard_pairings, ring_settings, reflector)
+            hash(key)
+        except TypeError:
+            return self.build_template(rotor_choices, plugboard_pairings, ring_settings, reflector)
+
+        with self.lock:
+            if key in self.templates:
+                self.hits += 1
+                self.templates.move_to_end(key)
+                return self.templates[key]
+
+            self.misses += 1
+
+        template = self.build_template(rotor_choices, plugboard_pairings, ring_settings, reflector)
+
+        # bad settings are not cached
+        if template is False:
+            return False
+
+        with self.lock:
+            self.templates[key] = template
+            self.templates.move_to_end(key)
+
+            # evict the least recently used templates
+            while len(self.templates) > self.max_size:
+                self.templates.popitem(last=False)
+                self.evictions += 1
+
+        return template
+
+    def get_machine(self, rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                    ring_settings: list, reflector: str) -> Enigma or bool:
+        """
+        Output an Enigma machine ready to encrypt/decrypt a message, same arguments as enigma_run().
+
+        :return: Enigma or bool (False if the settings are bad)
+        """
+
+        template = self.get_template(rotor_choices, plugboard_pairings, ring_settings, reflector)
+
+        # starting rotor positions differ from message to message, so they are always checked
+        initial_rotor_settings = list(initial_rotor_settings)
+        if template is False or not check_rotor_ring_settings(initial_rotor_settings, len(template.rotors_used)):
+            return False
+
+        return machine_from_template(template, tuple(initial_rotor_settings))
+
+    def resize(self, max_size: int):
+        """ Change the maximum number of templates, evicting templates if there are too many. """
+
+        with self.lock:
+            self.max_size = max_size
+
+            while len(self.templates) > self.max_size:
+                self.templates.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """ Remove every template and reset the counters. """
+
+        with self.lock:
+            self.templates.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_stats(self) -> dict:
+        """ Output the cache's size and hit/miss/eviction counters. """
+
+        with self.lock:
+            return {
+                "size": len(self.templates),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+# cache used by enigma_run_cached() unless another one is given
+default_machine_cache = MachineCache()
+
+
+def enigma_run_cached(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list,
+                      ring_settings: list, reflector: str, input_str: str = None,
+                      machine_cache: MachineCache = None) -> str:
+    """
+    Same as enigma_run(), but the Enigma machine comes from a MachineCache (default_machine_cache unless given).
+
+    Output (including the bad input/settings messages) is identical to enigma_run().
+    """
+
+    if machine_cache is None:
+        machine_cache = default_machine_cache
+
+    # check if input_str is valid, if it is invalid, return a message saying input is bad
+    text = sanitize_input_text(input_str)
+
+    if text is False:
+        return "Bad input string. Letters only."
+
+    enigma_machine = machine_cache.get_machine(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                               ring_settings, reflector)
+
+    if enigma_machine is False:
+        return "Bad Enigma settings"
+
+    return enigma_machine.encrypt_decrypt(text)
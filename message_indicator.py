@@ -0,0 +1,152 @@
+"""
+Message indicator procedure (double encipherment of the message key), as used with the Enigma I and M3 until 1940.
+
+The operator picks a message key (starting positions for the three stepping rotors, ex. "KJP"), types it twice at
+the ground setting (ex. "ABL") and sends the 6 resulting letters (the indicator) ahead of the message, which is
+encrypted with the rotors starting at the message key. On the M4 the fourth rotor stays at 'A'.
+
+Batches reuse one wired CompiledEnigma per daily key and only move its rotors between messages.
+"""
+
+from compiled_enigma import *
+from key_sheet import *
+
+INDICATOR_REPEATS = 2  # the message key is enciphered twice
+MESSAGE_KEY_LENGTH = 3  # one letter per stepping rotor
+
+
+def get_positions(rotor_positions: str or list) -> tuple or bool:
+    """
+    Output the rotor positions (as ints, 'A' is 0) of a ground setting or message key, letters ("ABL", ['A', 'B', 'L'])
+    or numbers from 1 to 26.
+
+    :return: tuple or bool (False if the positions are bad)
+    """
+
+    rotor_positions = list(rotor_positions)
+    if not check_rotor_ring_settings(rotor_positions, MESSAGE_KEY_LENGTH):
+        return False
+
+    return tuple(ord(position.upper()) - 65 for position in rotor_positions)
+
+
+def encrypt_with_indicator(compiled_machine: CompiledEnigma, ground_setting: str or list, message_key: str or list,
+                           input_str: str) -> str:
+    """
+    Encrypt input_str with a message key, and put the message key enciphered twice at the ground setting in front.
+
+    :return: str, indicator followed by the encrypted message (or a bad input/settings message like enigma_run())
+    """
+
+    text = sanitize_input_text(input_str)
+    if text is False:
+        return "Bad input string. Letters only."
+
+    ground_positions = get_positions(ground_setting)
+    message_positions = get_positions(message_key)
+    if ground_positions is False or message_positions is False:
+        return "Bad Enigma settings"
+
+    message_key_letters = "".join(chr(position + 65) for position in message_positions)
+
+    compiled_machine.set_starting_positions(ground_positions)
+    indicator = compiled_machine.encrypt_decrypt(message_key_letters * INDICATOR_REPEATS)
+
+    compiled_machine.set_starting_positions(message_positions)
+
+    return indicator + compiled_machine.encrypt_decrypt(text)
+
+
+def decrypt_with_indicator(compiled_machine: CompiledEnigma, ground_setting: str or list, input_str: str) -> str:
+    """
+    Decrypt a message that starts with its indicator: recover the message key at the ground setting, check both
+    copies of it match, then decrypt the rest of the message with the rotors starting at the message key.
+
+    :return: str, decrypted message (or a bad input/settings/indicator message)
+    """
+
+    text = sanitize_input_text(input_str)
+    if text is False:
+        return "Bad input string. Letters only."
+
+    ground_positions = get_positions(ground_setting)
+    if ground_positions is False:
+        return "Bad Enigma settings"
+
+    indicator_length = MESSAGE_KEY_LENGTH * INDICATOR_REPEATS
+    if len(text) < indicator_length:
+        return "Bad indicator"
+
+    compiled_machine.set_starting_positions(ground_positions)
+    message_keys = compiled_machine.encrypt_decrypt(text[:indicator_length])
+
+    # every copy of the message key must decrypt to the same letters, otherwise the ground setting or key is wrong
+    message_key = message_keys[:MESSAGE_KEY_LENGTH]
+    if message_keys != message_key * INDICATOR_REPEATS:
+        return "Bad indicator"
+
+    compiled_machine.set_starting_positions(get_positions(message_key))
+
+    return compiled_machine.encrypt_decrypt(text[indicator_length:])
+
+
+def build_daily_key_machine(daily_key: tuple, key_sheet: KeySheet = None) -> CompiledEnigma or bool:
+    """
+    Set up the CompiledEnigma of a daily key: a (date, net) in key_sheet if given, otherwise a tuple of
+    (rotor_choices, plugboard_pairings, ring_settings, reflector).
+
+    :return: CompiledEnigma or bool (False if the settings are bad or the date and net are not in key_sheet)
+    """
+
+    if key_sheet is not None:
+        entry = key_sheet.get_entry(*daily_key)
+        if entry is None:
+            return False
+
+        template = entry.template
+
+    else:
+        rotor_choices, plugboard_pairings, ring_settings, reflector = daily_key
+        template = MachineCache.build_template(rotor_choices, plugboard_pairings, ring_settings, reflector)
+        if template is False:
+            return False
+
+    enigma_machine = template.clone()
+    enigma_machine.reset(('A',) * len(template.rotors_used))
+
+    return CompiledEnigma(enigma_machine)
+
+
+def run_indicator_batch(records, decrypt: bool = True, key_sheet: KeySheet = None) -> list:
+    """
+    Decrypt (or encrypt) many messages with the message indicator procedure.
+
+    Records sharing a daily key share one CompiledEnigma, so the rotors are wired and the substitution tables of each
+    rotor state built once for all of them.
+
+    :param records: iterable of tuple(daily_key, ground_setting, message) to decrypt, or
+                    tuple(daily_key, ground_setting, message_key, message) to encrypt, where daily_key is as in
+                    build_daily_key_machine()
+    :param decrypt: bool
+    :param key_sheet: KeySheet holding the daily keys, if they are (date, net) keys
+    :return: list of output text, in the same order as records
+    """
+
+    daily_key_machines = {}
+    results = []
+
+    for record in records:
+        daily_key = tuple(tuple(setting) if isinstance(setting, list) else setting for setting in record[0])
+
+        if daily_key not in daily_key_machines:
+            daily_key_machines[daily_key] = build_daily_key_machine(daily_key, key_sheet)
+
+        compiled_machine = daily_key_machines[daily_key]
+        if compiled_machine is False:
+            results.append("Bad Enigma settings")
+        elif decrypt:
+            results.append(decrypt_with_indicator(compiled_machine, record[1], record[2]))
+        else:
+            results.append(encrypt_with_indicator(compiled_machine, record[1], record[2], record[3]))
+
+    return results
@@ -4,16 +4,20 @@ class Plugboard:
     assigned pair when the Enigma machine was initially set up.
     """
 
+    __slots__ = ("plugboard_table", "plugboard_indexes")
+
     def __init__(self, settings_plugboard_pairings: tuple):
         """ Set plugboard based on received settings. """
 
-        self.plugboard = dict()
+        first_letters = "".join(letter_pair[0] for letter_pair in settings_plugboard_pairings)
+        second_letters = "".join(letter_pair[1] for letter_pair in settings_plugboard_pairings)
+
+        # str.translate() table swapping each pair of letters, letters without a pair are left alone
+        self.plugboard_table = str.maketrans(first_letters + second_letters, second_letters + first_letters)
 
-        for letter_pair in settings_plugboard_pairings:
-            first_letter = letter_pair[0]
-            second_letter = letter_pair[1]
-            self.plugboard[first_letter] = second_letter
-            self.plugboard[second_letter] = first_letter
+        # the same swaps as letter indexes ('A' is 0)
+        self.plugboard_indexes = bytes(ord(chr(letter_i + 65).translate(self.plugboard_table)) - 65
+                                       for letter_i in range(26))
 
     def plugboard_cipher(self, letter: str) -> str:
         """
@@ -21,7 +25,4 @@ class Plugboard:
 
         If a letter was not assigned a cipher pair, return itself.
         """
-        try:
-            return self.plugboard[letter]
-        except KeyError:
-            return letter
+        return letter.translate(self.plugboard_table)
@@ -1,3 +1,9 @@
+from wiring_catalog import *
+
+# shared, read only wiring catalog of every reflector (see wiring_catalog.py)
+REFLECTOR_WIRINGS = REFLECTOR_CATALOG
+
+
 class Reflector:
     """
     Defines a class simulating the function of an Enigma reflector. The reflector acts like another rotor that takes
@@ -5,16 +11,16 @@ class Reflector:
     round of substitutions.
     """
 
+    __slots__ = ("reflector_chosen", "reflector_indexes")
+
+    # same catalog for every reflector, never changed
+    reflector_options = REFLECTOR_WIRINGS
+
     def __init__(self, settings_reflector: str):
         """ Set reflector variable to the desired reflector output pairings. """
 
-        self.reflector_options = {
-            'A': "EJMZALYXVBWFCRQUONTSPIKHGD",
-            'B': "YRUHQSLDPXNGOKMIEBFZCWVJAT",
-            'C': "FVPJIAOYEDRZXWGCTKUQSBNMHL"
-        }
-
-        self.reflector_chosen = self.reflector_options[settings_reflector]
+        self.reflector_chosen = REFLECTOR_WIRINGS[normalize_name(settings_reflector)]
+        self.reflector_indexes = REFLECTOR_TABLES[normalize_name(settings_reflector)]
 
     def get_reflector_letter_at_i(self, i) -> str:
         """ Return the reflector letter at the desired index. """
@@ -1,54 +1,106 @@
+from wiring_catalog import *
+
+# shared, read only wiring catalog of every rotor (see wiring_catalog.py) organized as:
+# output (R-L), output (L-R, aka reverse output), turnover points
+ROTOR_WIRINGS = ROTOR_CATALOG
+
+# str.translate() tables shifting every letter up by 0 to 25 places
+LETTER_SHIFT_TABLES = tuple(str.maketrans(ALPHABET_STR, ALPHABET_STR[i:] + ALPHABET_STR[:i]) for i in range(26))
+
+# (rotor, ring setting letter): output of get_rotor_wiring(), a plain dict so importing rotor.py stays cheap
+ROTOR_WIRING_CACHE = {}
+
+
+def get_rotor_wiring(rotor_chosen: int or str, ring_setting_letter: str) -> tuple:
+    """
+    Output a rotor's wiring rewired for a ring setting, shared by every Rotor object with the same rotor and ring
+    setting.
+
+    :return: tuple(rotor_outputs, output indexes, reverse output indexes, turnover point indexes, notch flags) where
+             rotor_outputs is tuple(output str, reverse output str, turnover letters), the indexes are bytes ('A' is 0)
+             and notch flags is a tuple of 26 bools, True at every turnover point
+    """
+
+    key = (normalize_name(rotor_chosen), ring_setting_letter)
+    if key in ROTOR_WIRING_CACHE:
+        return ROTOR_WIRING_CACHE[key]
+
+    rotor_output_str, rotor_reverse_str, turnover_letters = ROTOR_WIRINGS[key[0]]
+    turnover_indexes = ROTOR_TABLES[key[0]][2]
+
+    rotor_outputs = (Rotor.ring_setting_rewiring(rotor_output_str, ring_setting_letter),
+                     Rotor.ring_setting_rewiring(rotor_reverse_str, ring_setting_letter),
+                     turnover_letters)
+
+    ROTOR_WIRING_CACHE[key] = (rotor_outputs,
+                               bytes(ord(letter) - 65 for letter in rotor_outputs[0]),
+                               bytes(ord(letter) - 65 for letter in rotor_outputs[1]),
+                               turnover_indexes,
+                               tuple(letter_i in turnover_indexes for letter_i in range(26)))
+
+    return ROTOR_WIRING_CACHE[key]
+
+
 class Rotor:
     """
     Defines a class simulating the function of an Enigma rotor. Takes in a letter as input and outputs another letter
     to fed into another rotor, the reflector, or the input wheel.
+
+    The rotor position is kept as an int ('A' is 0) and the wiring is shared with every other rotor of the same rotor
+    and ring setting, so a rotor only holds its own position.
     """
 
-    def __init__(self, rotor_chosen: int, starting_rotor_pos_letter: str, ring_setting_letter: str):
+    __slots__ = ("rotor_outputs", "output_indexes", "reverse_indexes", "turnover_indexes", "notch_flags", "rotor_pos_i")
+
+    # same catalog for every rotor, never changed
+    rotor_options = ROTOR_WIRINGS
+
+    def __init__(self, rotor_chosen: int or str, starting_rotor_pos_letter: str, ring_setting_letter: str):
         """
         Set the starting positions of the Enigma rotors and determine which rotor outputs to use as well as their
         ring setting alteration based on user settings.
         """
 
-        # rotor 1 to 5's output pairings organized as:
-        # output (R-L), output (L-R, aka reverse output), turnover point
-        self.rotor_options = {
-            1: ["EKMFLGDQVZNTOWYHXUSPAIBRCJ", "UWYGADFPVZBECKMTHXSLRINQOJ", 'Q'],
-            2: ["AJDKSIRUXBLHWTMCQGZNPYFVOE", "AJPCZWRLFBDKOTYUQGENHXMIVS", 'E'],
-            3: ["BDFHJLCPRTXVZNYEIWGAKMUSQO", "TAGBPCSDQEUFVNZHYIXJWLRKOM", 'V'],
-            4: ["ESOVPZJAYQUIRHXLNFTGKDCMWB", "HZWVARTNLGUPXQCEJMBSKDYOIF", 'J'],
-            5: ["VZBRGITYUPSDNHLXAWMJQOFECK", "QCYLXWENFTZOSMVJUDKGIARPHB", 'Z']
-        }
-
-        # set the rotor to the appropriate starting position and select the rotor output strings
+        # select the rotor outputs, already rewired for the ring setting letter
+        self.rotor_outputs, self.output_indexes, self.reverse_indexes, self.turnover_indexes, self.notch_flags = \
+            get_rotor_wiring(rotor_chosen, ring_setting_letter.upper())
+
+        # set the rotor to the appropriate starting position
         self.curr_rotor_pos_letter = starting_rotor_pos_letter
-        self.rotor_outputs = self.rotor_options[rotor_chosen]
 
-        # rewire both output and reverse output of the rotor based on ring setting letter
-        for i in range(2):
-            self.rotor_outputs[i] = self.ring_setting_rewiring(rotor_output_str=self.rotor_outputs[i],
-                                                               ring_letter=ring_setting_letter)
+    def clone(self) -> "Rotor":
+        """ Output a new Rotor at the same position, sharing this rotor's (read only) wiring. """
+
+        rotor = Rotor.__new__(Rotor)
+        rotor.rotor_outputs = self.rotor_outputs
+        rotor.output_indexes = self.output_indexes
+        rotor.reverse_indexes = self.reverse_indexes
+        rotor.turnover_indexes = self.turnover_indexes
+        rotor.notch_flags = self.notch_flags
+        rotor.rotor_pos_i = self.rotor_pos_i
+
+        return rotor
 
-    def ring_setting_rewiring(self, rotor_output_str: str, ring_letter: str) -> str:
+    @staticmethod
+    def ring_setting_rewiring(rotor_output_str: str, ring_letter: str) -> str:
         """ Alters a rotor's output pairings based on desired ring setting letter. """
 
-        ring_letter_i = ord(ring_letter) - 65
-        dot_position = (rotor_output_str.index("A") + ring_letter_i) % 26
-        shifted_str = ""
+        ring_letter_i = ord(ring_letter.upper()) - 65
 
         # shift up each letter in rotor_output_str
-        for i in range(len(rotor_output_str)):
-            letter_i = ord(rotor_output_str[i]) - 65
-            shifted_str += chr(((letter_i + ring_letter_i) % 26) + 65)
+        shifted_str = rotor_output_str.translate(LETTER_SHIFT_TABLES[ring_letter_i])
 
-        # rotate letters in shifted rotor_output_str until ring_letter is in the index position of dot_position
-        rotated_str = shifted_str
-        while rotated_str[dot_position] != ring_letter:
-            last_letter = rotated_str[-1]
-            all_other_letters = rotated_str[:len(rotated_str) - 1]
-            rotated_str = last_letter + all_other_letters
+        # rotate letters in shifted rotor_output_str by ring_letter_i places, which puts ring_letter where 'A' was
+        return shifted_str[26 - ring_letter_i:] + shifted_str[:26 - ring_letter_i]
 
-        return rotated_str
+    @property
+    def curr_rotor_pos_letter(self) -> str:
+        """ The rotor's current letter position. """
+        return chr(self.rotor_pos_i + 65)
+
+    @curr_rotor_pos_letter.setter
+    def curr_rotor_pos_letter(self, rotor_pos_letter: str):
+        self.rotor_pos_i = ord(rotor_pos_letter.upper()) - 65
 
     def get_output_letter(self, reg0_or_rev1: int, output_letter_i: int) -> str:
         """ Outputs a letter, from the regular or reserve output strings, at the desired index. """
@@ -58,16 +110,23 @@ class Rotor:
 
     def get_rotor_pos_i(self) -> int:
         """ Output the rotor's current letter position by its ordinal value (ex. 'A' is 0, 'Z' is 25). """
-        return ord(self.curr_rotor_pos_letter) - 65
+        return self.rotor_pos_i
+
+    def set_rotor_pos_i(self, rotor_pos_i: int):
+        """ Set the rotor's current letter position by its ordinal value (ex. 0 is 'A', 25 is 'Z'). """
+        self.rotor_pos_i = rotor_pos_i
+
+    def get_turnover_indexes(self) -> tuple:
+        """ Output the rotor's turnover points by their ordinal values (ex. 'A' is 0, 'Z' is 25). """
+        return self.turnover_indexes
 
     def check_to_step_adjacent_rotor(self) -> bool:
         """
         Returns a bool value based on whether stepping up the rotor will cause the adjacent rotor to step up as well
-        using the rotor's "turnover point".
+        using the rotor's "turnover points".
         """
-        return self.curr_rotor_pos_letter == self.rotor_outputs[2]
+        return self.notch_flags[self.rotor_pos_i]
 
     def step_rotor(self):
         """ Turn the rotor forward 1 step/position. """
-        curr_rotor_pos_i = (self.get_rotor_pos_i() + 1) % 26
-        self.curr_rotor_pos_letter = chr(curr_rotor_pos_i + 65)
+        self.rotor_pos_i = self.rotor_pos_i + 1 if self.rotor_pos_i < 25 else 0
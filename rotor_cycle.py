@@ -0,0 +1,188 @@
+"""
+Rotor state cycles: starting from any rotor state, Enigma.advance_rotors() eventually comes back to it, since every
+state has exactly one state before it. The states in between form a cycle that is worked out once, kept as a compact
+array of state indexes (left * 676 + middle * 26 + right) and shared by every starting state on it.
+"""
+
+from array import array
+
+from wiring_catalog import ROTOR_TABLES, normalize_name
+
+NUM_ROTOR_STATES = 26 ** 3
+NO_CYCLE = 0xFFFF
+
+CYCLE_TABLE_CACHE = {}
+CYCLE_TABLE_CACHE_SIZE = 64  # cleared when full, the built-in rotors only have a few distinct turnover point pairs
+
+
+class RotorCycleTable:
+    """
+    Defines the cycles of rotor states for the turnover points of one pair of middle and right rotors (the left
+    rotor's turnover points never matter). Cycles are worked out the first time one of their states is asked for.
+    """
+
+    def __init__(self, middle_notches: tuple, right_notches: tuple):
+        """ Set up empty per-state lookups: which cycle a state is on and at which offset. """
+
+        self.middle_notches = middle_notches
+        self.right_notches = right_notches
+
+        self.cycles = []
+        self.cycle_of_state = array('H', [NO_CYCLE]) * NUM_ROTOR_STATES
+        self.offset_of_state = array('H', [0]) * NUM_ROTOR_STATES
+
+    def next_state_i(self, state_i: int) -> int:
+        """ Output the rotor state after one keypress, same stepping as Enigma.advance_rotors(). """
+
+        left_pos_i, rest = divmod(state_i, 676)
+        middle_pos_i, right_pos_i = divmod(rest, 26)
+
+        if middle_pos_i in self.middle_notches:
+            left_pos_i = (left_pos_i + 1) % 26
+        if right_pos_i in self.right_notches:
+            middle_pos_i = (middle_pos_i + 1) % 26
+        right_pos_i = (right_pos_i + 1) % 26
+
+        return left_pos_i * 676 + middle_pos_i * 26 + right_pos_i
+
+    def find_cycle(self, state_i: int) -> tuple:
+        """
+        Output the cycle a rotor state is on and the state's offset in it, working the cycle out if needed.
+
+        :return: tuple(array of state indexes, offset of state_i)
+        """
+
+        if self.cycle_of_state[state_i] == NO_CYCLE:
+            cycle_i = len(self.cycles)
+            cycle = array('H', [state_i])
+
+            next_state_i = self.next_state_i(state_i)
+            while next_state_i != state_i:
+                cycle.append(next_state_i)
+                next_state_i = self.next_state_i(next_state_i)
+
+            for offset, cycle_state_i in enumerate(cycle):
+                self.cycle_of_state[cycle_state_i] = cycle_i
+                self.offset_of_state[cycle_state_i] = offset
+
+            self.cycles.append(cycle)
+
+        return self.cycles[self.cycle_of_state[state_i]], self.offset_of_state[state_i]
+
+    def find_all_cycles(self) -> list:
+        """ Work out every cycle and output them. """
+
+        for state_i in range(NUM_ROTOR_STATES):
+            self.find_cycle(state_i)
+
+        return self.cycles
+
+
+def get_cycle_table(middle_notches: tuple, right_notches: tuple) -> RotorCycleTable:
+    """ Output the shared RotorCycleTable of the turnover points of a middle and a right rotor. """
+
+    key = (middle_notches, right_notches)
+
+    if key in CYCLE_TABLE_CACHE:
+        return CYCLE_TABLE_CACHE[key]
+
+    if len(CYCLE_TABLE_CACHE) >= CYCLE_TABLE_CACHE_SIZE:
+        CYCLE_TABLE_CACHE.clear()
+    CYCLE_TABLE_CACHE[key] = RotorCycleTable(middle_notches, right_notches)
+
+    return CYCLE_TABLE_CACHE[key]
+
+
+def get_rotor_notches(rotor_choices: tuple) -> tuple:
+    """
+    Output the turnover points (tuples of ints, 'A' is 0) of the middle and right rotors.
+
+    Works for 4 rotor (M4) rotor_choices too, the fourth rotor never steps.
+    """
+    return tuple(ROTOR_TABLES[normalize_name(rotor_chosen)][2] for rotor_chosen in rotor_choices[-2:])
+
+
+class RotorCycle:
+    """
+    Defines the cycle of rotor states a machine goes through from its starting rotor positions.
+
+    State indexes are left * 676 + middle * 26 + right, same as CompiledEnigma.state_tables.
+    """
+
+    def __init__(self, cycle: array, start_offset: int):
+        """ Point at a shared cycle, keypress 0 being the state at start_offset. """
+
+        self.cycle = cycle
+        self.start_offset = start_offset
+
+    @property
+    def period(self) -> int:
+        """ Number of keypresses until the rotors are back at their starting positions. """
+        return len(self.cycle)
+
+    def state_at(self, num_keypresses: int) -> int:
+        """ Output the rotor state index after num_keypresses keypresses. """
+        return self.cycle[(self.start_offset + num_keypresses) % len(self.cycle)]
+
+    def positions_at(self, num_keypresses: int) -> tuple:
+        """ Output the (left, middle, right) rotor positions as ints after num_keypresses keypresses. """
+
+        left_pos_i, rest = divmod(self.state_at(num_keypresses), 676)
+        return left_pos_i, rest // 26, rest % 26
+
+    def state_sequence(self, first_keypress: int, num_steps: int) -> list:
+        """
+        Output the rotor state index after each of num_steps keypresses following keypress first_keypress, same as
+        CompiledEnigma.state_sequence() without stepping the rotors.
+        """
+
+        cycle = self.cycle
+        period = len(cycle)
+        offset = (self.start_offset + first_keypress + 1) % period
+
+        # go around the cycle as many times as needed
+        states = list(cycle[offset:offset + num_steps])
+        while len(states) < num_steps:
+            states.extend(cycle[:num_steps - len(states)])
+
+        return states
+
+
+def get_rotor_cycle(rotor_choices: tuple, starting_positions: tuple) -> RotorCycle:
+    """
+    Output the RotorCycle of a rotor order and starting rotor positions (letters or ints, 'A' is 0).
+
+    Cycles are memoized, so every starting position on an already known cycle is a lookup. For 4 rotors (M4) only the
+    three stepping rotors make up the rotor state.
+    """
+
+    left_pos_i, middle_pos_i, right_pos_i = (ord(position.upper()) - 65 if isinstance(position, str) else position
+                                             for position in starting_positions[-3:])
+
+    cycle_table = get_cycle_table(*get_rotor_notches(rotor_choices))
+    cycle, start_offset = cycle_table.find_cycle(left_pos_i * 676 + middle_pos_i * 26 + right_pos_i)
+
+    return RotorCycle(cycle, start_offset)
+
+
+def period_statistics(rotor_choices: tuple) -> dict:
+    """
+    Output the cycle periods of a rotor order over all 26^3 starting positions.
+
+    :return: dict with the number of cycles, min/max/mean period and how many starting positions have each period
+    """
+
+    cycles = get_cycle_table(*get_rotor_notches(rotor_choices)).find_all_cycles()
+
+    starting_positions_per_period = {}
+    for cycle in cycles:
+        starting_positions_per_period[len(cycle)] = starting_positions_per_period.get(len(cycle), 0) + len(cycle)
+
+    return {
+        "num_cycles": len(cycles),
+        "min_period": min(starting_positions_per_period),
+        "max_period": max(starting_positions_per_period),
+        "mean_period": sum(period * count for period, count in starting_positions_per_period.items())
+        / NUM_ROTOR_STATES,
+        "starting_positions_per_period": dict(sorted(starting_positions_per_period.items()))
+    }
@@ -0,0 +1,392 @@
+"""
+On-disk store of compiled machine tables: the substitution tables of every rotor state of a configuration, built
+once and memory-mapped by every process that needs them. Processes opening the same file share its pages through the
+OS cache, instead of each building and holding a private copy.
+
+Each configuration is one file, named after its table key: a hash of the (ring setting rewired) rotor wirings, the
+reflector (with the M4 fourth rotor folded in) and the plugboard, so the tables of a file always match the wiring
+data of Rotor/Reflector that built them. Changing a wiring changes the key, and the old file is never opened again
+(prune removes it, along with any file built from an older wiring catalog).
+
+File format (version 1, little-endian):
+
+    header       magic b"ENIGTBL\\0", format version, description length, tables offset, table key (32 bytes),
+                 wiring catalog fingerprint (32 bytes), SHA-256 of the tables (32 bytes)
+    description  JSON of the settings the tables were built for (informational only)
+    padding      up to a 4096 byte boundary, so the tables start on a page
+    tables       26 output letters for each of the 26^3 rotor states, same as CompiledEnigma.state_tables
+
+Command line use:
+
+    python table_store.py prebuild keys.csv --store /var/cache/enigma_tables
+    python table_store.py verify --store /var/cache/enigma_tables
+    python table_store.py prune --store /var/cache/enigma_tables
+    python table_store.py list --store /var/cache/enigma_tables
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+from compiled_enigma import *
+from key_sheet import *
+
+TABLE_FILE_MAGIC = b"ENIGTBL\x00"
+TABLE_FILE_VERSION = 1
+TABLE_FILE_HEADER = struct.Struct("<8sIIQ32s32s32s")
+TABLE_FILE_ALIGNMENT = 4096  # tables start on a page boundary
+TABLE_FILE_EXTENSION = ".etab"
+TABLES_SIZE = NUM_ROTOR_STATES * 26
+TABLE_FILE_MODE = 0o644  # mkstemp() files are private (0600), table files are meant to be shared
+TEMP_FILE_MAX_AGE = 3600  # seconds, prune() leaves younger temporary files alone, they may still be being written
+
+DEFAULT_TABLE_STORE_DIR = "enigma_tables"
+TABLE_STORE_ENV = "ENIGMA_TABLE_STORE"  # store directory used by the command line unless --store is given
+
+
+##############################################################################
+# Keys and file format
+##############################################################################
+def get_table_key(compiled_machine: CompiledEnigma) -> str:
+    """
+    Output the table key of a CompiledEnigma: a hash of everything its state tables are built from, the three
+    stepping rotors' wirings (after ring settings), the reflector (with any fourth rotor) and the plugboard.
+    """
+
+    digest = hashlib.sha256(b"enigma tables %d\n" % TABLE_FILE_VERSION)
+
+    # a rotor's translation table at position 0 holds its whole (ring setting rewired) wiring
+    for rotor_tables in compiled_machine.rotor_forward_tables:
+        digest.update(rotor_tables[0])
+
+    digest.update(compiled_machine.reflector_table)
+    digest.update(compiled_machine.plugboard_table)
+
+    return digest.hexdigest()
+
+
+def get_catalog_fingerprint() -> bytes:
+    """ Output a hash of every rotor and reflector wiring in the wiring catalog. """
+
+    catalog = (sorted((str(name), wiring[0], wiring[2]) for name, wiring in ROTOR_CATALOG.items()),
+               sorted(str(name) for name in FOURTH_ROTORS),
+               sorted((str(name), str(wiring)) for name, wiring in REFLECTOR_CATALOG.items()),
+               sorted(str(name) for name in THIN_REFLECTORS))
+
+    return hashlib.sha256(repr(catalog).encode("utf-8")).digest()
+
+
+def write_table_file(file_path: str, table_key: str, state_tables, description: dict = None):
+    """
+    Write a table file, replacing file_path in one step (a process that already mapped the old file keeps it).
+    """
+
+    description_bytes = json.dumps(description or {}, sort_keys=True).encode("utf-8")
+    header_size = TABLE_FILE_HEADER.size + len(description_bytes)
+    tables_offset = -(-header_size // TABLE_FILE_ALIGNMENT) * TABLE_FILE_ALIGNMENT
+
+    header = TABLE_FILE_HEADER.pack(TABLE_FILE_MAGIC, TABLE_FILE_VERSION, len(description_bytes), tables_offset,
+                                    bytes.fromhex(table_key), get_catalog_fingerprint(),
+                                    hashlib.sha256(state_tables).digest())
+
+    file_descriptor, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(file_path) or ".")
+    try:
+        with os.fdopen(file_descriptor, "wb") as table_file:
+            table_file.write(header)
+            table_file.write(description_bytes)
+            table_file.write(bytes(tables_offset - header_size))
+            table_file.write(state_tables)
+            table_file.flush()
+            os.fsync(table_file.fileno())
+
+        os.chmod(temp_path, TABLE_FILE_MODE)
+        os.replace(temp_path, file_path)
+
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def open_table_file(file_path: str, table_key: str = None, verify: bool = True) -> tuple:
+    """
+    Memory-map a table file (read only).
+
+    Raises ValueError if the file is not a table file of this format version, is truncated, is not for table_key
+    (if given) or, with verify, its tables do not match their checksum. Raises OSError if it cannot be opened.
+
+    :return: tuple(dict of the header fields and description, memoryview of the tables)
+    """
+
+    with open(file_path, "rb") as table_file:
+        if os.fstat(table_file.fileno()).st_size < TABLE_FILE_HEADER.size:
+            raise ValueError("%s: truncated table file" % file_path)
+
+        mapped_file = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    tables = None
+    try:
+        magic, version, description_size, tables_offset, file_table_key, catalog_fingerprint, tables_checksum = \
+            TABLE_FILE_HEADER.unpack_from(mapped_file)
+
+        if magic != TABLE_FILE_MAGIC:
+            raise ValueError("%s: not a table file" % file_path)
+        if version != TABLE_FILE_VERSION:
+            raise ValueError("%s: table file version %d, expected %d" % (file_path, version, TABLE_FILE_VERSION))
+        if len(mapped_file) != tables_offset + TABLES_SIZE:
+            raise ValueError("%s: truncated table file" % file_path)
+        if table_key is not None and file_table_key.hex() != table_key:
+            raise ValueError("%s: tables were built for another configuration" % file_path)
+
+        tables = memoryview(mapped_file)[tables_offset:]
+        if verify and hashlib.sha256(tables).digest() != tables_checksum:
+            raise ValueError("%s: tables do not match their checksum" % file_path)
+
+        description_start = TABLE_FILE_HEADER.size
+        header = {
+            "version": version,
+            "table_key": file_table_key.hex(),
+            "catalog_fingerprint": catalog_fingerprint,
+            "description": json.loads(bytes(mapped_file[description_start:description_start + description_size]))
+        }
+
+    except BaseException:
+        # a rejected file must not stay mapped, the view of the tables has to go before the mapping can close
+        if tables is not None:
+            tables.release()
+        mapped_file.close()
+        raise
+
+    return header, tables
+
+
+##############################################################################
+# Store
+##############################################################################
+class TableStore:
+    """
+    Defines a directory of table files. get_compiled_machine() hands out CompiledEnigma objects using the tables of
+    the store (building and saving them first if needed), every machine of a configuration sharing one mapping.
+    """
+
+    def __init__(self, directory: str, verify: bool = True):
+        """ Use (and create if needed) directory, checking each file's checksum on first use if verify. """
+
+        self.directory = directory
+        self.verify = verify
+        os.makedirs(directory, exist_ok=True)
+
+        # table key -> memoryview of the mapped tables, for every file this process opened
+        self.mapped_tables = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalid = 0
+
+    def get_path(self, table_key: str) -> str:
+        """ Output the path of a table key's file. """
+        return os.path.join(self.directory, table_key + TABLE_FILE_EXTENSION)
+
+    def load_tables(self, compiled_machine: CompiledEnigma) -> bool:
+        """
+        Give compiled_machine the stored tables of its configuration.
+
+        :return: bool (False if there is no valid file for the configuration)
+        """
+
+        table_key = get_table_key(compiled_machine)
+
+        if table_key not in self.mapped_tables:
+            try:
+                header, tables = open_table_file(self.get_path(table_key), table_key, self.verify)
+            except FileNotFoundError:
+                self.misses += 1
+                return False
+            except (OSError, ValueError):
+                self.invalid += 1
+                return False
+
+            self.mapped_tables[table_key] = tables
+
+        self.hits += 1
+        compiled_machine.use_state_tables(self.mapped_tables[table_key])
+
+        return True
+
+    def save_tables(self, compiled_machine: CompiledEnigma, description: dict = None) -> str:
+        """
+        Build every state table of compiled_machine and save them, then switch it to the saved (mapped) tables.
+
+        :return: str, path of the table file
+        """
+
+        table_key = get_table_key(compiled_machine)
+        file_path = self.get_path(table_key)
+
+        compiled_machine.compile_all()
+        write_table_file(file_path, table_key, compiled_machine.state_tables, description)
+
+        # drop a mapping of an older (invalid) file so the new one is used
+        self.mapped_tables.pop(table_key, None)
+        self.load_tables(compiled_machine)
+
+        return file_path
+
+    def get_compiled_machine(self, enigma_machine: Enigma, description: dict = None) -> CompiledEnigma:
+        """ Output a CompiledEnigma of an Enigma object (at its current rotor positions) using stored tables. """
+
+        compiled_machine = CompiledEnigma(enigma_machine)
+
+        if not self.load_tables(compiled_machine):
+            self.save_tables(compiled_machine, description)
+
+        return compiled_machine
+
+    def list_files(self) -> list:
+        """ Output the path of every table file in the store. """
+        return sorted(glob.glob(os.path.join(self.directory, "*" + TABLE_FILE_EXTENSION)))
+
+    def check_files(self) -> list:
+        """
+        Check every table file's header and checksum.
+
+        :return: list of tuple(path, header dict or None, error message or None)
+        """
+
+        results = []
+
+        for file_path in self.list_files():
+            try:
+                header, tables = open_table_file(file_path, os.path.basename(file_path)[:-len(TABLE_FILE_EXTENSION)])
+            except (OSError, ValueError) as error:
+                results.append((file_path, None, str(error)))
+            else:
+                results.append((file_path, header, None))
+
+        return results
+
+    def prune(self, temp_max_age: float = TEMP_FILE_MAX_AGE) -> dict:
+        """
+        Remove bad table files, files built from another wiring catalog and temporary files left by interrupted
+        writes. Temporary files younger than temp_max_age seconds are kept, another process may be writing them.
+
+        :return: dict counting the files kept and removed
+        """
+
+        catalog_fingerprint = get_catalog_fingerprint()
+        stats = {"kept": 0, "removed": 0}
+
+        for file_path, header, error in self.check_files():
+            if error is None and header["catalog_fingerprint"] == catalog_fingerprint:
+                stats["kept"] += 1
+                continue
+
+            os.unlink(file_path)
+            stats["removed"] += 1
+
+        for temp_path in glob.glob(os.path.join(self.directory, "*.tmp")):
+            try:
+                if time.time() - os.stat(temp_path).st_mtime < temp_max_age:
+                    stats["kept"] += 1
+                    continue
+
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                # its writer finished (or cleaned up) in the meantime
+                continue
+
+            stats["removed"] += 1
+
+        return stats
+
+    def get_stats(self) -> dict:
+        """ Output the hit/miss/invalid counters and number of mapped configurations. """
+
+        return {"hits": self.hits, "misses": self.misses, "invalid": self.invalid, "mapped": len(self.mapped_tables)}
+
+
+##############################################################################
+# Command line
+##############################################################################
+def prebuild_key_sheet(table_store: TableStore, key_sheet: KeySheet) -> dict:
+    """
+    Make sure the store holds the tables of every entry of a key sheet.
+
+    :return: dict counting the configurations built and already stored
+    """
+
+    stats = {"built": 0, "stored": 0}
+
+    for entry in key_sheet.entries.values():
+        compiled_machine = CompiledEnigma(entry.template)
+
+        if table_store.load_tables(compiled_machine):
+            stats["stored"] += 1
+            continue
+
+        table_store.save_tables(compiled_machine, {
+            "rotors": list(entry.rotor_choices),
+            "rings": list(entry.ring_settings),
+            "plugboard": list(entry.plugboard_pairings),
+            "reflector": entry.reflector
+        })
+        stats["built"] += 1
+
+    return stats
+
+
+def main(argv: list = None) -> int:
+    """ Prebuild, check, prune or list a table store from the command line. """
+
+    parser = argparse.ArgumentParser(description="Manage a store of memory-mapped Enigma machine tables.")
+    parser.add_argument("command", choices=("prebuild", "verify", "prune", "list"))
+    parser.add_argument("key_sheet", nargs="?", help="key sheet CSV file (prebuild only)")
+    parser.add_argument("--store", default=os.environ.get(TABLE_STORE_ENV, DEFAULT_TABLE_STORE_DIR),
+                        help="store directory (default: $%s or %s)" % (TABLE_STORE_ENV, DEFAULT_TABLE_STORE_DIR))
+    args = parser.parse_args(argv)
+
+    table_store = TableStore(args.store)
+
+    if args.command == "prebuild":
+        if args.key_sheet is None:
+            print("prebuild needs a key sheet file", file=sys.stderr)
+            return 2
+
+        try:
+            key_sheet = KeySheet(args.key_sheet)
+        except (OSError, ValueError) as error:
+            print(error, file=sys.stderr)
+            return 1
+
+        stats = prebuild_key_sheet(table_store, key_sheet)
+        print("%d configuration(s) built, %d already stored" % (stats["built"], stats["stored"]))
+
+    elif args.command == "verify":
+        results = table_store.check_files()
+        for file_path, header, error in results:
+            if error is not None:
+                print(error, file=sys.stderr)
+
+        num_bad = sum(error is not None for file_path, header, error in results)
+        print("%d table file(s), %d bad" % (len(results), num_bad))
+        return 1 if num_bad else 0
+
+    elif args.command == "prune":
+        stats = table_store.prune()
+        print("%d table file(s) kept, %d removed" % (stats["kept"], stats["removed"]))
+
+    else:
+        for file_path, header, error in table_store.check_files():
+            print("%s  %s" % (os.path.basename(file_path)[:16], error or json.dumps(header["description"])))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import unittest
+from bombe import *
+
+PLUGBOARD_PAIRINGS = ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"]
+
+
+class TestBombe(unittest.TestCase):
+    def setUp(self):
+        self.plaintext = "WETTERVORHERSAGEBISKAYAKEINEBESONDERENEREIGNISSE"
+        self.ciphertext = enigma_run((2, 4, 5), PLUGBOARD_PAIRINGS, ['Q', 'E', 'V'], ['A', 'A', 'A'], 'B',
+                                     self.plaintext)
+
+    def test_menu(self):
+        """
+        Menu edges, loops and test letter, a crib over its own letter cannot be at that offset
+        """
+        menu = Menu(self.ciphertext.encode("ascii"), b"WETTERVORHERSAGEBISKAYA")
+
+        self.assertEqual(len(menu.edges), 23)
+        self.assertEqual(menu.num_loops, len(menu.loop_edges))
+        self.assertEqual(len(menu.tree_edges) + 1, len(menu.test_component))
+        self.assertIn(menu.test_letter, menu.test_component)
+
+        with self.assertRaises(ValueError):
+            Menu(b"ABCDE", b"XBZ", 0)
+        with self.assertRaises(ValueError):
+            Menu(b"ABCDE", b"XYZ", 3)
+
+    def test_bombe_finds_settings(self):
+        """
+        The only stop is the rotor order and starting positions used, with stecker pairs from the plugboard used
+        """
+        stops = run_bombe(self.ciphertext, "WETTERVORHERSAGEBISKAYA", rotor_orders=[(1, 2, 3), (2, 4, 5)],
+                          reflectors=('B', 'C'))
+
+        self.assertEqual(len(stops), 1)
+        self.assertEqual((stops[0]["rotor_choices"], stops[0]["initial_rotor_settings"], stops[0]["reflector"]),
+                         ((2, 4, 5), ('Q', 'E', 'V'), 'B'))
+        self.assertTrue(set(stops[0]["plugboard_pairings"]) <= set(PLUGBOARD_PAIRINGS))
+        self.assertEqual(stops[0]["crib_matches"], 23)
+
+    def test_bombe_m4(self):
+        """
+        M4 rotor orders with the default (three letter) ring settings, the fourth rotor position is found too
+        """
+        ciphertext = enigma_run(('BETA', 2, 4, 5), PLUGBOARD_PAIRINGS, ['C', 'Q', 'E', 'V'], ['A', 'A', 'A', 'A'],
+                                'B-THIN', self.plaintext)
+
+        stops = run_bombe(ciphertext, "WETTERVORHERSAGEBISKAYA", rotor_orders=[('BETA', 2, 4, 5)],
+                          reflectors=('B-THIN',), fourth_rotor_positions="BC")
+
+        self.assertEqual(len(stops), 1)
+        self.assertEqual((stops[0]["initial_rotor_settings"], stops[0]["ring_settings"]),
+                         (('C', 'Q', 'E', 'V'), ('A', 'A', 'A', 'A')))
+        self.assertEqual(stops[0]["crib_matches"], 23)
+
+        with self.assertRaises(ValueError):
+            run_bombe(ciphertext, "WETTERVORHERSAGEBISKAYA", rotor_orders=[('BETA', 2, 4, 5)], reflectors=('B',))
+        with self.assertRaises(ValueError):
+            run_bombe(ciphertext, "WETTERVORHERSAGEBISKAYA", rotor_orders=[(2, 4, 5)], reflectors=('B',),
+                      ring_settings_options=(('A', 'A'),))
+
+    def test_loop_candidates(self):
+        """
+        Partners ruled out by the loops are also ruled out by following the whole menu
+        """
+        menu = Menu(self.ciphertext.encode("ascii"), b"WETTERVORHERSAGEBISKAYA")
+        scrambler_tables, scrambler_translations, notch_flags = build_scrambler_tables((2, 4, 5), ('A', 'A', 'A'),
+                                                                                       'B')
+
+        for start_state_i in range(0, NUM_ROTOR_STATES, 97):
+            edge_states = get_menu_states(start_state_i, menu, notch_flags)
+            candidates = find_loop_candidates(menu, scrambler_translations, edge_states)
+
+            self.assertEqual(try_rotor_state(menu, scrambler_tables, edge_states, candidates),
+                             try_rotor_state(menu, scrambler_tables, edge_states))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import random
+import unittest
+from compiled_enigma import *
+
+try:
+    import numpy as np
+    from bulk_enigma import *
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBulkEnigma(unittest.TestCase):
+    def test_sample_msg_decrypt(self):
+        """
+        Operation Barbarossa, 1941 Part 2 (same message as test_msg_3_decrypt)
+        """
+        rotor_choices = (2, 4, 5)
+        plugboard_pairings = ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"]
+        initial_rotor_settings = ['L', 'S', 'D']
+        ring_settings = [2, 21, 12]
+        reflector = 'B'
+        encrypted_msg = "SFBWDNJUSEGQOBHKRTAREEZMWKPPRBXOHDROEQGBBGTQVPGVKBVVGBIMHUSZYDAJQIROAXSSSNREHYGGRPISEZBOVMQIEMMZCYSGQDGRERVBILEKXYQIRGIRQNRDNVRXCYYTNJR"
+        decrypted_msg = "DREIGEHTLANGSAMABERSIQERVORWAERTSXEINSSIEBENNULLSEQSXUHRXROEMXEINSXINFRGTXDREIXAUFFLIEGERSTRASZEMITANFANGXEINSSEQSXKMXKMXOSTWXKAMENECXK"
+
+        self.assertEqual(enigma_run_bulk(rotor_choices, plugboard_pairings,
+                                         initial_rotor_settings, ring_settings,
+                                         reflector, encrypted_msg), decrypted_msg)
+
+    def test_matches_enigma_random_settings(self):
+        """
+        Bulk output and final rotor positions match the scalar Enigma.encrypt_decrypt() path
+        """
+        rng = random.Random(11)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+        for _ in range(15):
+            settings = (tuple(rng.sample(range(1, 6), 3)), ("QW", "ER", "TZ"),
+                        tuple(rng.choice(alphabet) for _ in range(3)), tuple(rng.choice(alphabet) for _ in range(3)),
+                        rng.choice("ABC"))
+            msg = "".join(rng.choice(alphabet) for _ in range(3000))
+
+            enigma_machine = Enigma(*settings)
+            compiled_machine = CompiledEnigma(Enigma(*settings))
+
+            # split the message to check rotor positions are kept between calls
+            input_array = np.frombuffer(msg.encode("ascii"), dtype=np.uint8)
+            output_bytes = bulk_encrypt_decrypt(compiled_machine, input_array[:1234]).tobytes() + \
+                bulk_encrypt_decrypt(compiled_machine, input_array[1234:]).tobytes()
+
+            self.assertEqual(output_bytes.decode("ascii"), enigma_machine.encrypt_decrypt(msg))
+            self.assertEqual(compiled_machine.positions, [rotor.get_rotor_pos_i() for rotor in enigma_machine.rotors_used])
+
+    def test_non_ascii_letters(self):
+        """
+        Letters outside A-Z that sanitize_input_text() accepts give the same output as enigma_run(), serial and parallel
+        """
+        settings = ((3, 1, 5), ["AZ", "BY", "QW"], ['K', 'D', 'O'], ['X', 'B', 'C'], 'C')
+        msg = "HÄLLO straße ÉÑΩ" * 300
+
+        self.assertEqual(enigma_run_bulk(*settings, msg), enigma_run(*settings, msg))
+        self.assertEqual(enigma_run_bulk(*settings, msg, parallel=True, workers=2), enigma_run(*settings, msg))
+
+    def test_parallel_matches_serial(self):
+        """
+        Message split across worker processes gives the same output as one bulk pass
+        """
+        rng = random.Random(5)
+        msg = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(50001))
+        settings = ((3, 1, 5), ["AZ", "BY"], ['K', 'D', 'O'], ['X', 'B', 'C'], 'C')
+
+        self.assertEqual(enigma_run_bulk(*settings, msg, parallel=True, workers=3),
+                         enigma_run_bulk(*settings, msg))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from unittest import mock
+
+import ciphertext_only
+from ciphertext_only import *
+
+PLAINTEXT = "AUFKLXABTEILUNGXVONXKURTINOWAXKURTINOWAXNORDWESTLXSEBEZXSEBEZXUAFFLIEGERSTRASZERIQTUNGXDUBROWKIXDUBROWKIX" \
+            "OPOTSCHKAXOPOTSCHKAXUMXEINSAQTDREINULLXUHRANGETRETENXANGRIFFXINFXRGTXDREIGEHTLANGSAMABERSIQERVORWAERTSXE" \
+            "INSSIEBENNULLSEQSXUHRXROEMXEINSXINFRGTXDREIXAUFFLIEGERSTRASZEMITANFANGXEINSSEQSXKMXKMXOSTWXKAMENECXK"
+
+# German text that is not the message, for n-gram statistics
+GERMAN_CORPUS = ("Die Enigma ist eine Rotor-Schluesselmaschine, die im Zweiten Weltkrieg zur Verschluesselung des "
+                 "Nachrichtenverkehrs des deutschen Militaers verwendet wurde. Auch andere Dienststellen, wie "
+                 "Geheimdienste, diplomatische Dienste, Polizei und Reichsbahn setzten sie zur geheimen "
+                 "Kommunikation ein. Trotz mehrfacher Verbesserung der Verschluesselungsqualitaet gelang es den "
+                 "Alliierten, die deutschen Funksprueche nahezu kontinuierlich zu entziffern. Die Maschine besteht "
+                 "aus einer Tastatur, einem Walzensatz und einem Lampenfeld. Der Walzensatz ist das Herzstueck der "
+                 "Verschluesselung. Die drei Walzen sind drehbar angeordnet und weisen sowohl auf der linken als "
+                 "auch auf der rechten Seite fuer jeden Buchstaben einen elektrischen Kontakt auf. Bei jedem "
+                 "Tastendruck dreht sich die rechte Walze um eine Position weiter, und nach einer vollen Umdrehung "
+                 "nimmt sie die mittlere Walze mit. Ein Steckerbrett vertauscht zusaetzlich Buchstabenpaare vor "
+                 "und nach dem Walzensatz. Der Schluessel bestand aus der Walzenlage, der Ringstellung, der "
+                 "Steckerverbindung und der Grundstellung der Walzen, die jeden Tag nach einer geheimen "
+                 "Schluesseltafel gewechselt wurden. Die Funker meldeten das Wetter, die Lage der Truppen, den "
+                 "Nachschub an Munition und Treibstoff und die Befehle der Kommandeure an die Einheiten an der "
+                 "Front. Am Morgen wurde der Angriff der Division gemeldet, am Abend die Stellung der feindlichen "
+                 "Kraefte an dem Fluss und die Verluste der eigenen Kompanien. Die Marine benutzte eine Maschine "
+                 "mit vier Walzen, um den Verkehr mit den Unterseebooten auf dem Atlantik zu sichern, und die "
+                 "Luftwaffe meldete ihre Einsaetze gegen Ziele im Osten. Nach dem Krieg wurde bekannt, dass die "
+                 "Entzifferung in Bletchley Park den Verlauf des Krieges verkuerzt hatte.")
+
+
+class NeverBetterScorer:
+    """ Scorer giving every decryption the same score. """
+
+    def score(self, letters: bytes) -> float:
+        return 0.0
+
+
+class TestCiphertextOnly(unittest.TestCase):
+    def test_index_of_coincidence(self):
+        """
+        Index of coincidence of plaintext is well above that of ciphertext
+        """
+        ciphertext = enigma_run((2, 4, 5), ["AV", "BS"], ['B', 'L', 'A'], ['A', 'A', 'A'], 'B', PLAINTEXT)
+
+        self.assertEqual(index_of_coincidence(bytes([0, 0, 0, 0])), 1.0)
+        self.assertGreater(index_of_coincidence(PLAINTEXT.encode("ascii").translate(LETTERS_TO_INDEXES)),
+                           index_of_coincidence(ciphertext.encode("ascii").translate(LETTERS_TO_INDEXES)) + 0.02)
+
+    def test_ngram_scorer(self):
+        """
+        Trigram scorer prefers text from its own corpus over shuffled letters
+        """
+        trigram_scorer = NgramScorer.from_corpus(PLAINTEXT, 3)
+        letters = PLAINTEXT.encode("ascii").translate(LETTERS_TO_INDEXES)
+
+        self.assertEqual(trigram_scorer.get_ngram_i("ABC"), 28)
+        self.assertGreater(trigram_scorer.score(letters[:100]), trigram_scorer.score(bytes(sorted(letters[:100]))))
+
+    def test_search_rotor_positions(self):
+        """
+        Phase 1 finds the starting position of a message sent without a plugboard, the same with or without numpy
+        """
+        ciphertext = enigma_run((2, 4, 5), [], ['B', 'L', 'A'], ['A', 'A', 'A'], 'B', PLAINTEXT)
+        cipher_letters = ciphertext.encode("ascii").translate(LETTERS_TO_INDEXES)
+
+        candidates = search_rotor_positions(cipher_letters, [(2, 4, 5)], ['B'], 5)
+        self.assertEqual(candidates[0][1:], ((2, 4, 5), ('B', 'L', 'A'), 'B'))
+
+        if ciphertext_only.np is not None:
+            with mock.patch.object(ciphertext_only, "np", None):
+                self.assertEqual(search_rotor_positions(cipher_letters, [(2, 4, 5)], ['B'], 5), candidates)
+
+                # short messages tie many starting positions, the same ones are kept either way
+                loop_candidates = search_rotor_positions(cipher_letters[:3], [(2, 4, 5)], ['B'], 7)
+            self.assertEqual(search_rotor_positions(cipher_letters[:3], [(2, 4, 5)], ['B'], 7), loop_candidates)
+
+    def test_toggle_pairing(self):
+        """
+        Plugboard moves add, swap and remove cables, always leaving a valid plugboard
+        """
+        plugboard = toggle_pairing(NO_PLUGBOARD, 0, 1)
+        self.assertEqual(plugboard_to_pairings(plugboard), ("AB",))
+        self.assertEqual(plugboard_to_pairings(toggle_pairing(plugboard, 0, 2)), ("AC",))
+        self.assertEqual(toggle_pairing(plugboard, 1, 0), bytearray(NO_PLUGBOARD))
+
+        rng = random.Random(0)
+        for _ in range(500):
+            plugboard = toggle_pairing(plugboard, *rng.sample(range(26), 2))
+            self.assertTrue(all(plugboard[paired_i] == letter_i for letter_i, paired_i in enumerate(plugboard)))
+
+    def test_hill_climb_plugboard(self):
+        """
+        Plugboard hill climb recovers the plugboard once rotor settings are known
+        """
+        plugboard_pairings = ["AV", "BS", "CG", "DL", "FU"]
+        ciphertext = enigma_run((2, 4, 5), list(plugboard_pairings), ['B', 'L', 'A'], ['A', 'A', 'A'], 'B', PLAINTEXT)
+        cipher_letters = ciphertext.encode("ascii").translate(LETTERS_TO_INDEXES)
+        rows = scrambler_rows((2, 4, 5), ('B', 'L', 'A'), ('A', 'A', 'A'), 'B', len(cipher_letters))
+
+        score, plugboard = hill_climb_plugboard(rows, cipher_letters, index_of_coincidence)
+        score, plugboard = hill_climb_plugboard(rows, cipher_letters, NgramScorer.from_corpus(PLAINTEXT, 3).score)
+
+        self.assertEqual(plugboard_to_pairings(plugboard), tuple(plugboard_pairings))
+        self.assertEqual(decrypt_letters(rows, cipher_letters, plugboard).translate(INDEXES_TO_LETTERS).decode("ascii"),
+                         PLAINTEXT)
+
+    def test_hill_climb_from_plugboard(self):
+        """
+        A climb starting from a given plugboard keeps it when no move improves the score
+        """
+        cipher_letters = PLAINTEXT.encode("ascii").translate(LETTERS_TO_INDEXES)
+        rows = scrambler_rows((2, 4, 5), ('B', 'L', 'A'), ('A', 'A', 'A'), 'B', len(cipher_letters))
+        plugboard = toggle_pairing(toggle_pairing(NO_PLUGBOARD, 0, 21), 1, 18)
+
+        self.assertEqual(hill_climb_plugboard(rows, cipher_letters, lambda letters: 0.0, plugboard=plugboard),
+                         (0.0, bytes(plugboard)))
+
+    def test_ciphertext_only_attack(self):
+        """
+        Settings and plaintext recovered end to end, with n-gram scorers trained on other text, the n-gram climbs
+        carrying on from the plugboard the index of coincidence climb found
+        """
+        plugboard_pairings = ["AV", "BS", "CG", "DL", "FU"]
+        ciphertext = enigma_run((2, 4, 5), list(plugboard_pairings), ['B', 'L', 'A'], ['A', 'A', 'A'], 'B', PLAINTEXT)
+        ngram_scorers = (NgramScorer.from_corpus(GERMAN_CORPUS, 2), NgramScorer.from_corpus(GERMAN_CORPUS, 3))
+
+        best = ciphertext_only_attack(ciphertext, rotor_orders=[(2, 4, 5)], reflectors=('B',), num_kept=1,
+                                      ngram_scorers=ngram_scorers)[0]
+
+        self.assertEqual(best["plugboard_pairings"], tuple(plugboard_pairings))
+        # ring settings are only found up to where the middle rotor turns over, the start of the message decrypts
+        self.assertEqual(best["plaintext"][:200], PLAINTEXT[:200])
+        self.assertEqual(enigma_run(best["rotor_choices"], list(best["plugboard_pairings"]),
+                                    list(best["initial_rotor_settings"]), list(best["ring_settings"]),
+                                    best["reflector"], ciphertext), best["plaintext"])
+
+        # an n-gram scorer that never improves keeps the index of coincidence climb's plugboard
+        ioc_pairings = ciphertext_only_attack(ciphertext, rotor_orders=[(2, 4, 5)], reflectors=('B',),
+                                              num_kept=1)[0]["plugboard_pairings"]
+        self.assertTrue(ioc_pairings)
+
+        with self.assertRaises(ValueError):
+            ciphertext_only_attack("HÄLLO", rotor_orders=[(2, 4, 5)], reflectors=('B',))
+        self.assertEqual(ciphertext_only_attack(ciphertext, rotor_orders=[(2, 4, 5)], reflectors=('B',), num_kept=1,
+                                                ngram_scorers=(NeverBetterScorer(),))[0]["plugboard_pairings"],
+                         ioc_pairings)
+
+
+if __name__ == '__main__':
+    unittest.main()
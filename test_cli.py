@@ -0,0 +1,118 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from cli import *
+
+SETTINGS_ARGS = ["--rotors", "2", "4", "5", "--plugboard", "AV", "BS", "--start", "BLA", "--ring", "2", "21", "12",
+                 "--reflector", "B"]
+
+
+def expected_output(message: str) -> str:
+    return enigma_run((2, 4, 5), ["AV", "BS"], ['B', 'L', 'A'], [2, 21, 12], 'B', message)
+
+
+class TestCli(unittest.TestCase):
+    def test_settings_priority(self):
+        """
+        Command line arguments override environment variables, which override the key file
+        """
+        environ = {"ENIGMA_ROTORS": "2 4 5", "ENIGMA_START": "B L A", "ENIGMA_REFLECTOR": "A"}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            key_path = os.path.join(temp_dir, "key.json")
+            with open(key_path, "w") as key_file:
+                json.dump({"rotors": [1, 2, 3], "plugboard": "AV BS", "start": "AAA", "ring": "2,21,12",
+                           "reflector": "C"}, key_file)
+
+            args = argparse.Namespace(key_file=key_path, rotors=None, plugboard=None, start=None, ring=None,
+                                      reflector="B")
+            self.assertEqual(resolve_settings(args, environ),
+                             ((2, 4, 5), ["AV", "BS"], ['B', 'L', 'A'], [2, 21, 12], "B"))
+
+        # no key file, so no ring settings
+        with self.assertRaises(ValueError):
+            resolve_settings(argparse.Namespace(key_file=None, rotors=None, plugboard=None, start=None, ring=None,
+                                                reflector="B"), environ)
+
+    def test_stdin_to_stdout(self):
+        """
+        stdin is encrypted/decrypted to stdout, with statistics on stderr
+        """
+        completed = subprocess.run([sys.executable, "cli.py"] + SETTINGS_ARGS, input=b"HELLO WORLD\n",
+                                   capture_output=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+        self.assertEqual(completed.stdout.decode("ascii"), expected_output("HELLO WORLD"))
+        self.assertIn("1 file(s), 12 bytes in, 10 bytes out", completed.stderr.decode("ascii"))
+
+    def test_directory_with_jobs(self):
+        """
+        Every file in a directory is a separate message, in parallel or not
+        """
+        messages = {"a.txt": "HELLO WORLD", os.path.join("sub", "b.txt"): "ATTACK AT DAWN" * 500,
+                    os.path.join("sub", "c.txt"): "NO"}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_dir = os.path.join(temp_dir, "archive")
+            for relative_path, message in messages.items():
+                os.makedirs(os.path.dirname(os.path.join(input_dir, relative_path)), exist_ok=True)
+                with open(os.path.join(input_dir, relative_path), "w") as message_file:
+                    message_file.write(message)
+
+            for jobs in ("1", "2"):
+                output_dir = os.path.join(temp_dir, "out" + jobs)
+                with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                    self.assertEqual(main(SETTINGS_ARGS + ["-o", output_dir, "-j", jobs, input_dir], environ={}), 0)
+                self.assertIn("3 file(s)", stderr.getvalue())
+
+                for relative_path, message in messages.items():
+                    with open(os.path.join(output_dir, "archive", relative_path)) as output_file:
+                        self.assertEqual(output_file.read(), expected_output(message))
+
+            # several inputs need an output directory, output may not overwrite input
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(main(SETTINGS_ARGS + [input_dir], environ={}), 2)
+                self.assertEqual(main(SETTINGS_ARGS + ["-o", temp_dir, input_dir], environ={}), 2)
+
+    def test_bad_settings_and_input(self):
+        """
+        Bad settings, missing settings and bad input
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            message_path = os.path.join(temp_dir, "message.txt")
+            with open(message_path, "w") as message_file:
+                message_file.write("HELLO 123")
+
+            with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                self.assertEqual(main(["--rotors", "2", "2", "5"] + SETTINGS_ARGS[4:] + [message_path],
+                                      environ={}), 1)
+                self.assertEqual(main(SETTINGS_ARGS[:4] + [message_path], environ={}), 2)
+                self.assertEqual(main(SETTINGS_ARGS + ["-o", os.path.join(temp_dir, "out"), message_path],
+                                      environ={}), 1)
+
+            self.assertIn("Bad Enigma settings", stderr.getvalue())
+            self.assertIn("Missing Enigma settings: start, ring, reflector", stderr.getvalue())
+            self.assertIn("Bad input string. Letters only.", stderr.getvalue())
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, "out", "message.txt")))
+
+            # a block size or job count below 1 is a usage error, not an empty output
+            for bad_count in (["--block-size", "0"], ["-j", "0"], ["--jobs", "-2"], ["--block-size", "x"]):
+                with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit) as exit_info:
+                    main(SETTINGS_ARGS + bad_count + [message_path], environ={})
+                self.assertEqual(exit_info.exception.code, 2)
+                self.assertIn("expected a whole number of at least 1", stderr.getvalue())
+
+        # rejected after the first blocks were encrypted, nothing is written to stdout
+        completed = subprocess.run([sys.executable, "enigma_stream.py", "--block-size", "4"] + SETTINGS_ARGS,
+                                   input=b"HELLO WORLD 123\n", capture_output=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual((completed.returncode, completed.stdout), (1, b""))
+        self.assertIn(b"Bad input string. Letters only.", completed.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
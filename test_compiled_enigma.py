@@ -0,0 +1,89 @@
+import random
+import unittest
+from compiled_enigma import *
+
+
+class TestCompiledEnigma(unittest.TestCase):
+    def test_sample_msg_decrypt(self):
+        """
+        Operation Barbarossa, 1941 Part 1 (same message as test_msg_2_decrypt)
+        """
+        rotor_choices = (2, 4, 5)
+        plugboard_pairings = ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"]
+        initial_rotor_settings = ['B', 'L', 'A']
+        ring_settings = [2, 21, 12]
+        reflector = 'B'
+        encrypted_msg = "EDPUDNRGYSZRCXNUYTPOMRMBOFKTBZREZKMLXLVEFGUEYSIOZVEQMIKUBPMMYLKLTTDEISMDICAGYKUACTCDOMOHWXMUUIAUBSTSLRNBZSZWNRFXWFYSSXJZVIJHIDISHPRKLKAYUPADTXQSPINQMATLPIFSVKDASCTACDPBOPVHJK"
+        decrypted_msg = "AUFKLXABTEILUNGXVONXKURTINOWAXKURTINOWAXNORDWESTLXSEBEZXSEBEZXUAFFLIEGERSTRASZERIQTUNGXDUBROWKIXDUBROWKIXOPOTSCHKAXOPOTSCHKAXUMXEINSAQTDREINULLXUHRANGETRETENXANGRIFFXINFXRGTX"
+
+        self.assertEqual(enigma_run_compiled(rotor_choices, plugboard_pairings,
+                                             initial_rotor_settings, ring_settings,
+                                             reflector, encrypted_msg), decrypted_msg)
+
+    def test_bad_settings(self):
+        """
+        Bad settings and bad input give the same messages as enigma_run()
+        """
+        self.assertEqual(enigma_run_compiled((2, 2, 3), ["AM"], ['A', 'B', 'L'], [24, 13, 22], 'A', "aaa"),
+                         "Bad Enigma settings")
+        self.assertEqual(enigma_run_compiled((2, 1, 3), ["AM"], ['A', 'B', 'L'], [24, 13, 22], 'A', "a1"),
+                         "Bad input string. Letters only.")
+
+    def test_non_ascii_letters(self):
+        """
+        Letters outside A-Z that sanitize_input_text() accepts give the same output as enigma_run()
+        """
+        settings = ((2, 4, 5), ["AV", "BS", "CG", "DL"], ['B', 'L', 'A'], ['B', 'U', 'L'], 'B')
+
+        for input_str in ("HÄLLO", "straße", "ÉÈÊabcÑ", "ΑΒΓΔ", "Ω" * 700):
+            self.assertEqual(enigma_run_compiled(*settings, input_str), enigma_run(*settings, input_str))
+
+        compiled_machine = CompiledEnigma(Enigma(*settings))
+        self.assertEqual(compiled_machine.encrypt_decrypt("HÄ") + compiled_machine.encrypt_decrypt("LLÖ"),
+                         Enigma(*settings).encrypt_decrypt("HÄLLÖ"))
+
+        # plugboard letters must be A-Z (either case), in every engine
+        for plugboard_pairings in (["ÄB"], ["AV", "ßC"], ["av", "bs"]):
+            self.assertEqual(enigma_run_compiled(settings[0], list(plugboard_pairings), *settings[2:], "HELLO"),
+                             enigma_run(settings[0], list(plugboard_pairings), *settings[2:], "HELLO"))
+        self.assertEqual(enigma_run_compiled(settings[0], ["ÄB"], *settings[2:], "HELLO"), "Bad Enigma settings")
+
+    def test_matches_enigma_random_settings(self):
+        """
+        Random settings and long messages (to go through many turnovers) match Enigma.encrypt_decrypt()
+        """
+        rng = random.Random(7)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+        for _ in range(25):
+            rotor_choices = tuple(rng.sample(range(1, 6), 3))
+            plug_letters = rng.sample(alphabet, 20)
+            plugboard_pairings = tuple(plug_letters[i] + plug_letters[i + 1] for i in range(0, rng.randint(0, 10) * 2, 2))
+            initial_rotor_settings = tuple(rng.choice(alphabet) for _ in range(3))
+            ring_settings = tuple(rng.choice(alphabet) for _ in range(3))
+            reflector = rng.choice("ABC")
+            msg = "".join(rng.choice(alphabet) for _ in range(800))
+
+            enigma_machine = Enigma(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector)
+            compiled_machine = CompiledEnigma(Enigma(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                                     ring_settings, reflector))
+
+            # split the message to check rotor positions are kept between calls
+            self.assertEqual(compiled_machine.encrypt_decrypt(msg[:300]) + compiled_machine.encrypt_decrypt(msg[300:]),
+                             enigma_machine.encrypt_decrypt(msg))
+
+    def test_compile_all(self):
+        """
+        Building every rotor state up front gives the same output as building them as they are reached
+        """
+        settings = ((1, 2, 3), ("HK", "CN", "IO"), ('R', 'A', 'O'), ('W', 'N', 'M'), 'B')
+        lazy_machine = CompiledEnigma(Enigma(*settings))
+        eager_machine = CompiledEnigma(Enigma(*settings))
+        eager_machine.compile_all()
+
+        self.assertEqual(sum(eager_machine.states_built), NUM_ROTOR_STATES)
+        self.assertEqual(eager_machine.encrypt_decrypt("HELLOWORLD" * 50), lazy_machine.encrypt_decrypt("HELLOWORLD" * 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
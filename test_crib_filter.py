@@ -0,0 +1,57 @@
+import random
+import unittest
+from crib_filter import *
+from bombe import Menu
+from enigma import enigma_run
+
+
+class TestCribFilter(unittest.TestCase):
+    def test_offsets_match_letter_by_letter_check(self):
+        """
+        Same offsets as checking every offset letter by letter, and the crib's real offset survives
+        """
+        rng = random.Random(0)
+        plaintext = "".join(chr(rng.randrange(65, 91)) for _ in range(3000))
+        plaintext = plaintext[:1234] + "WETTERVORHERSAGE" + plaintext[1250:]
+        ciphertext = enigma_run((2, 4, 5), ["AV", "BS", "CG"], ['Q', 'E', 'V'], ['A', 'A', 'A'], 'B', plaintext)
+
+        offsets = find_crib_offsets(ciphertext.lower(), "Wetter vorhersage")
+        self.assertEqual(offsets, [offset for offset in range(len(ciphertext) - 15)
+                                   if all(ciphertext[offset + crib_i] != crib_letter
+                                          for crib_i, crib_letter in enumerate("WETTERVORHERSAGE"))])
+        self.assertIn(1234, offsets)
+        self.assertLess(len(offsets), len(ciphertext) * 0.6)
+
+    def test_edge_cases(self):
+        """
+        Crib longer than the ciphertext, crib filling the ciphertext, bad input
+        """
+        self.assertEqual(find_crib_offsets(b"ABC", b"XYZW"), [])
+        self.assertEqual(find_crib_offsets(b"ABC", b"BCA"), [0])
+        self.assertEqual(find_crib_offsets(b"ABC", b"ABA"), [])
+        self.assertEqual(find_crib_offsets(b"AAAA", b"BB"), [0, 1, 2])
+        with self.assertRaises(ValueError):
+            find_crib_offsets("ABC1", "AB")
+
+    def test_ranking(self):
+        """
+        Loop counts match the bombe's menus, best menus first
+        """
+        rng = random.Random(1)
+        ciphertext = bytes(rng.randrange(65, 91) for _ in range(2000))
+        crib = b"WETTERVORHERSAGEBISKAYA"
+
+        ranked = rank_crib_offsets(ciphertext, crib)
+        self.assertEqual(len(ranked), len(find_crib_offsets(ciphertext, crib)))
+
+        for ranking in ranked[:20] + ranked[-20:]:
+            menu = Menu(ciphertext, crib, ranking["crib_offset"])
+            self.assertEqual((ranking["num_loops"], ranking["menu_letters"]),
+                             (menu.num_loops, len(menu.test_component)))
+
+        self.assertEqual(rank_crib_offsets(ciphertext, crib, top=5), ranked[:5])
+        self.assertTrue(all(ranked[i]["num_loops"] >= ranked[i + 1]["num_loops"] for i in range(len(ranked) - 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import concurrent.futures
+import unittest
+from unittest import mock
+
+from crib_search import *
+
+
+class TestCribSearch(unittest.TestCase):
+    def setUp(self):
+        self.plaintext = "WETTERVORHERSAGEBISKAYA"
+        self.ciphertext = enigma_run((2, 4, 5), [], ['Q', 'E', 'V'], ['A', 'A', 'A'], 'B', self.plaintext)
+
+    def test_search_single_worker(self):
+        """
+        Crib at the start of the message, searched in this process
+        """
+        progress = []
+        matches = search_settings(self.ciphertext, "WETTERVORHERSAGE", rotor_orders=[(1, 2, 3), (2, 4, 5)],
+                                  reflectors=('B',), workers=1,
+                                  progress_callback=lambda done, total, found: progress.append((done, total)))
+
+        self.assertEqual(matches[0]["rotor_choices"], (2, 4, 5))
+        self.assertEqual(matches[0]["initial_rotor_settings"], ('Q', 'E', 'V'))
+        self.assertEqual(progress[-1][1], 16)
+
+    def test_search_process_pool(self):
+        """
+        Crib in the middle of the message, searched across a process pool
+        """
+        matches = search_settings(self.ciphertext, "BISKAYA", crib_offset=16, rotor_orders=[(2, 4, 5), (5, 4, 2)],
+                                  reflectors=('A', 'B'), workers=2, stop_at_first=False)
+
+        self.assertIn(((2, 4, 5), ('Q', 'E', 'V'), 'B'),
+                      [(match["rotor_choices"], match["initial_rotor_settings"], match["reflector"]) for match in matches])
+
+    def test_search_process_pool_window(self):
+        """
+        Only a few work units per worker are handed to the process pool at a time, not all 5408 with every ring
+        setting
+        """
+        submit = concurrent.futures.ProcessPoolExecutor.submit
+        with mock.patch.object(concurrent.futures.ProcessPoolExecutor, "submit", autospec=True,
+                               side_effect=submit) as mock_submit:
+            matches = search_settings(self.ciphertext, "WETTERVORHERSAGE", rotor_orders=[(2, 4, 5)], reflectors=('B',),
+                                      ring_settings_options=ALL_RING_SETTINGS, workers=2)
+
+        self.assertEqual(matches[0]["initial_rotor_settings"], ('Q', 'E', 'V'))
+        self.assertLessEqual(mock_submit.call_count, 8 + 2 * PENDING_WORK_UNITS_PER_WORKER)
+
+    def test_search_ring_settings(self):
+        """
+        Middle rotor turning over inside the crib, found with the right ring setting out of ALL_RING_SETTINGS
+        """
+        ciphertext = enigma_run((2, 4, 5), [], ['Q', 'E', 'S'], ['A', 'A', 'C'], 'B', self.plaintext)
+        ring_settings_options = [ring_settings for ring_settings in ALL_RING_SETTINGS if ring_settings[1] == 'A']
+
+        matches = search_settings(ciphertext, self.plaintext, rotor_orders=[(2, 4, 5)], reflectors=('B',),
+                                  ring_settings_options=ring_settings_options, workers=1, stop_at_first=False)
+
+        self.assertEqual(len(ALL_RING_SETTINGS), 676)
+        self.assertIn((('Q', 'E', 'S'), ('A', 'A', 'C')),
+                      [(match["initial_rotor_settings"], match["ring_settings"]) for match in matches])
+        self.assertNotIn(('A', 'A', 'A'), [match["ring_settings"] for match in matches])
+
+    def test_bad_crib_offset(self):
+        """
+        Crib that does not fit in the ciphertext
+        """
+        with self.assertRaises(ValueError):
+            search_settings(self.ciphertext, "BISKAYA", crib_offset=20, workers=1)
+
+        # letters the machine does not have
+        with self.assertRaisesRegex(ValueError, "Letters only"):
+            search_settings(self.ciphertext, "WETTERVORHERSÄGE", workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
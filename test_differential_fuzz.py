@@ -0,0 +1,72 @@
+import contextlib
+import io
+import random
+import unittest
+from differential_fuzz import *
+
+
+def broken_engine(rotor_choices: tuple, plugboard_pairings: list, initial_rotor_settings: list, ring_settings: list,
+                  reflector: str, input_str: str = None) -> str:
+    """ enigma_run(), except the 6th letter is one letter off when the right ring setting is not 'A'. """
+
+    output_text = enigma_run(rotor_choices, plugboard_pairings, initial_rotor_settings, ring_settings, reflector,
+                             input_str)
+
+    if output_text.startswith("Bad") or len(output_text) < 6 or ring_settings[-1] in ('A', 1):
+        return output_text
+
+    return output_text[:5] + shift_letter(output_text[5], 1) + output_text[6:]
+
+
+class TestDifferentialFuzz(unittest.TestCase):
+    def test_engines_match_reference(self):
+        """
+        No mismatches between any engine and enigma_run() over random cases
+        """
+        for engine_name, engine in get_engines().items():
+            with self.subTest(engine=engine_name):
+                results = fuzz_engine(engine, num_cases=60, seed=5)
+                self.assertEqual(results["cases"], 60)
+                self.assertEqual(results["mismatches"], [])
+
+    def test_random_cases(self):
+        """
+        Same seed same cases, cases lean towards turnover points and include letters outside A-Z and bad settings and
+        input
+        """
+        cases = [random_case(random.Random(seed)) for seed in range(300)]
+        self.assertEqual(cases, [random_case(random.Random(seed)) for seed in range(300)])
+
+        outputs = [run_engine(enigma_run, case) for case in cases]
+        self.assertIn("Bad Enigma settings", outputs)
+        self.assertTrue(any(not case["plaintext"].isascii() for case in cases))
+        self.assertTrue(any(case["start"][-1] in ROTOR_CATALOG[case["rotors"][-1]][2] for case in cases))
+
+    def test_mismatches_are_shrunk(self):
+        """
+        A broken engine is caught and its mismatches shrunk to the smallest failing case
+        """
+        results = fuzz_engine(broken_engine, num_cases=200, seed=3, max_mismatches=2)
+        self.assertEqual(len(results["mismatches"]), 2)
+
+        for mismatch in results["mismatches"]:
+            shrunk_case = mismatch["shrunk_case"]
+            self.assertNotEqual(mismatch["expected"], mismatch["output"])
+            self.assertEqual(shrunk_case["plaintext"], "AAAAAA")
+            self.assertEqual(shrunk_case["plugboard"], [])
+            self.assertEqual(shrunk_case["start"], "A" * len(shrunk_case["start"]))
+            self.assertEqual(shrunk_case["ring"][:-1], "A" * (len(shrunk_case["ring"]) - 1))
+            self.assertEqual(shrunk_case["rotors"], mismatch["case"]["rotors"])
+
+    def test_main(self):
+        """
+        Exit status 0 when every engine matches
+        """
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main(["--engine", "compiled", "--cases", "20", "--seed", "1"]), 0)
+        self.assertIn("0 mismatches", stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
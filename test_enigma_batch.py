@@ -0,0 +1,51 @@
+import unittest
+from enigma_batch import *
+
+
+class TestEnigmaBatch(unittest.TestCase):
+    def setUp(self):
+        barbarossa = ((2, 4, 5), ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"], ['B', 'L', 'A'],
+                      [2, 21, 12], 'B')
+        barbarossa_2 = ((2, 4, 5), ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"], ['L', 'S', 'D'],
+                        [2, 21, 12], 'B')
+        manual = ((2, 1, 3), ["AM", "FI", "NV", "PS", "TU", "WZ"], ['A', 'B', 'L'], [24, 13, 22], 'A')
+        manual_float_rotor = ((2.0, 1, 3),) + manual[1:]  # equal to manual's key, but a bad rotor choice
+
+        self.records = [(barbarossa, "EDPUDNRGYSZRCXNUYTPOMRMBOFKTBZREZKMLXLVEFGUEYSIOZVEQMIKUBPMMYLKLTTDEISMDICAGYKU"),
+                        (manual, "GCDSEAHUGWTQGRKVLFGXUCALXVYMIGMMNMFDXTGNVHVRMMEVOUYFZSLRHDRRXFJWCFHUHMUNZEFRDIS"),
+                        (barbarossa_2, "SFBWDNJUSEGQOBHKRTAREEZMWKPPRBXOHDROEQGBBGTQVPGVKBVVGBIMHUSZYDAJQIROAXSSSNR"),
+                        (manual, "   "),
+                        (((2, 2, 3), ["AM"], ['A', 'B', 'L'], [24, 13, 22], 'A'), "aaa"),
+                        (((2, 1, 3), ["AM"], ['A', 'B'], [24, 13, 22], 'A'), "aaa"),
+                        (manual_float_rotor, "aaa"),
+                        (barbarossa, "edpud nrgys")]
+
+        self.expected = [enigma_run(settings[0], list(settings[1]), list(settings[2]), list(settings[3]), settings[4],
+                                    message) for settings, message in self.records]
+
+    def test_serial(self):
+        """
+        Serial batch matches enigma_run() on every record, in order
+        """
+        machine_cache = MachineCache()
+
+        self.assertEqual(enigma_run_batch(self.records, machine_cache=machine_cache), self.expected)
+        self.assertEqual(machine_cache.get_stats()["misses"], 5)
+
+    def test_thread_and_process(self):
+        """
+        Thread and process batches give the same output as serial
+        """
+        self.assertEqual(enigma_run_batch(self.records, executor="thread", workers=2), self.expected)
+        self.assertEqual(enigma_run_batch(self.records, executor="process", workers=2), self.expected)
+
+    def test_bad_executor(self):
+        """
+        Unknown executor
+        """
+        with self.assertRaises(ValueError):
+            enigma_run_batch(self.records, executor="gpu")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from enigma_profiler import *
+from enigma import *
+
+SETTINGS = ((2, 4, 5), ("AV", "BS", "CG"), ('B', 'L', 'A'), ('B', 'U', 'L'), 'B')
+
+
+class TestEnigmaProfiler(unittest.TestCase):
+    def test_counts_and_output(self):
+        """
+        Every stage is counted once per letter (twice for the plugboard) and output is unchanged
+        """
+        enigma_machine = Enigma(*SETTINGS)
+        plugboard = enigma_machine.plugboard
+
+        with enigma_machine.profile() as profiler:
+            self.assertIsInstance(enigma_machine.plugboard, ComponentProxy)
+            self.assertEqual(enigma_machine.plugboard.plugboard_table, plugboard.plugboard_table)
+            output_text = enigma_machine.encrypt_decrypt("HELLOWORLD")
+
+        self.assertEqual(output_text, Enigma(*SETTINGS).encrypt_decrypt("HELLOWORLD"))
+        self.assertEqual(profiler.calls, {"encrypt_decrypt": 1, "advance_rotors": 10, "plugboard_cipher": 20,
+                                          "right_to_left_cipher": 10, "reflector_cipher": 10,
+                                          "left_to_right_cipher": 10})
+        self.assertTrue(all(total_ns > 0 for total_ns in profiler.total_ns.values()))
+        self.assertGreaterEqual(profiler.total_ns["encrypt_decrypt"], profiler.total_ns["right_to_left_cipher"])
+
+        # the machine is back to its own methods and components
+        self.assertIs(enigma_machine.plugboard, plugboard)
+        self.assertNotIn("advance_rotors", vars(enigma_machine))
+        enigma_machine.encrypt_decrypt("MORE")
+        self.assertEqual(profiler.calls["encrypt_decrypt"], 1)
+
+    def test_several_machines_and_nesting(self):
+        """
+        One profiler adds up several machines, a machine cannot be profiled twice at once
+        """
+        enigma_machines = [Enigma(*SETTINGS), Enigma(*SETTINGS)]
+
+        with profile_enigma(*enigma_machines) as profiler:
+            for enigma_machine in enigma_machines:
+                enigma_machine.encrypt_decrypt("ABC")
+
+            with self.assertRaises(ValueError):
+                with enigma_machines[0].profile():
+                    pass
+
+            # the failed profiling did not undo this one
+            self.assertIsInstance(enigma_machines[0].plugboard, ComponentProxy)
+
+        self.assertEqual(profiler.calls["advance_rotors"], 6)
+        profiler.reset()
+        self.assertEqual(profiler.get_stats()["advance_rotors"], {"calls": 0, "total_ns": 0, "mean_ns": 0.0})
+
+    def test_exports(self):
+        """
+        JSON and Prometheus exports hold every stage
+        """
+        enigma_machine = Enigma(*SETTINGS)
+        with enigma_machine.profile() as profiler:
+            enigma_machine.encrypt_decrypt("HELLO")
+
+        stats = json.loads(profiler.to_json())["stages"]
+        self.assertEqual(set(stats), set(PROFILED_STAGES))
+        self.assertEqual(stats["plugboard_cipher"]["calls"], 10)
+
+        prometheus_lines = profiler.to_prometheus().splitlines()
+        self.assertIn('enigma_stage_calls_total{stage="reflector_cipher"} 5', prometheus_lines)
+        self.assertIn("# TYPE enigma_stage_seconds_total counter", prometheus_lines)
+        self.assertEqual(len([line for line in prometheus_lines if not line.startswith("#")]),
+                         2 * len(PROFILED_STAGES))
+
+
+if __name__ == '__main__':
+    unittest.main()
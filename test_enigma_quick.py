@@ -0,0 +1,64 @@
+import contextlib
+import io
+import subprocess
+import sys
+import unittest
+from benchmark import IMPORT_TIME_BUDGET, measure_import_time, random_letters
+from enigma_quick import *
+
+
+class TestEnigmaQuick(unittest.TestCase):
+    def test_quick_run_matches_enigma_run(self):
+        """
+        Short messages (plain Enigma) and long messages (CompiledEnigma) give the same output as enigma_run()
+        """
+        for input_str in ("hello world", random_letters(QUICK_COMPILE_THRESHOLD * 3), "a1", None):
+            self.assertEqual(quick_run((2, 4, 5), ["AV", "BS"], ['B', 'L', 'A'], [2, 21, 12], 'B', input_str),
+                             enigma_run((2, 4, 5), ["AV", "BS"], ['B', 'L', 'A'], [2, 21, 12], 'B', input_str))
+
+        self.assertEqual(quick_run((2, 2, 5), [], ['B', 'L', 'A'], [2, 21, 12], 'B', random_letters(1000)),
+                         "Bad Enigma settings")
+
+    def test_main(self):
+        """
+        Settings from the command line, message from an argument or stdin
+        """
+        expected = enigma_run(('BETA', 2, 4, 5), [], ['A', 'B', 'L', 'A'], ['A', 2, 21, 12], 'B-THIN', "HELLOWORLD")
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(main(["BETA,2,4,5", "ABLA", "1,2,21,12", "b-thin", "-", "HELLO WORLD"]), 0)
+        self.assertEqual(stdout.getvalue(), expected + "\n")
+
+        stdout = io.StringIO()
+        stdin, sys.stdin = sys.stdin, io.StringIO("HELLO WORLD\n")
+        try:
+            with contextlib.redirect_stdout(stdout):
+                self.assertEqual(main(["BETA,2,4,5", "ABLA", "A,2,21,12", "B-THIN"]), 0)
+        finally:
+            sys.stdin = stdin
+        self.assertEqual(stdout.getvalue(), expected + "\n")
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["2,4,5", "BLA"]), 2)
+            self.assertEqual(main(["2,4,5", "BLA", "BUL", "Z", "-", "HELLO"]), 1)
+
+    def test_minimal_imports(self):
+        """
+        Importing the entry point does not load argparse, json, NumPy, multiprocessing or the compiled engine
+        """
+        heavy_modules = ("argparse", "json", "numpy", "multiprocessing", "concurrent.futures", "compiled_enigma")
+        completed = subprocess.run([sys.executable, "-c", "import sys, enigma_quick; print(sorted(set(%r) & "
+                                                          "set(sys.modules)))" % (heavy_modules,)],
+                                   capture_output=True, text=True, check=True)
+        self.assertEqual(completed.stdout.strip(), "[]")
+
+    def test_import_time_budget(self):
+        """
+        Cold-start import of the entry point stays under IMPORT_TIME_BUDGET
+        """
+        self.assertLess(measure_import_time("enigma_quick")["seconds_per_call"], IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import random
+import unittest
+from enigma import *
+
+
+class TestEnigmaReset(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(8)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        self.msg = "".join(rng.choice(alphabet) for _ in range(1000))
+
+        # middle rotor one step before its turnover point, the M4, then random settings
+        self.settings_list = [((1, 2, 3), ("AB",), ('A', 'D', 'U'), ('A', 'A', 'A'), 'B'),
+                              (('BETA', 5, 4, 3), ("QW", "ER"), ('C', 'Z', 'J', 'Y'), ('A', 'C', 'F', 'X'), 'B-THIN')]
+        for _ in range(4):
+            self.settings_list.append((tuple(rng.sample(range(1, 9), 3)), ("MN", "KL"),
+                                       tuple(rng.choice(alphabet) for _ in range(3)),
+                                       tuple(rng.choice(alphabet) for _ in range(3)), rng.choice("ABC")))
+
+    def test_reset_matches_new_machine(self):
+        """
+        Resetting to the starting positions or to new ones gives the same output as setting up a new machine
+        """
+        for settings in self.settings_list:
+            enigma_machine = Enigma(*settings)
+            full_output = enigma_machine.encrypt_decrypt(self.msg)
+
+            enigma_machine.reset()
+            self.assertEqual(enigma_machine.tell(), 0)
+            self.assertEqual(enigma_machine.encrypt_decrypt(self.msg), full_output)
+
+            new_positions = tuple("QEVX"[:len(settings[2])])
+            enigma_machine.reset(new_positions)
+            self.assertEqual(enigma_machine.encrypt_decrypt(self.msg),
+                             Enigma(settings[0], settings[1], new_positions, settings[3], settings[4])
+                             .encrypt_decrypt(self.msg))
+
+            # seek() counts from the new starting positions
+            enigma_machine.seek(500)
+            self.assertEqual(enigma_machine.encrypt_decrypt(self.msg[500:]),
+                             Enigma(settings[0], settings[1], new_positions, settings[3], settings[4])
+                             .encrypt_decrypt(self.msg)[500:])
+
+            with self.assertRaises(ValueError):
+                enigma_machine.reset(('A', 'A'))
+
+            # bad positions are rejected and leave the machine where it was
+            for bad_positions in (('1', 'A', 'A', 'A'), ('A', 'A', 'Z9', 'A'), ('é', 'A', 'A', 'A'), (0, 27, 'A', 'A')):
+                with self.assertRaises(ValueError):
+                    enigma_machine.reset(bad_positions[:len(settings[2])])
+            self.assertEqual(enigma_machine.tell(), len(self.msg))
+
+            # lowercase letters and ints 1-26 are accepted, as when setting up a new machine
+            new_output = Enigma(settings[0], settings[1], new_positions, settings[3], settings[4]) \
+                .encrypt_decrypt(self.msg)
+            for new_positions_given in ("qevx", (17, 'e', 22, 24)):
+                enigma_machine.reset(tuple(new_positions_given[:len(settings[2])]))
+                self.assertEqual(enigma_machine.encrypt_decrypt(self.msg), new_output)
+
+    def test_snapshot_restore(self):
+        """
+        Restoring a snapshot continues exactly where it was taken, on the same machine or on a clone
+        """
+        for settings in self.settings_list:
+            enigma_machine = Enigma(*settings)
+            full_output = enigma_machine.encrypt_decrypt(self.msg)
+
+            enigma_machine.reset()
+            enigma_machine.encrypt_decrypt(self.msg[:333])
+            snapshot = enigma_machine.snapshot()
+            self.assertEqual(enigma_machine.encrypt_decrypt(self.msg[333:]), full_output[333:])
+
+            enigma_machine.restore(snapshot)
+            self.assertEqual(enigma_machine.tell(), 333)
+            self.assertEqual(enigma_machine.encrypt_decrypt(self.msg[333:]), full_output[333:])
+
+            other_machine = Enigma(*settings).clone()
+            other_machine.restore(snapshot)
+            self.assertEqual(other_machine.encrypt_decrypt(self.msg[333:]), full_output[333:])
+            other_machine.reset()
+            self.assertEqual(other_machine.encrypt_decrypt(self.msg), full_output)
+
+        with self.assertRaises(ValueError):
+            Enigma(*self.settings_list[0]).restore(Enigma(*self.settings_list[1]).snapshot())
+
+    def test_clone(self):
+        """
+        Clones share the wiring, but step their own rotors
+        """
+        for settings in self.settings_list:
+            template = Enigma(*settings)
+            template.encrypt_decrypt(self.msg[:100])
+            snapshot = template.snapshot()
+
+            clones = [template.clone() for _ in range(3)]
+            outputs = [clone.encrypt_decrypt(self.msg[100:]) for clone in clones]
+
+            self.assertEqual(template.snapshot(), snapshot)
+            self.assertEqual(set(outputs), {Enigma(*settings).encrypt_decrypt(self.msg)[100:]})
+            self.assertEqual(clones[0].tell(), len(self.msg))
+
+            self.assertIs(clones[0].plugboard, template.plugboard)
+            self.assertIs(clones[0].reflector, template.reflector)
+            for rotor, template_rotor in zip(clones[0].rotors_used, template.rotors_used):
+                self.assertIsNot(rotor, template_rotor)
+                self.assertIs(rotor.rotor_outputs, template_rotor.rotor_outputs)
+                self.assertIs(rotor.notch_flags, template_rotor.notch_flags)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -293,6 +293,38 @@ class TestEnigma(unittest.TestCase):
                                     initial_rotor_settings, ring_settings,
                                     reflector, input_str), error_msg)
 
+    def test_msg_10_bad_settings(self):
+        """
+        Bad settings (starting rotor position that is a letter, but not A-Z)
+        """
+        rotor_choices = (1, 2, 3)
+        plugboard_pairings = []
+        initial_rotor_settings = ['A', 'A', 'é']
+        ring_settings = ['A', 'A', 'A']
+        reflector = 'B'
+        input_str = "HELLO"
+        error_msg = "Bad Enigma settings"
+
+        self.assertEqual(enigma_run(rotor_choices, plugboard_pairings,
+                                    initial_rotor_settings, ring_settings,
+                                    reflector, input_str), error_msg)
+
+    def test_msg_10a_bad_settings(self):
+        """
+        Bad settings (ring setting that is a letter, but not A-Z)
+        """
+        rotor_choices = (1, 2, 3)
+        plugboard_pairings = []
+        initial_rotor_settings = ['A', 'A', 'A']
+        ring_settings = ['Ä', 'A', 'A']
+        reflector = 'B'
+        input_str = "HELLO"
+        error_msg = "Bad Enigma settings"
+
+        self.assertEqual(enigma_run(rotor_choices, plugboard_pairings,
+                                    initial_rotor_settings, ring_settings,
+                                    reflector, input_str), error_msg)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+import random
+import unittest
+from compiled_enigma import *
+
+
+class TestEnigmaSeek(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        self.msg = "".join(rng.choice(alphabet) for _ in range(20000))
+
+        # right rotor one step before its turnover point, then random settings
+        self.settings_list = [((1, 2, 3), ("AB",), ('A', 'D', 'U'), ('A', 'A', 'A'), 'B'),
+                              ((5, 4, 3), ("QW", "ER"), ('Z', 'J', 'Y'), ('C', 'F', 'X'), 'C')]
+        for _ in range(4):
+            self.settings_list.append((tuple(rng.sample(range(1, 6), 3)), ("MN",),
+                                       tuple(rng.choice(alphabet) for _ in range(3)),
+                                       tuple(rng.choice(alphabet) for _ in range(3)), rng.choice("ABC")))
+
+    def test_seek_matches_stepping(self):
+        """
+        Seeking to a keypress and continuing gives the same output as stepping through every keypress
+        """
+        for settings in self.settings_list:
+            full_output = Enigma(*settings).encrypt_decrypt(self.msg)
+
+            enigma_machine = Enigma(*settings)
+            for num_keypresses in (0, 1, 25, 675, 676, 677, 5000, 17576, 19999):
+                enigma_machine.seek(num_keypresses)
+                self.assertEqual(enigma_machine.tell(), num_keypresses)
+                self.assertEqual(enigma_machine.encrypt_decrypt(self.msg[num_keypresses:num_keypresses + 300]),
+                                 full_output[num_keypresses:num_keypresses + 300])
+
+    def test_compiled_seek(self):
+        """
+        CompiledEnigma seek() and tell() match Enigma
+        """
+        for settings in self.settings_list:
+            enigma_machine = Enigma(*settings)
+            compiled_machine = CompiledEnigma(Enigma(*settings))
+
+            enigma_machine.encrypt_decrypt(self.msg[:12345])
+            compiled_machine.seek(12345)
+
+            self.assertEqual(compiled_machine.positions, [rotor.get_rotor_pos_i() for rotor in enigma_machine.rotors_used])
+            self.assertEqual(compiled_machine.encrypt_decrypt(self.msg[12345:13000]),
+                             enigma_machine.encrypt_decrypt(self.msg[12345:13000]))
+            self.assertEqual(compiled_machine.tell(), enigma_machine.tell())
+
+    def test_seek_negative(self):
+        """
+        Negative keypress count
+        """
+        with self.assertRaises(ValueError):
+            Enigma(*self.settings_list[0]).seek(-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import unittest
+from enigma_load import *
+
+
+async def send_lines(port: int, lines: list) -> list:
+    """ Send every line at once over one connection and output the responses, sorted by id. """
+
+    reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+    writer.write(b"".join(line + b"\n" for line in lines))
+    await writer.drain()
+
+    responses = [json.loads(await reader.readline()) for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+
+    return sorted(responses, key=lambda response: (response["id"] is None, response["id"] or 0))
+
+
+async def run_server(requests: list, executor: str, max_pending: int = DEFAULT_MAX_PENDING,
+                     batch_size: int = SERVER_BATCH_SIZE) -> tuple:
+    """ Start a server, send requests (dicts or raw lines) over one connection, then output responses and stats. """
+
+    enigma_server = EnigmaServer(1, max_pending, batch_size, executor)
+    host, port = await enigma_server.start(DEFAULT_HOST, 0)
+
+    try:
+        lines = [request if isinstance(request, bytes) else json.dumps(request).encode() for request in requests]
+        return await send_lines(port, lines), enigma_server.get_stats()
+    finally:
+        await enigma_server.close()
+
+
+class TestEnigmaServer(unittest.TestCase):
+    def test_latency_histogram(self):
+        """
+        Percentiles are within a bucket (9%) of the exact value
+        """
+        latency = LatencyHistogram()
+        for latency_ms in range(1, 1001):
+            latency.record(latency_ms / 1000)
+
+        stats = latency.get_stats()
+        self.assertEqual(stats["count"], 1000)
+        self.assertTrue(500 <= stats["p50_ms"] <= 500 * 1.09)
+        self.assertTrue(990 <= stats["p99_ms"] <= 1000)
+        self.assertEqual(stats["max_ms"], 1000)
+        self.assertEqual(LatencyHistogram().percentile(0.5), 0.0)
+
+    def test_requests(self):
+        """
+        Outputs match enigma_run() on both worker pools, bad requests get an error
+        """
+        requests = build_requests(20, 50, 3)
+        expected = [enigma_run(tuple(request["rotors"]), request["plugboard"], list(request["start"]),
+                               list(request["ring"]), request["reflector"], request["message"])
+                    for request in requests]
+
+        bad_requests = [dict(requests[0], id=100, rotors=[1, 1, 2]), dict(requests[0], id=101, message="HELLO1"),
+                        {"id": 102, "rotors": [1, 2, 3]}, b"not json"]
+
+        for executor in SERVER_EXECUTORS:
+            responses, stats = asyncio.run(run_server(requests + bad_requests, executor))
+
+            self.assertEqual([response.get("output") for response in responses[:20]], expected)
+            self.assertEqual([response["error"] for response in responses[20:22]],
+                             ["Bad Enigma settings", "Bad input string. Letters only."])
+            self.assertIn("Missing request fields: start, ring, reflector, message", responses[22]["error"])
+            self.assertTrue(responses[23]["error"].startswith("Bad request"))
+            self.assertEqual((stats["requests"], stats["errors"], stats["latency"]["count"]), (24, 4, 24))
+
+    def test_backpressure(self):
+        """
+        With a tiny queue, reading stops while the queue is full and every request is still answered
+        """
+        requests = build_requests(200, 20, 2) + [{"id": 200, "op": "stats"}]
+        responses, stats = asyncio.run(run_server(requests, "thread", max_pending=2, batch_size=1))
+
+        self.assertEqual(len(responses), 201)
+        self.assertTrue(all("output" in response for response in responses[:200]))
+        self.assertEqual(stats["requests"], 200)
+        self.assertEqual(stats["max_queued"], 2)
+
+    def test_load_generator(self):
+        """
+        The load generator reports every request against a spawned server
+        """
+        server_process, port = spawn_server(workers=1)
+        try:
+            stats = asyncio.run(run_load(DEFAULT_HOST, port, build_requests(100, 20, 2), 2, 8))
+        finally:
+            server_process.terminate()
+            server_process.communicate()
+
+        self.assertEqual((stats["requests"], stats["errors"], stats["latency"]["count"]), (100, 0, 100))
+        self.assertGreater(stats["requests_per_sec"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import unittest
+from enigma_stream import *
+
+
+class TestEnigmaStream(unittest.TestCase):
+    def setUp(self):
+        self.settings = ((2, 4, 5), ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"], ['B', 'L', 'A'],
+                         [2, 21, 12], 'B')
+        self.encrypted_msg = b"EDPUD NRGYS ZRCXN UYTPO MRMBO FKTBZ REZKM LXLVE FGUEY SIOZV EQMIK UBPMM YLKLT TDEIS\n" \
+                             b"mdica gykua ctcdo mohwx muuia ubsts lrnbz szwnr fxwfy ssxjz vijhi dishp rklka yupad\n"
+
+    def test_encrypt_decrypt_file(self):
+        """
+        Small blocks (splitting letter groups and lines) give the same output as enigma_run()
+        """
+        output_file = io.BytesIO()
+        num_letters = encrypt_decrypt_file(build_compiled_machine(*self.settings), io.BytesIO(self.encrypted_msg),
+                                           output_file, block_size=7)
+
+        expected = enigma_run(*self.settings, self.encrypted_msg.decode("ascii"))
+        self.assertEqual(output_file.getvalue().decode("ascii"), expected)
+        self.assertEqual(num_letters, len(expected))
+
+    def test_enigma_reader(self):
+        """
+        Reading from an EnigmaReader in pieces
+        """
+        reader = EnigmaReader(build_compiled_machine(*self.settings), io.BytesIO(self.encrypted_msg), block_size=10)
+
+        self.assertEqual(reader.read(15), b"AUFKLXABTEILUNG")
+        self.assertEqual(reader.read(5), b"XVONX")
+        self.assertEqual(len(reader.read()), 120)
+        self.assertEqual(reader.read(), b"")
+
+        # one letter at a time, and iterating after a read part way through a block
+        full_output = EnigmaReader(build_compiled_machine(*self.settings), io.BytesIO(self.encrypted_msg)).read()
+        reader = EnigmaReader(build_compiled_machine(*self.settings), io.BytesIO(self.encrypted_msg), block_size=10)
+        self.assertEqual(b"".join(iter(lambda: reader.read(1), b"")), full_output)
+        reader = EnigmaReader(build_compiled_machine(*self.settings), io.BytesIO(self.encrypted_msg), block_size=10)
+        self.assertEqual(reader.read(13) + b"".join(reader), full_output)
+        self.assertEqual(reader.read(), b"")
+
+    def test_bad_input(self):
+        """
+        Non-letter in the middle of the stream
+        """
+        output_blocks = stream_encrypt_decrypt(build_compiled_machine(*self.settings), [b"ABC", b"D3F"])
+
+        self.assertEqual(len(next(output_blocks)), 3)
+        with self.assertRaises(ValueError):
+            next(output_blocks)
+
+
+if __name__ == '__main__':
+    unittest.main()
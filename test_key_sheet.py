@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from key_sheet import *
+
+KEY_SHEET = """# date,net,rotors,rings,plugboard,reflector
+1941-07-07,ARMY,II IV V,B U L,AV BS CG DL FU HZ IN KM OW RX,B
+1941-07-07,NAVY,BETA II IV I,A A A V,AT BL DF GJ HM NW OP QY RZ VX,B-THIN
+
+1941-07-08,ARMY,1 2 3,2 21 12,,C
+"""
+
+
+class TestKeySheet(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "keys.csv")
+        self.write_sheet(KEY_SHEET)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_sheet(self, text: str):
+        with open(self.file_path, "w") as key_sheet_file:
+            key_sheet_file.write(text)
+        # make sure the change is seen even within the file system's time resolution
+        os.utime(self.file_path, ns=(os.stat(self.file_path).st_mtime_ns + 10 ** 9,) * 2)
+
+    def test_lookup_and_run(self):
+        """
+        Messages run with a key sheet entry match enigma_run() with the same settings
+        """
+        key_sheet = KeySheet(self.file_path)
+        self.assertEqual(len(key_sheet), 3)
+        self.assertIn(("1941-07-07", "navy"), key_sheet)
+
+        self.assertEqual(key_sheet.run("1941-07-07", "army", ['B', 'L', 'A'], "HELLO WORLD"),
+                         enigma_run((2, 4, 5), ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"],
+                                    ['B', 'L', 'A'], ['B', 'U', 'L'], 'B', "HELLO WORLD"))
+        self.assertEqual(key_sheet.run("1941-07-07", "NAVY", ['V', 'J', 'N', 'A'], "HELLO WORLD"),
+                         enigma_run(('BETA', 2, 4, 1), ["AT", "BL", "DF", "GJ", "HM", "NW", "OP", "QY", "RZ", "VX"],
+                                    ['V', 'J', 'N', 'A'], ['A', 'A', 'A', 'V'], 'B-THIN', "HELLO WORLD"))
+        self.assertEqual(key_sheet.run("1941-07-08", "ARMY", [1, 2, 3], "HELLO WORLD"),
+                         enigma_run((1, 2, 3), [], [1, 2, 3], [2, 21, 12], 'C', "HELLO WORLD"))
+
+        self.assertEqual(key_sheet.run("1941-07-08", "ARMY", ['A', 'B'], "HELLO"), "Bad Enigma settings")
+        self.assertEqual(key_sheet.run("1941-07-08", "ARMY", ['A', 'B', 'C'], "HELLO1"),
+                         "Bad input string. Letters only.")
+        with self.assertRaises(KeyError):
+            key_sheet.run("1941-07-09", "ARMY", ['A', 'B', 'C'], "HELLO")
+
+    def test_incremental_reload(self):
+        """
+        Reloading only rebuilds changed entries, and an unchanged file is not read again
+        """
+        key_sheet = KeySheet(self.file_path)
+        army_template = key_sheet.get_entry("1941-07-07", "ARMY").template
+        navy_template = key_sheet.get_entry("1941-07-07", "NAVY").template
+
+        self.assertEqual(key_sheet.reload(), {"added": 0, "changed": 0, "removed": 0, "unchanged": 3})
+
+        self.write_sheet(KEY_SHEET.replace(",C\n", ",B\n").replace("1941-07-07,NAVY", "1941-07-09,NAVY"))
+        self.assertEqual(key_sheet.reload(), {"added": 1, "changed": 1, "removed": 1, "unchanged": 1})
+
+        self.assertIs(key_sheet.get_entry("1941-07-07", "ARMY").template, army_template)
+        self.assertIsNot(key_sheet.get_entry("1941-07-09", "NAVY").template, navy_template)
+        self.assertIsNone(key_sheet.get_entry("1941-07-07", "NAVY"))
+        self.assertEqual(key_sheet.get_entry("1941-07-08", "ARMY").reflector, "B")
+
+    def test_bad_sheet(self):
+        """
+        A bad entry names its line and the previously loaded sheet is kept
+        """
+        key_sheet = KeySheet(self.file_path)
+
+        for bad_sheet, line in ((KEY_SHEET + "1941-07-09,ARMY,II II V,B U L,,B\n", "line 6"),
+                                (KEY_SHEET + "1941-07-09,ARMY,II IV V,B U L\n", "line 6"),
+                                (KEY_SHEET + "1941-07-08,ARMY,II IV V,B U L,,B\n", "line 6"),
+                                (KEY_SHEET.replace("B-THIN", "B"), "line 3")):
+            self.write_sheet(bad_sheet)
+            with self.assertRaises(ValueError) as context:
+                key_sheet.reload()
+            self.assertIn(line, str(context.exception))
+            self.assertEqual(len(key_sheet), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
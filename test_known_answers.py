@@ -0,0 +1,59 @@
+import unittest
+from differential_fuzz import get_engines
+from known_answers import *
+
+FULL_CORPUS_ENGINES = ("reference", "batch", "cached", "quick")  # cheap enough per vector to run every vector
+
+
+class TestKnownAnswers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.vectors = load_vectors()
+
+    def test_corpus_coverage(self):
+        """
+        Thousands of vectors, letters outside A-Z, every reflector, ring setting and turnover point of the built-in
+        rotors
+        """
+        self.assertGreater(len(self.vectors), 2000)
+        self.assertEqual([vector["id"] for vector in self.vectors], list(range(len(self.vectors))))
+
+        self.assertTrue(any(not vector["plaintext"].isascii() and not vector["ciphertext"].startswith("Bad")
+                            for vector in self.vectors))
+
+        reflectors = {vector["reflector"] for vector in self.vectors}
+        self.assertTrue(set(BUILTIN_REFLECTORS) | set(BUILTIN_THIN_REFLECTORS) <= reflectors)
+
+        for slot_i in range(3):
+            self.assertEqual({vector["ring"][-3:][slot_i] for vector in self.vectors
+                              if vector["case"] == "ring"}, set(ALPHABET_LETTERS))
+
+        for rotor in BUILTIN_ROTORS:
+            for turnover_letter in ROTOR_CATALOG[rotor][2]:
+                self.assertTrue(any(vector["rotors"][-2] == rotor and vector["start"][-2] == turnover_letter
+                                    for vector in self.vectors if vector["case"] == "turnover/middle"))
+                self.assertTrue(any(vector["rotors"][-1] == rotor and vector["start"][-1] == turnover_letter
+                                    for vector in self.vectors if vector["case"] == "turnover/right"))
+
+    def test_corpus_is_reproducible(self):
+        """
+        Generating the corpus again gives the committed vectors
+        """
+        self.assertEqual(generate_vectors(), self.vectors)
+
+    def test_engines_match_corpus(self):
+        """
+        Every engine reproduces the corpus, compiled engines (slower to set up) on the turnover and non-ASCII cases and
+        every 5th other vector
+        """
+        sampled_vectors = [vector for vector in self.vectors if vector["case"].startswith("turnover")
+                           or vector["case"] == "non-ascii" or vector["id"] % 5 == 0]
+
+        for engine_name, engine in get_engines().items():
+            with self.subTest(engine=engine_name):
+                vectors = self.vectors if engine_name in FULL_CORPUS_ENGINES else sampled_vectors
+                self.assertEqual(check_engine(engine, vectors), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
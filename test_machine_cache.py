@@ -0,0 +1,61 @@
+import unittest
+from machine_cache import *
+
+
+class TestMachineCache(unittest.TestCase):
+    def test_same_output_as_enigma_run(self):
+        """
+        Messages under the same key share one template and match enigma_run()
+        """
+        machine_cache = MachineCache()
+        settings = ((2, 4, 5), ["AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"], [2, 21, 12], 'B')
+
+        for initial_rotor_settings, msg in ((['B', 'L', 'A'], "EDPUDNRGYSZRCXNUYTPOMRMBOFKTBZREZKMLXLV"),
+                                            (['L', 'S', 'D'], "SFBWDNJUSEGQOBHKRTAREEZMWKPPRBXOHDROEQGB"),
+                                            (['B', 'L', 'A'], "EDPUDNRGYSZRCXNUYTPOMRMBOFKTBZREZKMLXLV")):
+            rotor_choices, plugboard_pairings, ring_settings, reflector = settings
+            self.assertEqual(enigma_run_cached(rotor_choices, plugboard_pairings, initial_rotor_settings,
+                                               ring_settings, reflector, msg, machine_cache=machine_cache),
+                             enigma_run(rotor_choices, list(plugboard_pairings), list(initial_rotor_settings),
+                                        list(ring_settings), reflector, msg))
+
+        self.assertEqual(machine_cache.get_stats()["hits"], 2)
+        self.assertEqual(machine_cache.get_stats()["misses"], 1)
+
+    def test_eviction(self):
+        """
+        Least recently used template is evicted first
+        """
+        machine_cache = MachineCache(max_size=2)
+        machine_cache.get_template((1, 2, 3), [], ['A', 'A', 'A'], 'B')
+        machine_cache.get_template((1, 2, 4), [], ['A', 'A', 'A'], 'B')
+        machine_cache.get_template((1, 2, 3), [], ['A', 'A', 'A'], 'B')
+        machine_cache.get_template((1, 2, 5), [], ['A', 'A', 'A'], 'B')
+
+        self.assertEqual(list(machine_cache.templates), [MachineCache.get_key((1, 2, 3), (), ('A', 'A', 'A'), 'B'),
+                                                         MachineCache.get_key((1, 2, 5), (), ('A', 'A', 'A'), 'B')])
+        self.assertEqual(machine_cache.get_stats()["evictions"], 1)
+
+    def test_bad_settings(self):
+        """
+        Bad settings (including bad starting positions) are reported and not cached
+        """
+        machine_cache = MachineCache()
+
+        self.assertEqual(enigma_run_cached((2, 2, 3), ["AM"], ['A', 'B', 'L'], [24, 13, 22], 'A', "aaa",
+                                           machine_cache=machine_cache), "Bad Enigma settings")
+        self.assertEqual(enigma_run_cached((2, 1, 3), ["AM"], ['A', 'B'], [24, 13, 22], 'A', "aaa",
+                                           machine_cache=machine_cache), "Bad Enigma settings")
+        self.assertEqual(machine_cache.get_stats()["size"], 1)
+
+        # settings equal to cached ones but of another type are checked, not looked up
+        self.assertNotEqual(enigma_run_cached((2, 1, 3), ["AM"], ['A', 'B', 'L'], [24, 13, 22], 'A', "aaa",
+                                              machine_cache=machine_cache), "Bad Enigma settings")
+        self.assertEqual(enigma_run_cached((2.0, 1, 3), ["AM"], ['A', 'B', 'L'], [24, 13, 22], 'A', "aaa",
+                                           machine_cache=machine_cache), "Bad Enigma settings")
+        self.assertEqual(enigma_run_cached((2, 1, 3), ["AM"], ['A', 'B', 'L'], [24, 13.0, 22], 'A', "aaa",
+                                           machine_cache=machine_cache), "Bad Enigma settings")
+
+
+if __name__ == '__main__':
+    unittest.main()
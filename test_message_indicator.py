@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from message_indicator import *
+
+DAILY_KEY = ((2, 4, 5), ("AV", "BS", "CG", "DL", "FU", "HZ", "IN", "KM", "OW", "RX"), ('B', 'U', 'L'), 'B')
+
+
+class TestMessageIndicator(unittest.TestCase):
+    def test_known_indicator(self):
+        """
+        The indicator is the message key typed twice at the ground setting, the message starts at the message key
+        """
+        rotor_choices, plugboard_pairings, ring_settings, reflector = DAILY_KEY
+        compiled_machine = build_daily_key_machine(DAILY_KEY)
+
+        ciphertext = encrypt_with_indicator(compiled_machine, "ABL", "KJP", "HELLO WORLD")
+        self.assertEqual(ciphertext[:6], enigma_run(rotor_choices, list(plugboard_pairings), ['A', 'B', 'L'],
+                                                    list(ring_settings), reflector, "KJPKJP"))
+        self.assertEqual(ciphertext[6:], enigma_run(rotor_choices, list(plugboard_pairings), ['K', 'J', 'P'],
+                                                    list(ring_settings), reflector, "HELLO WORLD"))
+
+        self.assertEqual(decrypt_with_indicator(compiled_machine, "ABL", ciphertext), "HELLOWORLD")
+        self.assertEqual(decrypt_with_indicator(compiled_machine, [1, 2, 12], ciphertext.lower()), "HELLOWORLD")
+
+    def test_bad_indicator(self):
+        """
+        A wrong ground setting, a garbled indicator or a too short message is reported
+        """
+        compiled_machine = build_daily_key_machine(DAILY_KEY)
+        ciphertext = encrypt_with_indicator(compiled_machine, "ABL", "KJP", "HELLO WORLD")
+
+        self.assertEqual(decrypt_with_indicator(compiled_machine, "ABM", ciphertext), "Bad indicator")
+        garbled = ciphertext[:4] + ("A" if ciphertext[4] != "A" else "B") + ciphertext[5:]
+        self.assertEqual(decrypt_with_indicator(compiled_machine, "ABL", garbled), "Bad indicator")
+        self.assertEqual(decrypt_with_indicator(compiled_machine, "ABL", ciphertext[:5]), "Bad indicator")
+        self.assertEqual(decrypt_with_indicator(compiled_machine, "AB", ciphertext), "Bad Enigma settings")
+        self.assertEqual(decrypt_with_indicator(compiled_machine, "ABL", "HELLO1"), "Bad input string. Letters only.")
+        self.assertEqual(encrypt_with_indicator(compiled_machine, "ABL", "KJ", "HELLO"), "Bad Enigma settings")
+
+    def test_batch(self):
+        """
+        A batch reuses one machine per daily key and round trips, with daily keys given directly or from a key sheet
+        """
+        other_key = ((1, 2, 3), (), ('A', 'A', 'A'), 'C')
+        bad_key = ((1, 1, 3), (), ('A', 'A', 'A'), 'C')
+        messages = [(DAILY_KEY, "ABL", "KJP", "HELLO WORLD"), (other_key, "QWE", "RTZ", "ATTACK AT DAWN"),
+                    (DAILY_KEY, "XYZ", "PKJ", "GOODBYE" * 100), (bad_key, "ABL", "KJP", "HELLO")]
+
+        ciphertexts = run_indicator_batch(messages, decrypt=False)
+        self.assertEqual(ciphertexts[3], "Bad Enigma settings")
+        self.assertEqual(run_indicator_batch([(daily_key, ground_setting, ciphertext) for
+                                              (daily_key, ground_setting, message_key, message), ciphertext
+                                              in zip(messages, ciphertexts)]),
+                         ["HELLOWORLD", "ATTACKATDAWN", "GOODBYE" * 100, "Bad Enigma settings"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "keys.csv")
+            with open(file_path, "w") as key_sheet_file:
+                key_sheet_file.write("1941-07-07,ARMY,II IV V,B U L,AV BS CG DL FU HZ IN KM OW RX,B\n")
+            key_sheet = KeySheet(file_path)
+
+        self.assertEqual(run_indicator_batch([(("1941-07-07", "army"), "ABL", ciphertexts[0]),
+                                              (("1941-07-08", "army"), "ABL", ciphertexts[0])], key_sheet=key_sheet),
+                         ["HELLOWORLD", "Bad Enigma settings"])
+
+
+if __name__ == '__main__':
+    unittest.main()
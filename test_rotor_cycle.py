@@ -0,0 +1,52 @@
+import unittest
+from compiled_enigma import *
+from rotor_cycle import *
+
+
+class TestRotorCycle(unittest.TestCase):
+    def test_matches_stepping(self):
+        """
+        States along a cycle match CompiledEnigma stepping, including going around the cycle more than once
+        """
+        rotor_cycle = get_rotor_cycle((2, 4, 5), ('B', 'L', 'A'))
+        compiled_machine = CompiledEnigma(Enigma((2, 4, 5), (), ('B', 'L', 'A'), ('A', 'A', 'A'), 'B'))
+
+        self.assertEqual(rotor_cycle.state_sequence(0, 2000), compiled_machine.state_sequence(2000))
+        self.assertEqual(rotor_cycle.state_sequence(2000, 10), compiled_machine.state_sequence(10))
+        self.assertEqual(rotor_cycle.positions_at(2010), tuple(compiled_machine.positions))
+        self.assertEqual(rotor_cycle.positions_at(0), (1, 11, 0))
+
+    def test_shared_cycle(self):
+        """
+        Starting positions on the same cycle share one array
+        """
+        rotor_cycle = get_rotor_cycle((1, 2, 3), (0, 0, 0))
+        later_cycle = get_rotor_cycle((1, 2, 3), rotor_cycle.positions_at(100))
+
+        self.assertIs(later_cycle.cycle, rotor_cycle.cycle)
+        self.assertEqual(later_cycle.state_at(0), rotor_cycle.state_at(100))
+
+    def test_cycle_table_cache_bounded(self):
+        """
+        Cycle tables are shared, and the cache never holds more than CYCLE_TABLE_CACHE_SIZE of them
+        """
+        self.assertIs(get_cycle_table((4,), (21,)), get_cycle_table((4,), (21,)))
+
+        for notch_i in range(CYCLE_TABLE_CACHE_SIZE + 10):
+            get_cycle_table((notch_i % 26,), (notch_i // 26,))
+            self.assertLessEqual(len(CYCLE_TABLE_CACHE), CYCLE_TABLE_CACHE_SIZE)
+
+    def test_period_statistics(self):
+        """
+        With one turnover point per rotor, the left rotor steps 26 times in a row each time round, so every
+        starting position has the same period
+        """
+        stats = period_statistics((1, 2, 3))
+
+        self.assertEqual(stats["num_cycles"] * stats["max_period"], NUM_ROTOR_STATES)
+        self.assertEqual(stats["starting_positions_per_period"], {676: NUM_ROTOR_STATES})
+        self.assertEqual(get_rotor_cycle((1, 2, 3), ('Q', 'E', 'V')).period, 676)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+from table_store import *
+
+KEY_SHEET = """1941-07-07,ARMY,II IV V,B U L,AV BS CG DL FU HZ IN KM OW RX,B
+1941-07-07,NAVY,BETA II IV I,A A A V,AT BL DF GJ HM NW OP QY RZ VX,B-THIN
+1941-07-08,ARMY,II IV V,B U L,AV BS CG DL FU HZ IN KM OW RX,B
+"""
+
+
+class TestTableStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store_dir = os.path.join(self.temp_dir.name, "store")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stored_tables_match(self):
+        """
+        Machines using stored (memory-mapped) tables encrypt the same as enigma_run(), and share one mapping
+        """
+        table_store = TableStore(self.store_dir)
+        settings = ((2, 4, 5), ("AV", "BS", "CG"), ('B', 'L', 'A'), ('B', 'U', 'L'), 'B')
+
+        first_machine = table_store.get_compiled_machine(Enigma(*settings))
+        self.assertEqual(table_store.get_stats(), {"hits": 1, "misses": 1, "invalid": 0, "mapped": 1})
+
+        # a new store (as in another process) maps the saved file
+        second_machine = TableStore(self.store_dir).get_compiled_machine(Enigma(*settings))
+        self.assertIsInstance(second_machine.state_tables, memoryview)
+
+        expected = enigma_run(settings[0], list(settings[1]), list(settings[2]), list(settings[3]), settings[4],
+                              "HELLOWORLD" * 300)
+        self.assertEqual(first_machine.encrypt_decrypt("HELLOWORLD" * 300), expected)
+        self.assertEqual(second_machine.encrypt_decrypt("HELLOWORLD" * 300), expected)
+
+        self.assertIs(table_store.get_compiled_machine(Enigma(*settings)).state_tables, first_machine.state_tables)
+
+    def test_keys_follow_wiring(self):
+        """
+        Table keys change with any setting the tables depend on, but not with starting positions
+        """
+        def key(rotors=(2, 4, 5), plugboard=("AV",), start=('A', 'A', 'A'), ring=('A', 'A', 'A'), reflector='B'):
+            return get_table_key(CompiledEnigma(Enigma(rotors, plugboard, start, ring, reflector)))
+
+        self.assertEqual(key(), key(start=('Q', 'E', 'V')))
+        self.assertEqual(len({key(), key(rotors=(2, 4, 1)), key(plugboard=("AW",)), key(ring=('A', 'A', 'B')),
+                              key(reflector='C')}), 5)
+        self.assertNotEqual(key(('BETA', 2, 4, 5), start=('A',) * 4, ring=('A',) * 4, reflector='B-THIN'),
+                            key(('BETA', 2, 4, 5), start=('B', 'A', 'A', 'A'), ring=('A',) * 4, reflector='B-THIN'))
+
+    def test_corrupt_and_stale_files(self):
+        """
+        Corrupt files are rebuilt, verify reports them and prune removes them (and old temporary files)
+        """
+        table_store = TableStore(self.store_dir)
+        enigma_machine = Enigma((1, 2, 3), (), ('A', 'A', 'A'), ('A', 'A', 'A'), 'B')
+        file_path = table_store.save_tables(CompiledEnigma(enigma_machine))
+        if os.name == "posix":
+            self.assertEqual(os.stat(file_path).st_mode & 0o777, TABLE_FILE_MODE)
+
+        with open(file_path, "r+b") as table_file:
+            table_file.seek(-1, os.SEEK_END)
+            table_file.write(b"?")
+        with open(os.path.join(self.store_dir, "0" * 64 + TABLE_FILE_EXTENSION), "wb") as table_file:
+            table_file.write(b"not a table file")
+
+        self.assertEqual([error is None for file_path, header, error in table_store.check_files()], [False, False])
+
+        new_store = TableStore(self.store_dir)
+        compiled_machine = new_store.get_compiled_machine(enigma_machine)
+        self.assertEqual(new_store.get_stats()["invalid"], 1)
+        self.assertEqual(compiled_machine.encrypt_decrypt("HELLO"),
+                         enigma_run((1, 2, 3), [], ['A', 'A', 'A'], ['A', 'A', 'A'], 'B', "HELLO"))
+
+        # a rejected file is not left mapped, even while its error (and the frame that mapped it) is still around
+        if os.path.exists("/proc/self/maps"):
+            try:
+                open_table_file(os.path.join(self.store_dir, "0" * 64 + TABLE_FILE_EXTENSION))
+            except ValueError:
+                with open("/proc/self/maps") as maps_file:
+                    self.assertNotIn("0" * 64, maps_file.read())
+
+        # temporary files being written (recent) are kept, ones left by interrupted writes (old) are removed
+        for temp_name, age in (("new.tmp", 0), ("old.tmp", 2 * TEMP_FILE_MAX_AGE)):
+            temp_path = os.path.join(self.store_dir, temp_name)
+            open(temp_path, "wb").close()
+            os.utime(temp_path, (time.time() - age, time.time() - age))
+
+        self.assertEqual(table_store.prune(), {"kept": 2, "removed": 2})
+        self.assertTrue(os.path.exists(os.path.join(self.store_dir, "new.tmp")))
+
+    def test_prebuild_command(self):
+        """
+        Prebuilding a key sheet stores one file per distinct configuration
+        """
+        key_sheet_path = os.path.join(self.temp_dir.name, "keys.csv")
+        with open(key_sheet_path, "w") as key_sheet_file:
+            key_sheet_file.write(KEY_SHEET)
+
+        self.assertEqual(prebuild_key_sheet(TableStore(self.store_dir), KeySheet(key_sheet_path)),
+                         {"built": 2, "stored": 1})
+        self.assertEqual(prebuild_key_sheet(TableStore(self.store_dir), KeySheet(key_sheet_path)),
+                         {"built": 0, "stored": 3})
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            self.assertEqual(main(["verify", "--store", self.store_dir]), 0)
+        self.assertIn("2 table file(s), 0 bad", stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
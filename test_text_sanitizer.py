@@ -0,0 +1,59 @@
+import unittest
+from enigma_stream import *
+
+
+class TestTextSanitizer(unittest.TestCase):
+    def test_policies(self):
+        """
+        Each policy on text with spaces, punctuation and a non-ASCII character
+        """
+        input_bytes = "Attack at dawn, 5am!\n".encode("utf-8")
+
+        with self.assertRaises(ValueError):
+            sanitize_input_bytes(input_bytes, "reject")
+        self.assertEqual(sanitize_input_bytes(b"Attack at\tdawn\n", "reject"), b"ATTACKATDAWN")
+        self.assertEqual(sanitize_input_bytes(input_bytes, "strip"), b"ATTACKATDAWNAM")
+        self.assertEqual(sanitize_input_bytes("Grüße".encode("utf-8"), "preserve"), b"GRE")
+        with self.assertRaises(ValueError):
+            sanitize_input_bytes(input_bytes, "ignore")
+
+    def test_reject_matches_sanitize_input_text(self):
+        """
+        "reject" keeps and removes the same ASCII characters as sanitize_input_text(), and rejects non-ASCII letters
+        """
+        for byte in range(128):
+            input_text = "Ab" + chr(byte) + "c"
+            try:
+                sanitized_bytes = sanitize_input_bytes(input_text.encode("ascii"), "reject").decode("ascii")
+            except ValueError:
+                sanitized_bytes = False
+            self.assertEqual(sanitized_bytes, sanitize_input_text(input_text), hex(byte))
+
+        with self.assertRaises(ValueError):
+            sanitize_input_bytes("Grüße".encode("utf-8"), "reject")
+
+    def test_restore_layout(self):
+        """
+        Non-letters go back around the output letters
+        """
+        self.assertEqual(restore_layout(b"ab, cd!\n", b"WXYZ"), b"WX, YZ!\n")
+        self.assertEqual(restore_layout(b"...", b""), b"...")
+
+    def test_preserve_round_trip(self):
+        """
+        Encrypting then decrypting with the preserve policy gives back the text (uppercased), layout included
+        """
+        settings = ((2, 4, 5), ["AV", "BS"], ['B', 'L', 'A'], ['B', 'U', 'L'], 'B')
+        plaintext = b"Wetter: heute klar, 15 Grad.\nEnde.\n"
+
+        ciphertext = b"".join(stream_encrypt_decrypt(build_compiled_machine(*settings), [plaintext[:9], plaintext[9:]],
+                                                     "preserve"))
+        decrypted = b"".join(stream_encrypt_decrypt(build_compiled_machine(*settings), [ciphertext], "preserve"))
+
+        self.assertEqual(ciphertext.translate(None, NON_LETTERS).decode("ascii"),
+                         enigma_run(*settings, "WetterheuteklarGradEnde"))
+        self.assertEqual(decrypted, plaintext.upper())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from compiled_enigma import *
+from rotor_cycle import *
+
+
+class TestWiringCatalog(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(14)
+        self.alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        self.msg = "".join(rng.choice(self.alphabet) for _ in range(3000))
+
+        # double notch rotors 6-8 and M4 settings, including a fourth rotor and ring not left at 'A'
+        self.settings_list = [((6, 7, 8), ("AB", "CD"), ('Y', 'L', 'Z'), ('A', 'A', 'A'), 'B'),
+                              ((1, 8, 6), ("QW",), ('C', 'M', 'K'), ('B', 'F', 'Q'), 'C'),
+                              (('BETA', 2, 4, 7), ("AV", "BS"), ('Q', 'E', 'L', 'Y'), ('E', 'B', 'K', 'D'), 'B-THIN'),
+                              (('GAMMA', 6, 3, 5), (), ('A', 'Z', 'M', 'B'), ('A', 'C', 'D', 'E'), 'C-THIN')]
+        for _ in range(4):
+            self.settings_list.append((tuple(rng.sample(range(1, 9), 3)), ("MN",),
+                                       tuple(rng.choice(self.alphabet) for _ in range(3)),
+                                       tuple(rng.choice(self.alphabet) for _ in range(3)), rng.choice("ABC")))
+
+    def test_m4_matches_m3(self):
+        """
+        The M4 with Beta/Gamma at 'A' (ring 'A') and thin reflector B/C works the same as the M3 with reflector B/C
+        """
+        for fourth_rotor, reflector in (('BETA', 'B'), ('GAMMA', 'C')):
+            self.assertEqual(enigma_run((fourth_rotor, 2, 1, 3), ["AM", "FI"], ['A', 'B', 'L', 'Q'],
+                                        ['A', 24, 13, 22], reflector + "-thin", self.msg),
+                             enigma_run((2, 1, 3), ["AM", "FI"], ['B', 'L', 'Q'], [24, 13, 22], reflector, self.msg))
+
+    def test_compiled_and_seek_match_enigma(self):
+        """
+        CompiledEnigma, seek() and rotor cycles match Enigma for double notch rotors and the M4
+        """
+        for settings in self.settings_list:
+            expected = Enigma(*settings).encrypt_decrypt(self.msg)
+            self.assertEqual(CompiledEnigma(Enigma(*settings)).encrypt_decrypt(self.msg), expected)
+
+            enigma_machine = Enigma(*settings)
+            enigma_machine.seek(2000)
+            self.assertEqual(enigma_machine.encrypt_decrypt(self.msg[2000:]), expected[2000:])
+
+            rotor_cycle = get_rotor_cycle(settings[0], enigma_machine.starting_rotor_pos)
+            self.assertEqual(rotor_cycle.positions_at(len(self.msg)),
+                             tuple(rotor.get_rotor_pos_i() for rotor in enigma_machine.rotors_used[-3:]))
+
+    def test_bad_settings(self):
+        """
+        Fourth rotors and thin reflectors only fit the M4, and only in their own slot
+        """
+        self.assertEqual(enigma_run(('BETA', 2, 1, 3), [], ['A', 'B', 'L', 'Q'], ['A'] * 4, 'B', "aaa"),
+                         "Bad Enigma settings")
+        self.assertEqual(enigma_run((2, 1, 3), [], ['A', 'B', 'L'], ['A'] * 3, 'B-THIN', "aaa"),
+                         "Bad Enigma settings")
+        self.assertEqual(enigma_run((2, 'BETA', 1, 3), [], ['A', 'B', 'L', 'Q'], ['A'] * 4, 'B-THIN', "aaa"),
+                         "Bad Enigma settings")
+        self.assertEqual(enigma_run(('BETA', 2, 1), [], ['A', 'B', 'L'], ['A'] * 3, 'B', "aaa"),
+                         "Bad Enigma settings")
+        self.assertEqual(enigma_run(('BETA', 2, 1, 3), [], ['A', 'B', 'L'], ['A'] * 3, 'B-THIN', "aaa"),
+                         "Bad Enigma settings")
+        self.assertEqual(enigma_run((9, 2, 1), [], ['A', 'B', 'L'], ['A'] * 3, 'B', "aaa"),
+                         "Bad Enigma settings")
+
+    def test_load_wiring_file(self):
+        """
+        Rotors and reflectors from a wiring file can be used like built-in ones, bad wirings are refused
+        """
+        wirings = {"rotors": {"91": {"wiring": "ekmflgdqvzntowyhxuspaibrcj", "turnover": "QZ"}},
+                   "reflectors": {"TEST-B": {"wiring": "YRUHQSLDPXNGOKMIEBFZCWVJAT"}}}
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "wirings.json")
+            with open(file_path, "w") as wiring_file:
+                json.dump(wirings, wiring_file)
+            load_wiring_file(file_path)
+
+        self.assertEqual(ROTOR_TABLES[91][2], (16, 25))
+        self.assertEqual(enigma_run((91, 2, 3), ["AB"], ['A', 'B', 'C'], ['A'] * 3, 'test-b', self.msg[:500]),
+                         enigma_run((1, 2, 3), ["AB"], ['A', 'B', 'C'], ['A'] * 3, 'B', self.msg[:500]))
+
+        with self.assertRaises(ValueError):
+            add_rotor(91, "EKMFLGDQVZNTOWYHXUSPAIBRCJ", "Q")
+        with self.assertRaises(ValueError):
+            add_rotor(92, "EKMFLGDQVZNTOWYHXUSPAIBRCC", "Q")
+        with self.assertRaises(ValueError):
+            add_reflector("TEST-X", "EKMFLGDQVZNTOWYHXUSPAIBRCJ")
+
+
+if __name__ == '__main__':
+    unittest.main()
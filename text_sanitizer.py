@@ -0,0 +1,67 @@
+"""
+Sanitization of bytes input with precomputed translation and deletion tables, so the work is done by
+bytes.translate() instead of a Python loop over every character.
+
+Policies for characters other than ASCII letters:
+- "reject": whitespace is removed, anything else is an error. On ASCII text this is the same as
+  sanitize_input_text(), but a non-ASCII letter such as "Ä" is an error here, where sanitize_input_text() would let
+  it through (the tables work on single bytes, and the compiled machine only takes ASCII letters).
+- "strip": everything that is not a letter is removed
+- "preserve": same letters as "strip", and restore_layout() puts everything else back around the output letters
+"""
+
+import re
+
+SANITIZE_POLICIES = ("reject", "strip", "preserve")
+
+ASCII_LETTERS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+# every ASCII character str.split() treats as whitespace
+WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# lowercase letters to uppercase, every other byte unchanged
+UPPERCASE_TABLE = bytes.maketrans(ASCII_LETTERS[26:], ASCII_LETTERS[:26])
+
+# every byte that is not an ASCII letter
+NON_LETTERS = bytes(byte for byte in range(256) if byte not in ASCII_LETTERS)
+
+LETTER_RUNS = re.compile(rb"([A-Za-z]+)")
+
+
+def sanitize_input_bytes(input_bytes: bytes, policy: str = "reject") -> bytes:
+    """
+    Output only the uppercase letters of input_bytes.
+
+    Raises ValueError if the "reject" policy finds a character other than an ASCII letter or ASCII whitespace.
+    """
+
+    if policy == "reject":
+        sanitized_bytes = input_bytes.translate(UPPERCASE_TABLE, WHITESPACE)
+
+        # isalpha() on bytes only accepts ASCII letters
+        if sanitized_bytes and not sanitized_bytes.isalpha():
+            raise ValueError("Bad input string. Letters only.")
+
+        return sanitized_bytes
+
+    elif policy in ("strip", "preserve"):
+        return input_bytes.translate(UPPERCASE_TABLE, NON_LETTERS)
+
+    raise ValueError("policy must be one of " + ", ".join(SANITIZE_POLICIES))
+
+
+def restore_layout(input_bytes: bytes, output_letters: bytes) -> bytes:
+    """
+    Put the non-letters of input_bytes back around output_letters (the encrypted/decrypted letters of input_bytes),
+    so spaces, punctuation and line breaks come out where they went in.
+    """
+
+    # split() with a capture group alternates non-letter runs (even indexes) and letter runs (odd indexes)
+    pieces = LETTER_RUNS.split(input_bytes)
+
+    letter_i = 0
+    for piece_i in range(1, len(pieces), 2):
+        run_length = len(pieces[piece_i])
+        pieces[piece_i] = output_letters[letter_i:letter_i + run_length]
+        letter_i += run_length
+
+    return b"".join(pieces)
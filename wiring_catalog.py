@@ -0,0 +1,195 @@
+"""
+Catalog of rotor and reflector wirings. The built-in catalog covers rotors 1-8, the M4 fourth rotors Beta and Gamma
+and reflectors A-C plus the M4 thin reflectors. More wirings can be loaded from a JSON file, either with
+load_wiring_file() or by pointing the ENIGMA_WIRING_FILE environment variable at one before importing.
+
+Every wiring is compiled once into integer tables ('A' is 0) as soon as it is added to the catalog.
+
+A wiring file looks like:
+    {
+        "rotors": {"9": {"wiring": "EKMFLGDQVZNTOWYHXUSPAIBRCJ", "turnover": "QZ"},
+                   "DELTA": {"wiring": "...", "fourth_rotor": true}},
+        "reflectors": {"D": {"wiring": "YRUHQSLDPXNGOKMIEBFZCWVJAT", "thin": false}}
+    }
+Rotor names made of digits become int rotor numbers, every other name is uppercased.
+"""
+
+import os
+
+ALPHABET_STR = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# rotor name: (output (R-L), turnover points), rotors turning over at 'Z' and 'M' have a notch at both
+BUILTIN_ROTORS = {
+    1: ("EKMFLGDQVZNTOWYHXUSPAIBRCJ", "Q"),
+    2: ("AJDKSIRUXBLHWTMCQGZNPYFVOE", "E"),
+    3: ("BDFHJLCPRTXVZNYEIWGAKMUSQO", "V"),
+    4: ("ESOVPZJAYQUIRHXLNFTGKDCMWB", "J"),
+    5: ("VZBRGITYUPSDNHLXAWMJQOFECK", "Z"),
+    6: ("JPGVOUMFYQBENHZRDKASXLICTW", "ZM"),
+    7: ("NZJHGRCXMYSWBOUFAIVLPEKQDT", "ZM"),
+    8: ("FKQHTLXOCBJSPDZRAMEWNIUYGV", "ZM")
+}
+
+# M4 fourth rotors, only fit left of the other three rotors and never step
+BUILTIN_FOURTH_ROTORS = {
+    "BETA": "LEYJVCNIXWPBQMDRTAKZGFUHOS",
+    "GAMMA": "FSOKANUERHMBTIYCWLQPZXVGJD"
+}
+
+BUILTIN_REFLECTORS = {
+    'A': "EJMZALYXVBWFCRQUONTSPIKHGD",
+    'B': "YRUHQSLDPXNGOKMIEBFZCWVJAT",
+    'C': "FVPJIAOYEDRZXWGCTKUQSBNMHL"
+}
+
+# M4 thin reflectors, only used together with a fourth rotor
+BUILTIN_THIN_REFLECTORS = {
+    "B-THIN": "ENKQAUYWJICOPBLMDXZVFTHRGS",
+    "C-THIN": "RDOBJNTKVEHMLFCWZAXGYIPSUQ"
+}
+
+# shared, read only once set up (only add_rotor() and add_reflector() change them):
+# rotor name: (output (R-L), output (L-R, aka reverse output), turnover points)
+ROTOR_CATALOG = {}
+# rotor name: (output indexes, reverse output indexes, turnover point indexes)
+ROTOR_TABLES = {}
+FOURTH_ROTORS = set()
+
+# reflector name: output
+REFLECTOR_CATALOG = {}
+# reflector name: output indexes
+REFLECTOR_TABLES = {}
+THIN_REFLECTORS = set()
+
+
+def normalize_name(name: int or str) -> int or str:
+    """ Output the catalog key of a rotor or reflector name, uppercased if it is a str. """
+    return name.upper() if isinstance(name, str) else name
+
+
+def check_wiring(wiring: str) -> bool:
+    """ Check if wiring is a str holding every uppercase letter exactly once. """
+    return isinstance(wiring, str) and len(wiring) == 26 and set(wiring) == set(ALPHABET_STR)
+
+
+def add_rotor(name: int or str, wiring: str, turnover: str = "", fourth_rotor: bool = False):
+    """
+    Add a rotor to the catalog and compile its integer tables.
+
+    Raises ValueError if the wiring or turnover points are bad, or a rotor of that name is already in the catalog.
+    """
+
+    name = normalize_name(name)
+    wiring = wiring.upper() if isinstance(wiring, str) else wiring
+    turnover = turnover.upper() if isinstance(turnover, str) else turnover
+
+    if name in ROTOR_CATALOG:
+        raise ValueError("Rotor " + str(name) + " is already in the catalog.")
+    elif not check_wiring(wiring):
+        raise ValueError("Rotor " + str(name) + " wiring must use every letter exactly once.")
+    elif not isinstance(turnover, str) or not set(turnover) <= set(ALPHABET_STR):
+        raise ValueError("Rotor " + str(name) + " turnover points must be letters.")
+    elif fourth_rotor and turnover:
+        raise ValueError("Fourth rotor " + str(name) + " never steps, so it cannot have turnover points.")
+
+    output_indexes = bytes(ord(letter) - 65 for letter in wiring)
+
+    # reverse output: the input letter of every output letter
+    reverse_indexes = bytearray(26)
+    for letter_i, output_letter_i in enumerate(output_indexes):
+        reverse_indexes[output_letter_i] = letter_i
+    reverse_wiring = "".join(chr(letter_i + 65) for letter_i in reverse_indexes)
+
+    ROTOR_CATALOG[name] = (wiring, reverse_wiring, turnover)
+    ROTOR_TABLES[name] = (output_indexes, bytes(reverse_indexes), tuple(sorted(set(ord(letter) - 65
+                                                                                   for letter in turnover))))
+    if fourth_rotor:
+        FOURTH_ROTORS.add(name)
+
+
+def add_reflector(name: str, wiring: str, thin: bool = False):
+    """
+    Add a reflector to the catalog and compile its integer table.
+
+    Raises ValueError if the wiring does not swap letters in pairs, or a reflector of that name is already in the
+    catalog.
+    """
+
+    name = normalize_name(name)
+    wiring = wiring.upper() if isinstance(wiring, str) else wiring
+
+    if not isinstance(name, str):
+        raise ValueError("Reflector names must be a str.")
+    elif name in REFLECTOR_CATALOG:
+        raise ValueError("Reflector " + name + " is already in the catalog.")
+    elif not check_wiring(wiring):
+        raise ValueError("Reflector " + name + " wiring must use every letter exactly once.")
+
+    output_indexes = bytes(ord(letter) - 65 for letter in wiring)
+
+    # a reflector swaps letters in pairs and never sends a letter back as itself
+    for letter_i, output_letter_i in enumerate(output_indexes):
+        if output_letter_i == letter_i or output_indexes[output_letter_i] != letter_i:
+            raise ValueError("Reflector " + name + " wiring must swap letters in pairs.")
+
+    REFLECTOR_CATALOG[name] = wiring
+    REFLECTOR_TABLES[name] = output_indexes
+    if thin:
+        THIN_REFLECTORS.add(name)
+
+
+def load_wiring_file(file_path: str):
+    """
+    Add the rotors and reflectors of a JSON wiring file (see the module docstring) to the catalog.
+
+    Raises ValueError if an entry is bad, entries before it are still added.
+    """
+
+    # imported here, most runs never load a wiring file and json is slow to import
+    import json
+
+    with open(file_path, encoding="utf-8") as wiring_file:
+        wirings = json.load(wiring_file)
+
+    for name, rotor in wirings.get("rotors", {}).items():
+        add_rotor(int(name) if name.isdigit() else name, rotor["wiring"], rotor.get("turnover", ""),
+                  rotor.get("fourth_rotor", False))
+
+    for name, reflector in wirings.get("reflectors", {}).items():
+        add_reflector(name, reflector["wiring"], reflector.get("thin", False))
+
+
+def is_stepping_rotor(name: int or str) -> bool:
+    """ Check if name is a rotor in the catalog that fits the three stepping rotor slots. """
+
+    # unhashable names can never be in the catalog
+    try:
+        name = normalize_name(name)
+        return name in ROTOR_CATALOG and name not in FOURTH_ROTORS
+    except TypeError:
+        return False
+
+
+def is_fourth_rotor(name: int or str) -> bool:
+    """ Check if name is a rotor in the catalog that only fits the M4 fourth rotor slot. """
+
+    try:
+        return normalize_name(name) in FOURTH_ROTORS
+    except TypeError:
+        return False
+
+
+##############################################################################
+# Build the catalog
+##############################################################################
+for _name, (_wiring, _turnover) in BUILTIN_ROTORS.items():
+    add_rotor(_name, _wiring, _turnover)
+for _name, _wiring in BUILTIN_FOURTH_ROTORS.items():
+    add_rotor(_name, _wiring, fourth_rotor=True)
+for _name, _wiring in BUILTIN_REFLECTORS.items():
+    add_reflector(_name, _wiring)
+for _name, _wiring in BUILTIN_THIN_REFLECTORS.items():
+    add_reflector(_name, _wiring, thin=True)
+
+if os.environ.get("ENIGMA_WIRING_FILE"):
+    load_wiring_file(os.environ["ENIGMA_WIRING_FILE"])